@@ -1,76 +1,309 @@
+import asyncio
 import pandas as pd
-from io import BytesIO
-from backend.services.graph import create_analysis_graph
-from typing import Dict, Any
+from backend.services.graph import analysis_options, create_analysis_graph
+from backend.services.datasets import register_dataframe, release_dataframe
+from backend.services.executor import run_blocking, invoke_graph
+from backend.services.streaming import graph_events
+from backend.services.cache import CACHE_ENABLED, result_cache, make_cache_key
+from backend.services.singleflight import SingleFlight
+from backend.services.uploads import SpooledUpload, spool_upload
+from backend.services.ingest import OPTIMIZE_DTYPES, optimize_dtypes
+from backend.services.engines import Engine, select_engine
+from backend.services.sampling import sample_csv
+from backend.services.chart_store import chart_context, chart_datasets
+from typing import Dict, Any, AsyncIterator, Callable, Optional, Tuple
 
 
 class DataAnalyzer:
     def __init__(self):
         self.graph = create_analysis_graph()
+        self.inflight = SingleFlight()
     
-    async def analyze_csv(self, file_content: bytes) -> Dict[str, Any]:
+    async def _load_dataframe(self, upload: SpooledUpload, engine: Engine,
+                              sampling: Optional[Dict[str, Any]] = None) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        """
+        Parse or profile the upload with the selected compute engine.
+        
+        Args:
+            upload: CSV upload spooled to disk
+            engine: Compute engine from select_engine
+            sampling: Options for sample_csv; when given, statistics are
+                estimated from a random sample instead
+        
+        Returns:
+            Tuple of the dataframe to analyze and, for profiled or sampled
+            files, the precomputed statistics; the dataframe is then a row
+            sample
+        """
+        try:
+            if sampling is not None:
+                df, profile = await run_blocking(sample_csv, upload.path, **sampling)
+            else:
+                df, profile = await run_blocking(engine.profile_csv, upload.path, upload.size)
+            if profile is not None and OPTIMIZE_DTYPES:
+                df = await run_blocking(optimize_dtypes, df)
+        except pd.errors.EmptyDataError:
+            raise ValueError("CSV file is empty or invalid")
+        except pd.errors.ParserError as e:
+            raise ValueError(f"Error parsing CSV file: {str(e)}")
+        
+        if df.empty:
+            raise ValueError("CSV file is empty")
+        
+        return df, profile
+    
+    def _request_key(self, upload: SpooledUpload, engine: Engine, sampling: Optional[Dict[str, Any]] = None) -> str:
+        options = {**analysis_options(), **engine.options(upload.size)}
+        if sampling is not None:
+            options["sampling"] = sampling
+        return make_cache_key(upload.fingerprint, options)
+    
+    def _initial_state(self, df_key: str, profile: Optional[Dict[str, Any]] = None,
+                       dataset_id: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "messages": [],
+            "df_key": df_key,
+            "dataset_id": dataset_id or df_key,
+            "profile": profile,
+            "analysis_results": {},
+            "narrative_summary": ""
+        }
+    
+    def _build_response(self, final_state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "narrative_summary": final_state["narrative_summary"],
+            "analysis_results": final_state["analysis_results"],
+            "dataset_id": final_state["dataset_id"],
+            "status": "success",
+            "message": "Analysis completed successfully"
+        }
+    
+    async def _retain_chart_dataset(self, dataset_id: str, df: pd.DataFrame, analysis_results: Dict[str, Any]) -> None:
+        # Cached analyses spill their dataset too, so charts outlive its residency.
+        context = chart_context(analysis_results["basic_stats"], analysis_results.get("correlations"))
+        await asyncio.to_thread(chart_datasets.retain, dataset_id, df, context, CACHE_ENABLED)
+    
+    async def _restore_chart_dataset(self, upload: SpooledUpload, engine: Engine, request_key: str,
+                                     response: Dict[str, Any], sampling: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Reparse the upload of a cached analysis whose dataset is neither
+        resident nor spilled any more, so its charts can still be rendered.
+        
+        The chart endpoint reloads spilled datasets itself, so a cache hit
+        only reparses once the spilled copy was evicted.
+        """
+        if chart_datasets.max_datasets <= 0 or await asyncio.to_thread(chart_datasets.available, request_key):
+            return
+        df, _ = await self._load_dataframe(upload, engine, sampling)
+        await self._retain_chart_dataset(request_key, df, response["analysis_results"])
+    
+    async def _cached_response(self, request_key: str) -> Optional[Dict[str, Any]]:
+        if not CACHE_ENABLED:
+            return None
+        return await asyncio.to_thread(result_cache.get, request_key)
+    
+    async def _store_response(self, request_key: str, response: Dict[str, Any]) -> None:
+        if CACHE_ENABLED:
+            await asyncio.to_thread(result_cache.set, request_key, response)
+    
+    async def analyze_csv(self, upload: SpooledUpload, on_node: Optional[Callable[[str], None]] = None,
+                          sampling: Optional[Dict[str, Any]] = None, engine: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze CSV file and return comprehensive analysis results.
         
+        Identical uploads are answered from the result cache, and concurrent
+        identical uploads, streamed or not, share a single graph run. Takes
+        ownership of the upload and deletes its spool file once it is no
+        longer needed.
+        
         Args:
-            file_content: Raw bytes of the CSV file
+            upload: CSV upload spooled to disk
+            on_node: Optional callback receiving each graph node name as it completes
+            sampling: Optional sample_csv options (target_error, time_budget,
+                stratify_by) to analyze a random sample with confidence intervals
+            engine: Compute engine name, see select_engine; VIZBOT_ENGINE by default
             
         Returns:
-            Dictionary containing narrative summary and analysis results
+            Dictionary containing narrative summary and analysis results, and
+            the dataset_id under which charts of the file are rendered on demand
         """
+        runs_analysis = False
+        
+        def start_analysis(notify):
+            nonlocal runs_analysis
+            runs_analysis = True
+            return self._run_analysis(upload, request_key, notify, compute_engine, sampling)
+        
+        listener = None
+        if on_node is not None:
+            def listener(item):
+                event, data = item
+                if event == "node_completed":
+                    on_node(data["node"])
+        
         try:
-            df = pd.read_csv(BytesIO(file_content))
+            compute_engine = select_engine(engine, upload.size)
+            request_key = self._request_key(upload, compute_engine, sampling)
+            cached = await self._cached_response(request_key)
+            if cached is not None:
+                await self._restore_chart_dataset(upload, compute_engine, request_key, cached, sampling)
+                return cached
             
-            if df.empty:
-                raise ValueError("CSV file is empty")
+            return await self.inflight.do(request_key, start_analysis, listener)
+        finally:
+            if not runs_analysis:
+                upload.cleanup()
+    
+    async def _run_analysis(self, upload: SpooledUpload, request_key: str, notify: Callable[[Tuple[str, Any]], None],
+                            engine: Engine, sampling: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        df_key = None
+        try:
+            df, profile = await self._load_dataframe(upload, engine, sampling)
+            upload.cleanup()
+            df_key = register_dataframe(df)
             
-            df_json = df.to_json(orient='records')
+            final_state = await run_blocking(
+                invoke_graph, self.graph, self._initial_state(df_key, profile, request_key),
+                lambda node: notify(("node_completed", {"node": node}))
+            )
+            await self._retain_chart_dataset(request_key, df, final_state["analysis_results"])
             
-            initial_state = {
-                "messages": [],
-                "df_json": df_json,
-                "analysis_results": {},
-                "narrative_summary": ""
-            }
+            response = self._build_response(final_state)
+            await self._store_response(request_key, response)
             
-            final_state = self.graph.invoke(initial_state)
+            return response
             
-            response = {
-                "narrative_summary": final_state["narrative_summary"],
-                "analysis_results": final_state["analysis_results"],
-                "status": "success",
-                "message": "Analysis completed successfully"
-            }
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error during analysis: {str(e)}")
+        finally:
+            upload.cleanup()
+            if df_key:
+                release_dataframe(df_key)
+    
+    async def _stream_analysis(self, upload: SpooledUpload, request_key: str, notify: Callable[[Tuple[str, Any]], None],
+                               engine: Engine, sampling: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        df_key = None
+        try:
+            df, profile = await self._load_dataframe(upload, engine, sampling)
+            upload.cleanup()
+            df_key = register_dataframe(df)
+            
+            response = None
+            async for event, data in graph_events(self.graph, self._initial_state(df_key, profile, request_key)):
+                if event == "final_state":
+                    await self._retain_chart_dataset(request_key, df, data["analysis_results"])
+                    response = self._build_response(data)
+                    await self._store_response(request_key, response)
+                else:
+                    notify((event, data))
             
             return response
             
-        except pd.errors.EmptyDataError:
-            raise ValueError("CSV file is empty or invalid")
-        except pd.errors.ParserError as e:
-            raise ValueError(f"Error parsing CSV file: {str(e)}")
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error during analysis: {str(e)}")
+        finally:
+            upload.cleanup()
+            if df_key:
+                release_dataframe(df_key)
     
-    async def analyze_uploaded_file(self, file) -> Dict[str, Any]:
+    async def stream_csv(self, upload: SpooledUpload, sampling: Optional[Dict[str, Any]] = None,
+                         engine: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
         """
-        Analyze uploaded file with validation.
+        Analyze CSV file, yielding partial results as each graph node produces them.
+        
+        Runs under the same single-flight as analyze_csv: an identical
+        analysis already in flight is joined and its events from then on
+        are forwarded, and identical requests arriving while this one runs
+        join it. Cached results are yielded as a single "result" event.
+        Takes ownership of the upload like analyze_csv.
+        
+        Args:
+            upload: CSV upload spooled to disk
+            sampling: Optional sample_csv options; see analyze_csv
+            engine: Compute engine name; see analyze_csv
+            
+        Yields:
+            (event, data) tuples: basic_stats, outliers, correlations, chart,
+            narrative_token and node_completed, then a final "result" carrying
+            the same payload analyze_csv returns. A joined run that is not
+            streamed itself only reports node_completed before the result.
+        """
+        runs_analysis = False
+        
+        def start_analysis(notify):
+            nonlocal runs_analysis
+            runs_analysis = True
+            return self._stream_analysis(upload, request_key, notify, compute_engine, sampling)
+        
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        
+        def listener(item):
+            # Runs not streamed report progress from executor threads.
+            loop.call_soon_threadsafe(events.put_nowait, item)
+        
+        run = None
+        try:
+            compute_engine = select_engine(engine, upload.size)
+            request_key = self._request_key(upload, compute_engine, sampling)
+            cached = await self._cached_response(request_key)
+            if cached is not None:
+                await self._restore_chart_dataset(upload, compute_engine, request_key, cached, sampling)
+                yield "result", cached
+                return
+            
+            run = asyncio.ensure_future(self.inflight.do(request_key, start_analysis, listener))
+            while not run.done():
+                next_event = asyncio.ensure_future(events.get())
+                await asyncio.wait({next_event, run}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event.done():
+                    yield next_event.result()
+                else:
+                    next_event.cancel()
+            # Events reported just before the run finished are already queued.
+            while not events.empty():
+                yield events.get_nowait()
+            yield "result", run.result()
+        finally:
+            if run is not None and not run.done():
+                # The shared run goes on for other callers; only this one leaves.
+                run.cancel()
+            if not runs_analysis:
+                upload.cleanup()
+    
+    async def spool_uploaded_file(self, file) -> SpooledUpload:
+        """
+        Validate an uploaded file and spool it to disk.
         
         Args:
             file: UploadFile object from FastAPI
             
         Returns:
-            Dictionary containing analysis results
+            The spooled upload; pass it to analyze_csv or stream_csv,
+            which take ownership of it
         """
 
         if not file.filename or not file.filename.endswith('.csv'):
             raise ValueError("Only CSV files are supported")
         
-
-        content = await file.read()
-        
-
-        if not content:
-            raise ValueError("File is empty")
+        return await spool_upload(file, suffix=".csv")
+    
+    async def analyze_uploaded_file(self, file, sampling: Optional[Dict[str, Any]] = None,
+                                    engine: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyze uploaded file with validation.
         
- 
-        return await self.analyze_csv(content)
+        Args:
+            file: UploadFile object from FastAPI
+            sampling: Optional sample_csv options; see analyze_csv
+            engine: Optional compute engine name; see analyze_csv
+            
+        Returns:
+            Dictionary containing analysis results
+        """
+        upload = await self.spool_uploaded_file(file)
+        return await self.analyze_csv(upload, sampling=sampling, engine=engine)
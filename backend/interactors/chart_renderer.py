@@ -0,0 +1,64 @@
+import asyncio
+from backend.services.chart_store import chart_cache, chart_datasets
+from backend.services.cache import make_cache_key
+from backend.services.executor import run_blocking
+from backend.services.singleflight import SingleFlight
+from backend.services.tools import get_visualization_data
+from typing import Dict, Any, Optional
+
+
+class ChartRenderer:
+    def __init__(self):
+        self.inflight = SingleFlight()
+    
+    async def render(self, dataset_id: str, chart_type: str, column: str,
+                     second_column: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Render one chart of a resident dataset on demand.
+        
+        Rendered charts are cached, and concurrent requests for the same
+        chart share one rendering. Any column, or pair of numeric columns
+        for a scatter plot, can be charted, not only those the analysis
+        described.
+        
+        Args:
+            dataset_id: dataset_id of a CSV analysis response, or a table's
+                id from the datasets of a database analysis response
+            chart_type: Chart type as accepted by get_visualization_data
+            column: Primary column
+            second_column: Secondary column of a scatter plot
+            
+        Returns:
+            Dictionary with the Plotly chart, as in eagerly rendered charts
+        """
+        if chart_type == "scatter" and not second_column:
+            raise ValueError("A scatter plot needs a second_column")
+        
+        request = {"chart_type": chart_type, "column": column}
+        if second_column:
+            request["second_column"] = second_column
+        chart_key = make_cache_key(dataset_id, request)
+        
+        chart = await asyncio.to_thread(chart_cache.get, chart_key)
+        if chart is not None:
+            return chart
+        
+        # Reloads a spilled dataset that is no longer resident.
+        dataset = await asyncio.to_thread(chart_datasets.get, dataset_id)
+        if dataset is None:
+            raise KeyError(dataset_id)
+        df_key, context = dataset
+        
+        request["df_key"] = df_key
+        # Histograms take their bins and the heatmap its matrix from the analysis.
+        if chart_type == "histogram" and column in context["numerical_stats"]:
+            request["column_stats"] = context["numerical_stats"][column]
+        if chart_type == "correlation_heatmap" and "correlation_matrix" in context:
+            request["correlation_matrix"] = context["correlation_matrix"]
+        
+        chart = await self.inflight.do(chart_key, lambda _: run_blocking(get_visualization_data.invoke, request))
+        if "error" in chart:
+            raise ValueError(chart["error"])
+        
+        await asyncio.to_thread(chart_cache.set, chart_key, chart)
+        return chart
@@ -1,96 +1,172 @@
 from backend.services.db_graph import create_database_analysis_graph
+from backend.services.datasets import get_dataframe, release_owner
+from backend.services.chart_store import chart_context, chart_datasets
+from backend.services.executor import run_blocking, invoke_graph
+from backend.services.streaming import graph_events
+from backend.services.singleflight import SingleFlight
 from backend.schemas.database import PostgreSQLConnection, MongoDBConnection
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Callable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import uuid
 
 
 class DatabaseAnalyzer:
     def __init__(self):
         self.graph = create_database_analysis_graph()
+        self.inflight = SingleFlight()
     
-    async def analyze_postgresql(self, config: PostgreSQLConnection) -> Dict[str, Any]:
+    def _request_key(self, request) -> str:
+        # Credentials are part of the identity (hashed, never kept), so a caller
+        # can only attach to a run made with the same connection details.
+        payload = json.dumps(request.model_dump(), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _postgresql_state(self, config: PostgreSQLConnection, run_id: str) -> Dict[str, Any]:
+        connection_string = f"postgresql://{config.username}:{config.password}@{config.host}:{config.port}/{config.database}"
+        
+        return {
+            "messages": [],
+            "run_id": run_id,
+            "db_type": "postgresql",
+            "connection_string": connection_string,
+            "database_name": config.database,
+            "database_info": {},
+            "analysis_results": {},
+            "narrative_summary": "",
+            "table_data": {}
+        }
+    
+    def _mongodb_state(self, config: MongoDBConnection, run_id: str) -> Dict[str, Any]:
+        if config.username and config.password:
+            connection_string = f"mongodb://{config.username}:{config.password}@{config.host}:{config.port}/?authSource={config.auth_source}"
+        else:
+            connection_string = f"mongodb://{config.host}:{config.port}/"
+        
+        return {
+            "messages": [],
+            "run_id": run_id,
+            "db_type": "mongodb",
+            "connection_string": connection_string,
+            "database_name": config.database,
+            "database_info": {},
+            "analysis_results": {},
+            "narrative_summary": "",
+            "table_data": {}
+        }
+    
+    def _build_response(self, final_state: Dict[str, Any], db_label: str) -> Dict[str, Any]:
+        return {
+            "narrative_summary": final_state["narrative_summary"],
+            "database_info": final_state["database_info"],
+            "tables_or_collections": final_state["database_info"],
+            "analysis_results": final_state["analysis_results"],
+            "visualizations": final_state["analysis_results"].get("visualizations", {}),
+            "datasets": dict(final_state["table_data"]),
+            "status": "success",
+            "message": f"{db_label} database analysis completed successfully"
+        }
+    
+    def _retain_chart_datasets(self, final_state: Dict[str, Any]) -> None:
+        # Each table's dataframe stays resident for on-demand charts under its registry key.
+        for analysis in final_state["analysis_results"].get("table_analyses", []):
+            df_key = final_state["table_data"].get(analysis.get("table_name") or analysis.get("collection_name"))
+            if df_key:
+                chart_datasets.retain(df_key, get_dataframe(df_key), chart_context(analysis["stats"]))
+    
+    async def analyze_postgresql(self, config: PostgreSQLConnection, on_node: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Analyze PostgreSQL database and return comprehensive analysis results.
         
         Args:
             config: PostgreSQL connection configuration
+            on_node: Optional callback receiving each graph node name as it completes
             
         Returns:
             Dictionary containing narrative summary and analysis results
         """
+        run_id = uuid.uuid4().hex
         try:
-            connection_string = f"postgresql://{config.username}:{config.password}@{config.host}:{config.port}/{config.database}"
-            
-            initial_state = {
-                "messages": [],
-                "db_type": "postgresql",
-                "connection_string": connection_string,
-                "database_name": config.database,
-                "database_info": {},
-                "analysis_results": {},
-                "narrative_summary": "",
-                "table_data": {}
-            }
-            
-            final_state = self.graph.invoke(initial_state)
+            initial_state = self._postgresql_state(config, run_id)
             
-            response = {
-                "narrative_summary": final_state["narrative_summary"],
-                "database_info": final_state["database_info"],
-                "tables_or_collections": final_state["database_info"],
-                "analysis_results": final_state["analysis_results"],
-                "visualizations": final_state["analysis_results"].get("visualizations", {}),
-                "status": "success",
-                "message": "PostgreSQL database analysis completed successfully"
-            }
+            final_state = await run_blocking(invoke_graph, self.graph, initial_state, on_node)
+            self._retain_chart_datasets(final_state)
             
-            return response
+            return self._build_response(final_state, "PostgreSQL")
             
         except Exception as e:
             raise Exception(f"Error during PostgreSQL analysis: {str(e)}")
+        finally:
+            release_owner(run_id)
     
-    async def analyze_mongodb(self, config: MongoDBConnection) -> Dict[str, Any]:
+    async def analyze_mongodb(self, config: MongoDBConnection, on_node: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Analyze MongoDB database and return comprehensive analysis results.
         
         Args:
             config: MongoDB connection configuration
+            on_node: Optional callback receiving each graph node name as it completes
             
         Returns:
             Dictionary containing narrative summary and analysis results
         """
+        run_id = uuid.uuid4().hex
         try:
-            if config.username and config.password:
-                connection_string = f"mongodb://{config.username}:{config.password}@{config.host}:{config.port}/?authSource={config.auth_source}"
-            else:
-                connection_string = f"mongodb://{config.host}:{config.port}/"
-            
-            initial_state = {
-                "messages": [],
-                "db_type": "mongodb",
-                "connection_string": connection_string,
-                "database_name": config.database,
-                "database_info": {},
-                "analysis_results": {},
-                "narrative_summary": "",
-                "table_data": {}
-            }
+            initial_state = self._mongodb_state(config, run_id)
             
-            final_state = self.graph.invoke(initial_state)
+            final_state = await run_blocking(invoke_graph, self.graph, initial_state, on_node)
+            self._retain_chart_datasets(final_state)
             
-            response = {
-                "narrative_summary": final_state["narrative_summary"],
-                "database_info": final_state["database_info"],
-                "tables_or_collections": final_state["database_info"],
-                "analysis_results": final_state["analysis_results"],
-                "visualizations": final_state["analysis_results"].get("visualizations", {}),
-                "status": "success",
-                "message": "MongoDB database analysis completed successfully"
-            }
-            
-            return response
+            return self._build_response(final_state, "MongoDB")
             
         except Exception as e:
             raise Exception(f"Error during MongoDB analysis: {str(e)}")
+        finally:
+            release_owner(run_id)
+    
+    async def stream_database(self, request) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Analyze database, yielding partial results as each graph node produces them.
+        
+        Args:
+            request: Database connection request
+            
+        Yields:
+            (event, data) tuples: table_stats, chart, narrative_token and
+            node_completed, then a final "result" carrying the same payload
+            analyze_database returns
+        """
+        request_key = self._request_key(request)
+        if self.inflight.in_flight(request_key):
+            yield "result", await self.analyze_database(request)
+            return
+        
+        run_id = uuid.uuid4().hex
+        if request.db_type == "postgresql":
+            if not request.postgresql_config:
+                raise ValueError("PostgreSQL configuration is required")
+            initial_state = self._postgresql_state(request.postgresql_config, run_id)
+            db_label = "PostgreSQL"
+        
+        elif request.db_type == "mongodb":
+            if not request.mongodb_config:
+                raise ValueError("MongoDB configuration is required")
+            initial_state = self._mongodb_state(request.mongodb_config, run_id)
+            db_label = "MongoDB"
+        
+        else:
+            raise ValueError("Invalid database type. Must be 'postgresql' or 'mongodb'")
+        
+        try:
+            async for event, data in graph_events(self.graph, initial_state):
+                if event == "final_state":
+                    self._retain_chart_datasets(data)
+                    yield "result", self._build_response(data, db_label)
+                else:
+                    yield event, data
+        finally:
+            release_owner(run_id)
     
     async def test_postgresql_connection(self, config: PostgreSQLConnection) -> Dict[str, Any]:
         """
@@ -104,7 +180,8 @@ class DatabaseAnalyzer:
         """
         try:
             import psycopg2
-            conn = psycopg2.connect(
+            conn = await asyncio.to_thread(
+                psycopg2.connect,
                 host=config.host,
                 port=config.port,
                 database=config.database,
@@ -135,18 +212,22 @@ class DatabaseAnalyzer:
                 connection_string = f"mongodb://{config.host}:{config.port}/"
             
             client = MongoClient(connection_string, serverSelectionTimeoutMS=5000)
-            client.server_info()
+            await asyncio.to_thread(client.server_info)
             client.close()
             return {"status": "success", "message": "MongoDB connection successful"}
         except Exception as e:
             raise Exception(f"MongoDB connection failed: {str(e)}")
     
-    async def analyze_database(self, request) -> Dict[str, Any]:
+    async def analyze_database(self, request, on_node: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Analyze database based on the request type.
         
+        Concurrent requests for the same connection target attach to the
+        analysis already running for it.
+        
         Args:
             request: Database connection request
+            on_node: Optional callback receiving each graph node name as it completes
             
         Returns:
             Analysis results
@@ -154,12 +235,20 @@ class DatabaseAnalyzer:
         if request.db_type == "postgresql":
             if not request.postgresql_config:
                 raise ValueError("PostgreSQL configuration is required")
-            return await self.analyze_postgresql(request.postgresql_config)
+            return await self.inflight.do(
+                self._request_key(request),
+                lambda notify: self.analyze_postgresql(request.postgresql_config, notify),
+                on_node
+            )
         
         elif request.db_type == "mongodb":
             if not request.mongodb_config:
                 raise ValueError("MongoDB configuration is required")
-            return await self.analyze_mongodb(request.mongodb_config)
+            return await self.inflight.do(
+                self._request_key(request),
+                lambda notify: self.analyze_mongodb(request.mongodb_config, notify),
+                on_node
+            )
         
         else:
             raise ValueError("Invalid database type. Must be 'postgresql' or 'mongodb'")
@@ -1,17 +1,46 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from backend.interactors.analyzer import DataAnalyzer
-from typing import Dict, Any
+from backend.services.jobs import job_manager
+from backend.services.streaming import format_sse, SSE_HEADERS
+from backend.services.responses import json_response
+from backend.services.cache import result_cache
+from backend.services.sampling import sampling_options
+from backend.services.engines import ENGINES
+from backend.schemas.jobs import JobResponse
+from typing import Dict, Any, Optional
 
 router = APIRouter(prefix="/api", tags=["analysis"])
 
 analyzer = DataAnalyzer()
 
 
+def request_options(
+    sample: bool = Form(False),
+    target_error: Optional[float] = Form(None, gt=0, lt=0.5),
+    time_budget: Optional[float] = Form(None, gt=0),
+    stratify_by: Optional[str] = Form(None),
+    engine: Optional[str] = Form(None)
+) -> Dict[str, Any]:
+    """Sampling and engine form fields shared by the CSV analysis endpoints."""
+    # Checked here too, so a background job is refused rather than failing later.
+    if engine is not None and engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unsupported engine: {engine}. Use one of {', '.join(ENGINES)}")
+    sampling = None
+    if sample:
+        sampling = sampling_options(target_error, time_budget, stratify_by)
+    return {"sampling": sampling, "engine": engine}
+
+
 @router.post("/analyze", response_model=Dict[str, Any])
-async def analyze_data(file: UploadFile = File(...)):
+async def analyze_data(
+    request: Request,
+    file: UploadFile = File(...),
+    options: Dict[str, Any] = Depends(request_options)
+):
     try:
-        result = await analyzer.analyze_uploaded_file(file)
-        return result
+        result = await analyzer.analyze_uploaded_file(file, **options)
+        return json_response(request, result)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -19,6 +48,38 @@ async def analyze_data(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/analyze/jobs", response_model=JobResponse, status_code=202)
+async def submit_analysis_job(file: UploadFile = File(...), options: Dict[str, Any] = Depends(request_options)):
+    try:
+        upload = await analyzer.spool_uploaded_file(file)
+        return job_manager.submit("csv", lambda on_node: analyzer.analyze_csv(upload, on_node, **options))
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/analyze/stream")
+async def stream_analysis(file: UploadFile = File(...), options: Dict[str, Any] = Depends(request_options)):
+    try:
+        upload = await analyzer.spool_uploaded_file(file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def events():
+        try:
+            async for event, data in analyzer.stream_csv(upload, **options):
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return result_cache.stats()
+
+
 @router.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "VizBot Analytics API"}
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Request
+from backend.interactors.chart_renderer import ChartRenderer
+from backend.services.chart_store import chart_cache
+from backend.services.responses import json_response
+from backend.schemas.charts import ChartRequest
+from typing import Dict, Any
+
+router = APIRouter(prefix="/api/charts", tags=["charts"])
+
+renderer = ChartRenderer()
+
+
+@router.post("/{dataset_id}", response_model=Dict[str, Any])
+async def render_chart(dataset_id: str, chart: ChartRequest, request: Request):
+    try:
+        result = await renderer.render(dataset_id, chart.chart_type, chart.column, chart.second_column)
+        return json_response(request, result)
+        
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Dataset '{dataset_id}' is no longer available; analyze it again to chart it"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/cache/stats")
+async def chart_cache_stats():
+    return chart_cache.stats()
@@ -1,5 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from backend.interactors.db_analyzer import DatabaseAnalyzer
+from backend.services.jobs import job_manager
+from backend.services.streaming import format_sse, SSE_HEADERS
+from backend.services.responses import json_response
+from backend.schemas.jobs import JobResponse
 from backend.schemas.database import (
     DatabaseConnectionRequest,
     PostgreSQLConnection,
@@ -13,10 +18,10 @@ db_analyzer = DatabaseAnalyzer()
 
 
 @router.post("/analyze", response_model=Dict[str, Any])
-async def analyze_database(request: DatabaseConnectionRequest):
+async def analyze_database(request: DatabaseConnectionRequest, http_request: Request):
     try:
         result = await db_analyzer.analyze_database(request)
-        return result
+        return json_response(http_request, result)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -24,6 +29,23 @@ async def analyze_database(request: DatabaseConnectionRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/analyze/jobs", response_model=JobResponse, status_code=202)
+async def submit_database_analysis_job(request: DatabaseConnectionRequest):
+    return job_manager.submit("database", lambda on_node: db_analyzer.analyze_database(request, on_node))
+
+
+@router.post("/analyze/stream")
+async def stream_database_analysis(request: DatabaseConnectionRequest):
+    async def events():
+        try:
+            async for event, data in db_analyzer.stream_database(request):
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/test-connection")
 async def test_database_connection(request: DatabaseConnectionRequest):
     try:
@@ -0,0 +1,16 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from backend.services.jobs import job_manager
+from backend.schemas.jobs import JobResponse
+from backend.services.responses import json_response
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, request: Request):
+    job = await asyncio.to_thread(job_manager.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    # Completed jobs carry the whole analysis result.
+    return json_response(request, job)
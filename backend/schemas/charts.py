@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional, Literal
+
+
+class ChartRequest(BaseModel):
+    chart_type: Literal["histogram", "bar", "countplot", "pie", "scatter", "correlation_heatmap"]
+    column: str = "correlation"
+    second_column: Optional[str] = None
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any, Literal
+
+
+class JobProgress(BaseModel):
+    node: str
+    completed_at: float
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: Literal["queued", "running", "completed", "failed"]
+    progress: List[JobProgress] = []
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
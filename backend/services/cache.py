@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+import orjson
+from backend.services.responses import encode_json
+
+
+CACHE_ENABLED = os.getenv("VIZBOT_CACHE_ENABLED", "true").lower() == "true"
+CACHE_MEMORY_MB = float(os.getenv("VIZBOT_CACHE_MEMORY_MB", "256"))
+CACHE_DIR = os.getenv("VIZBOT_CACHE_DIR", "")
+CACHE_DISK_MB = float(os.getenv("VIZBOT_CACHE_DISK_MB", "2048"))
+CACHE_TTL_SECONDS = int(os.getenv("VIZBOT_CACHE_TTL_SECONDS", "86400"))
+
+
+def _code_version() -> str:
+    """Fingerprint of the analysis code, so cached results expire on upgrade."""
+    digest = hashlib.sha256()
+    backend_dir = Path(__file__).resolve().parent.parent
+    for source in sorted(backend_dir.rglob("*.py")):
+        digest.update(str(source.relative_to(backend_dir)).encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+CODE_VERSION = _code_version()
+
+
+def make_cache_key(fingerprint: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the cache key of one analysis.
+
+    Args:
+        fingerprint: SHA-256 of the analysed content
+        options: Analysis options that change the result
+
+    Returns:
+        Hex digest combining content, options and code version
+    """
+    payload = json.dumps(
+        {"fingerprint": fingerprint, "options": options or {}, "code_version": CODE_VERSION},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory, optional disk) LRU cache of analysis responses.
+
+    Both tiers are bounded by the serialized size of their entries and
+    expire entries after ttl_seconds.
+    """
+
+    def __init__(self, memory_bytes: int, disk_dir: str = "", disk_bytes: int = 0, ttl_seconds: int = 86400):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_bytes = disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_used = 0
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expirations": 0}
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                self._drop_memory(key)
+                self._counters["expirations"] += 1
+
+        disk_entry = self._read_disk(key, now)
+        with self._lock:
+            if disk_entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            expires_at, size, value = disk_entry
+            self._remember(key, expires_at, size, value)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        payload = encode_json(value)
+        expires_at = time.time() + self.ttl_seconds
+
+        with self._lock:
+            self._counters["writes"] += 1
+            self._remember(key, expires_at, len(payload), value)
+
+        self._write_disk(key, payload, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_enabled": self.disk_dir is not None,
+                "code_version": CODE_VERSION
+            }
+
+    def _remember(self, key: str, expires_at: float, size: int, value: Dict[str, Any]) -> None:
+        if size > self.memory_bytes:
+            return
+        self._drop_memory(key)
+        self._memory[key] = (expires_at, size, value)
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            self._drop_memory(next(iter(self._memory)))
+            self._counters["evictions"] += 1
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_used -= entry[1]
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def _read_disk(self, key: str, now: float) -> Optional[tuple]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                expires_at = float(f.readline())
+                if expires_at <= now:
+                    path.unlink(missing_ok=True)
+                    with self._lock:
+                        self._counters["expirations"] += 1
+                    return None
+                payload = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            # Recency for _evict_disk; another worker may have evicted it since.
+            os.utime(path)
+        except OSError:
+            pass
+        return expires_at, len(payload), orjson.loads(payload)
+
+    def _write_disk(self, key: str, payload: bytes, expires_at: float) -> None:
+        if not self.disk_dir or len(payload) > self.disk_bytes:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(f"{expires_at}\n".encode())
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        used = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if used <= self.disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            used -= size
+            with self._lock:
+                self._counters["evictions"] += 1
+
+
+result_cache = ResultCache(
+    memory_bytes=int(CACHE_MEMORY_MB * 1024**2),
+    disk_dir=CACHE_DIR,
+    disk_bytes=int(CACHE_DISK_MB * 1024**2),
+    ttl_seconds=CACHE_TTL_SECONDS
+)
@@ -0,0 +1,263 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import orjson
+import pandas as pd
+from backend.services.cache import CACHE_DIR, CACHE_TTL_SECONDS, ResultCache
+from backend.services.charts import estimate_chart_bytes
+from backend.services.datasets import register_dataframe, release_dataframe
+from backend.services.responses import encode_json
+
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
+
+LAZY_CHARTS = os.getenv("VIZBOT_LAZY_CHARTS", "true").lower() == "true"
+CHART_DATASETS_MAX = int(os.getenv("VIZBOT_CHART_DATASETS_MAX", "8"))
+CHART_DATASET_TTL_SECONDS = int(os.getenv("VIZBOT_CHART_DATASET_TTL_SECONDS", "1800"))
+CHART_CACHE_MB = float(os.getenv("VIZBOT_CHART_CACHE_MB", "64"))
+CHART_SPILL_MB = float(os.getenv("VIZBOT_CHART_SPILL_MB", "0"))
+_CONTEXT_KEY = b"vizbot.context"
+
+
+class ChartDatasets:
+    """Analyzed datasets kept resident so their charts can be rendered on demand.
+
+    Holds at most max_datasets dataframes, dropping the least recently used
+    first, each for ttl_seconds after it was last used. Every dataset keeps
+    the analysis results its charts draw on (column statistics, correlation
+    matrix) as its context.
+
+    With a spill_dir (which needs pyarrow), datasets of cached analyses
+    are also written to disk as Feather files, their context in the file's
+    metadata, for as long as their cached result lives (spill_ttl_seconds,
+    at most spill_bytes in all), and reloaded by get once they are no
+    longer resident. Dataframes Arrow cannot represent are not spilled.
+    """
+
+    def __init__(self, max_datasets: int, ttl_seconds: int, spill_dir: str = "", spill_bytes: int = 0,
+                 spill_ttl_seconds: int = 0):
+        self.max_datasets = max_datasets
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = Path(spill_dir) if spill_dir and pyarrow is not None else None
+        self.spill_bytes = spill_bytes
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self._lock = threading.Lock()
+        self._datasets: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    def retain(self, dataset_id: str, df: pd.DataFrame, context: Dict[str, Any], spill: bool = False) -> None:
+        """
+        Keep a dataframe resident under dataset_id, replacing any earlier one.
+
+        Args:
+            dataset_id: Identity of the dataset in chart requests
+            df: The analyzed dataframe
+            context: Analysis results charts of the dataset draw on
+            spill: Also write it to the spill directory, for a dataset
+                whose analysis is cached
+        """
+        if self.max_datasets <= 0:
+            return
+        self._keep(dataset_id, df, context)
+        if spill and self.spill_dir:
+            self._write_spill(dataset_id, df, context)
+
+    def get(self, dataset_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Look up a dataset and extend its lifetime, reloading it from the
+        spill directory when it is no longer resident.
+
+        Returns:
+            Tuple of the registry key of its dataframe and its context, or
+            None when the dataset is unknown or expired
+        """
+        with self._lock:
+            self._expire()
+            entry = self._datasets.get(dataset_id)
+            if entry is not None:
+                _, df_key, context = entry
+                self._datasets[dataset_id] = (time.time() + self.ttl_seconds, df_key, context)
+                self._datasets.move_to_end(dataset_id)
+                return df_key, context
+
+        spilled = self._read_spill(dataset_id)
+        if spilled is None or self.max_datasets <= 0:
+            return None
+        return self._keep(dataset_id, *spilled)
+
+    def available(self, dataset_id: str) -> bool:
+        """Whether get can return the dataset, without reloading it."""
+        with self._lock:
+            self._expire()
+            if dataset_id in self._datasets:
+                return True
+        return self._spill_path(dataset_id) is not None
+
+    def _keep(self, dataset_id: str, df: pd.DataFrame, context: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        # A key of its own, so the analysis can release its key as usual.
+        df_key = register_dataframe(df)
+        with self._lock:
+            self._drop(dataset_id)
+            self._datasets[dataset_id] = (time.time() + self.ttl_seconds, df_key, context)
+            self._expire()
+            while len(self._datasets) > self.max_datasets:
+                self._drop(next(iter(self._datasets)))
+        return df_key, context
+
+    def _expire(self) -> None:
+        now = time.time()
+        for dataset_id in [key for key, (expires_at, _, _) in self._datasets.items() if expires_at <= now]:
+            self._drop(dataset_id)
+
+    def _drop(self, dataset_id: str) -> None:
+        entry = self._datasets.pop(dataset_id, None)
+        if entry is not None:
+            release_dataframe(entry[1])
+
+    def _spill_path(self, dataset_id: str) -> Optional[Path]:
+        if not self.spill_dir:
+            return None
+        path = self.spill_dir / f"{dataset_id}.feather"
+        try:
+            if path.stat().st_mtime + self.spill_ttl_seconds > time.time():
+                return path
+        except FileNotFoundError:
+            return None
+        path.unlink(missing_ok=True)
+        return None
+
+    def _read_spill(self, dataset_id: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        path = self._spill_path(dataset_id)
+        if path is None:
+            return None
+        try:
+            table = pyarrow.feather.read_table(path)
+            context = orjson.loads(table.schema.metadata[_CONTEXT_KEY])
+        except (OSError, KeyError, TypeError, pyarrow.ArrowInvalid, orjson.JSONDecodeError):
+            return None
+        return table.to_pandas(), context
+
+    def _write_spill(self, dataset_id: str, df: pd.DataFrame, context: Dict[str, Any]) -> None:
+        try:
+            table = pyarrow.Table.from_pandas(df)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+            return
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _CONTEXT_KEY: encode_json(context)})
+        path = self.spill_dir / f"{dataset_id}.feather"
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        pyarrow.feather.write_feather(table, str(tmp_path))
+        os.replace(tmp_path, path)
+        self._evict_spill()
+
+    def _evict_spill(self) -> None:
+        entries = []
+        for path in self.spill_dir.glob("*.feather"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        used = sum(size for _, size, _ in entries)
+        expired_before = time.time() - self.spill_ttl_seconds
+        for mtime, size, path in sorted(entries):
+            if used <= self.spill_bytes and mtime > expired_before:
+                break
+            path.unlink(missing_ok=True)
+            used -= size
+
+
+def _spill_dir() -> str:
+    # Next to the on-disk result cache; without one, in a private temporary
+    # directory that lives as long as the in-memory result cache.
+    if CACHE_DIR:
+        return os.path.join(CACHE_DIR, "chart_datasets")
+    spill_dir = tempfile.mkdtemp(prefix="vizbot-charts-")
+    atexit.register(shutil.rmtree, spill_dir, True)
+    return spill_dir
+
+
+chart_datasets = ChartDatasets(
+    CHART_DATASETS_MAX,
+    CHART_DATASET_TTL_SECONDS,
+    spill_dir=_spill_dir() if CHART_DATASETS_MAX > 0 and CHART_SPILL_MB > 0 and pyarrow is not None else "",
+    spill_bytes=int(CHART_SPILL_MB * 1024**2),
+    spill_ttl_seconds=CACHE_TTL_SECONDS
+)
+
+chart_cache = ResultCache(
+    memory_bytes=int(CHART_CACHE_MB * 1024**2),
+    ttl_seconds=CHART_DATASET_TTL_SECONDS
+)
+
+
+def chart_context(basic_stats: Dict[str, Any], correlations: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    The parts of an analysis that charts of its dataset draw on.
+
+    Args:
+        basic_stats: Result of analyze_basic_stats or of a precomputed profile
+        correlations: Result of analyze_correlations (optional)
+
+    Returns:
+        Dictionary with the numerical column statistics and, when computed,
+        the correlation matrix
+    """
+    context = {"numerical_stats": basic_stats.get("numerical_stats", {})}
+    if correlations and "correlation_matrix" in correlations:
+        context["correlation_matrix"] = correlations["correlation_matrix"]
+    return context
+
+
+def chart_descriptor(dataset_id: str, chart_type: str, column: str, second_column: Optional[str] = None,
+                     basic_stats: Optional[Dict[str, Any]] = None, rows: int = 0,
+                     correlation_columns: int = 0) -> Dict[str, Any]:
+    """
+    Describe a chart instead of rendering it; POST /api/charts/{dataset_id} renders it.
+
+    Args:
+        dataset_id: Resident dataset the chart is drawn from
+        chart_type: Chart type as accepted by get_visualization_data
+        column: Primary column
+        second_column: Secondary column of a scatter plot (optional)
+        basic_stats: Statistics of the dataset, used to estimate the size
+        rows: Rows of the resident dataframe
+        correlation_columns: Columns of the correlation matrix
+
+    Returns:
+        Dictionary with the chart request fields, the dataset id, the
+        estimated payload size in bytes and "lazy": True
+    """
+    basic_stats = basic_stats or {}
+    numerical_stats = basic_stats.get("numerical_stats", {})
+    if chart_type == "histogram":
+        points = numerical_stats.get(column, {}).get("count", rows)
+    elif chart_type in ("bar", "countplot", "pie"):
+        points = basic_stats.get("categorical_stats", {}).get(column, {}).get("unique_values", 0)
+    elif chart_type == "scatter":
+        # Statistics of a profiled file count the whole file; charts draw the resident sample.
+        points = min(rows, *(numerical_stats.get(name, {}).get("count", rows) for name in (column, second_column)))
+    else:
+        points = 0
+
+    descriptor = {"chart_type": chart_type, "column": column}
+    if second_column:
+        descriptor["second_column"] = second_column
+    descriptor.update({
+        "dataset_id": dataset_id,
+        "estimated_bytes": estimate_chart_bytes(chart_type, points, correlation_columns),
+        "lazy": True
+    })
+    return descriptor
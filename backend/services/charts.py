@@ -0,0 +1,230 @@
+import base64
+import math
+import os
+import numpy as np
+import plotly.utils
+from typing import Any, Dict, Optional, Tuple
+
+
+HISTOGRAM_MAX_BINS = int(os.getenv("VIZBOT_HISTOGRAM_MAX_BINS", "50"))
+HISTOGRAM_MIN_BINS = 5
+
+
+def histogram_bin_count(count: int, minimum: float, maximum: float, q25: float, q75: float) -> int:
+    """
+    Number of equal-width bins by numpy's "auto" rule.
+
+    Takes the larger of the Freedman–Diaconis count (bin width 2·IQR/n^(1/3),
+    robust to outliers) and the Sturges count (log2 n + 1, for small or
+    near-constant data), clipped to [HISTOGRAM_MIN_BINS, VIZBOT_HISTOGRAM_MAX_BINS].
+    """
+    if count < 2 or not maximum > minimum:
+        return 1
+    sturges = math.ceil(math.log2(count)) + 1
+    iqr = q75 - q25
+    freedman_diaconis = math.ceil((maximum - minimum) / (2 * iqr * count ** (-1 / 3))) if iqr > 0 else 0
+    return int(np.clip(max(sturges, freedman_diaconis), HISTOGRAM_MIN_BINS, HISTOGRAM_MAX_BINS))
+
+
+def histogram_bins(values: np.ndarray, stats: Optional[Dict[str, Any]] = None,
+                   integer: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bin finite values into equal-width bins.
+
+    Args:
+        values: Finite values to count
+        stats: Column statistics from analyze_basic_stats; their count,
+            range and quartiles choose the bins without another pass, and
+            describe the whole file when values are only a sample of it
+        integer: Values are integers; bins are then whole numbers wide and
+            centered on them, one per value when there are few
+
+    Returns:
+        Tuple of the counts per bin and the bin edges, one more than the counts
+    """
+    if stats and stats.get("count") and stats.get("q25") is not None:
+        count, minimum, maximum = stats["count"], stats["min"], stats["max"]
+        q25, q75 = stats["q25"], stats["q75"]
+        # Estimated statistics may not cover every sampled value.
+        minimum, maximum = min(minimum, values.min()), max(maximum, values.max())
+    else:
+        count, minimum, maximum = len(values), values.min(), values.max()
+        q25, q75 = np.quantile(values, [0.25, 0.75])
+
+    if integer:
+        span = int(maximum - minimum) + 1
+        # Few distinct values get a bar each.
+        width = 1 if span <= HISTOGRAM_MAX_BINS else math.ceil(span / histogram_bin_count(count, minimum, maximum, q25, q75))
+        return np.histogram(values, bins=np.arange(minimum - 0.5, maximum + width, width))
+    if maximum > minimum:
+        return np.histogram(values, bins=histogram_bin_count(count, minimum, maximum, q25, q75), range=(minimum, maximum))
+    # A constant column gets one bin of unit width around its value.
+    return np.array([len(values)]), np.array([minimum - 0.5, minimum + 0.5])
+
+
+SCATTER_MAX_POINTS = int(os.getenv("VIZBOT_SCATTER_MAX_POINTS", "5000"))
+SCATTER_DENSITY_POINTS = int(os.getenv("VIZBOT_SCATTER_DENSITY_POINTS", "200000"))
+# Downsampling keeps at least one point in each occupied cell of this grid.
+SCATTER_GRID = 20
+SCATTER_EXTREME_POINTS = 50
+DENSITY_BINS = 100
+
+
+def scatter_strategy(points: int) -> str:
+    """
+    How to render a scatter plot of this many points.
+
+    Returns:
+        "exact" up to VIZBOT_SCATTER_MAX_POINTS points, "downsampled" up to
+        VIZBOT_SCATTER_DENSITY_POINTS, and "density" (a 2-D histogram) beyond
+    """
+    if points <= SCATTER_MAX_POINTS:
+        return "exact"
+    if points <= SCATTER_DENSITY_POINTS:
+        return "downsampled"
+    return "density"
+
+
+def _grid_cells(values: np.ndarray, cells: int) -> np.ndarray:
+    low, high = values.min(), values.max()
+    if not high > low:
+        return np.zeros(len(values), dtype="int64")
+    return np.minimum(((values - low) / (high - low) * cells).astype("int64"), cells - 1)
+
+
+def downsample_points(x: np.ndarray, y: np.ndarray, size: int = SCATTER_MAX_POINTS, seed: int = 0) -> np.ndarray:
+    """
+    Positions of about size points that keep the shape of a large scatter plot.
+
+    The extremes are always kept: each axis' minimum and maximum and the
+    SCATTER_EXTREME_POINTS points farthest from the median in IQR units.
+    The rest is a random sample stratified over a SCATTER_GRID square grid,
+    each cell sampled in proportion to its points but never left empty,
+    so sparse regions stay visible next to dense ones.
+
+    Args:
+        x: Finite x values
+        y: Finite y values of the same points
+        size: Target number of points
+        seed: Seed of the random sample
+
+    Returns:
+        Sorted positions of the kept points
+    """
+    n = len(x)
+    if n <= size:
+        return np.arange(n)
+
+    distance = np.zeros(n)
+    for values in (x, y):
+        q25, median, q75 = np.quantile(values, [0.25, 0.5, 0.75])
+        distance += np.abs(values - median) / (q75 - q25 if q75 > q25 else 1.0)
+    extremes = np.argpartition(-distance, SCATTER_EXTREME_POINTS)[:SCATTER_EXTREME_POINTS]
+    extremes = np.concatenate([extremes, [x.argmin(), x.argmax(), y.argmin(), y.argmax()]])
+
+    cells = _grid_cells(x, SCATTER_GRID) * SCATTER_GRID + _grid_cells(y, SCATTER_GRID)
+    counts = np.bincount(cells, minlength=SCATTER_GRID ** 2)
+    quotas = np.maximum(1, np.round(counts * (size - len(extremes)) / n)).astype("int64")
+    # Random order within each cell; a point is kept when its rank is within the cell's quota.
+    order = np.lexsort((np.random.default_rng(seed).random(n), cells))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ranks = np.arange(n) - starts[cells[order]]
+    sampled = order[ranks < quotas[cells[order]]]
+
+    return np.union1d(sampled, extremes)
+
+
+def density_grid(x: np.ndarray, y: np.ndarray, bins: int = DENSITY_BINS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count points on a bins × bins grid in one vectorized pass.
+
+    Returns:
+        Tuple of the counts (x bins by y bins) and the x and y bin edges
+    """
+    return np.histogram2d(x, y, bins=bins)
+
+
+CHART_BINARY = os.getenv("VIZBOT_CHART_BINARY", "true").lower() == "true"
+_ENCODER = plotly.utils.PlotlyJSONEncoder()
+
+
+def typed_array_values(spec: Dict[str, str]) -> np.ndarray:
+    """
+    Decode a plotly.js typed array ({"dtype", "bdata"} and, for matrices, "shape").
+    """
+    values = np.frombuffer(base64.b64decode(spec["bdata"]), dtype=spec["dtype"])
+    if "shape" in spec:
+        values = values.reshape([int(size) for size in spec["shape"].split(",")])
+    return values
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "bdata" in value and not CHART_BINARY:
+            return _plain(typed_array_values(value).tolist())
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, float):
+        # Strict JSON, as PlotlyJSONEncoder writes it.
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (str, int)):
+        return value
+    return _plain(_ENCODER.default(value))
+
+
+def chart_payload(fig) -> Dict[str, Any]:
+    """
+    Plotly JSON of a figure as plain Python objects, ready for json.dumps.
+
+    Numeric trace arrays stay base64-encoded typed arrays ({"dtype", "bdata"},
+    as Plotly writes them), a fraction of their size as decimal text and read
+    by plotly.js without parsing. With VIZBOT_CHART_BINARY off they are
+    expanded to lists of numbers for clients that predate typed arrays.
+    Built by walking the figure rather than encoding it to a string and
+    parsing that back.
+
+    Args:
+        fig: Plotly figure
+
+    Returns:
+        Dictionary with the figure's data and layout
+    """
+    return _plain(fig.to_dict())
+
+
+# Serialized size of a chart without data (its layout and Plotly's template),
+# and of one float64 value as a base64 typed array.
+CHART_BASE_BYTES = 7600
+CHART_VALUE_BYTES = 32 / 3
+
+
+def estimate_chart_bytes(chart_type: str, points: int = 0, columns: int = 0) -> int:
+    """
+    Approximate serialized size of a chart without rendering it.
+
+    Args:
+        chart_type: Chart type as accepted by get_visualization_data
+        points: Values of the histogram's column, categories of a bar or pie
+            chart, or points of a scatter plot
+        columns: Columns of the correlation heatmap
+
+    Returns:
+        Estimated size in bytes
+    """
+    if chart_type == "histogram":
+        # Centers, counts, widths and both edges of each bin.
+        values = 5 * min(points, HISTOGRAM_MAX_BINS)
+    elif chart_type in ("bar", "countplot", "pie"):
+        values = 3 * min(points, 15)
+    elif chart_type == "scatter":
+        strategy = scatter_strategy(points)
+        if strategy == "density":
+            values = DENSITY_BINS ** 2 + 2 * DENSITY_BINS
+        else:
+            values = 2 * min(points, SCATTER_MAX_POINTS)
+    elif chart_type == "correlation_heatmap":
+        values = columns ** 2
+    else:
+        values = 0
+    return int(CHART_BASE_BYTES + values * CHART_VALUE_BYTES)
@@ -0,0 +1,189 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Tuple
+
+
+CORRELATION_MATRIX_COLUMNS = int(os.getenv("VIZBOT_CORRELATION_MATRIX_COLUMNS", "50"))
+CORRELATION_MAX_PAIRS = int(os.getenv("VIZBOT_CORRELATION_MAX_PAIRS", "500"))
+CORRELATION_TOP_K = 20
+STRONG_CORRELATION = 0.5
+CORRELATION_METHODS = ("pearson", "spearman")
+CORRELATION_MISSING = os.getenv("VIZBOT_CORRELATION_MISSING", "pairwise")
+MISSING_STRATEGIES = ("pairwise", "listwise")
+# Rows per chunk are chosen so a standardized float32 chunk stays near 64 MB,
+# and at most _CHUNK_ROWS so float32 sums only run over that many rows before
+# they are accumulated in float64.
+_CHUNK_ELEMENTS = 16 * 1024 * 1024
+_CHUNK_ROWS = 65536
+
+
+def _strength(values: np.ndarray) -> np.ndarray:
+    return np.select(
+        [values > 0.7, values > 0.5, values < -0.7, values < -0.5, values >= 0],
+        ["strong positive", "moderate positive", "strong negative", "moderate negative", "weak positive"],
+        "weak negative"
+    )
+
+
+def _finite_block(values: pd.DataFrame) -> np.ndarray:
+    # DataFrame.corr treats infinities as missing.
+    block = values.to_numpy(dtype="float64", na_value=np.nan)
+    block[np.isinf(block)] = np.nan
+    return block
+
+
+def _column_moments(values: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    block = _finite_block(values)
+    counts = (~np.isnan(block)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.nansum(block, axis=0) / counts
+        norms = np.sqrt(np.nansum((block - means) ** 2, axis=0))
+    return means, norms, counts
+
+
+def correlation_matrix(df: pd.DataFrame, columns: List[str], method: str = "pearson",
+                       missing: str = CORRELATION_MISSING) -> np.ndarray:
+    """
+    Correlation matrix of numeric columns by blocked matrix multiplication.
+
+    Columns are standardized, cast to float32 and multiplied in row chunks
+    of at most 65536 rows; the float32 products of the chunks accumulate
+    in float64, which keeps the result within about 1e-6 of
+    DataFrame.corr. Missing values are handled pairwise-complete like
+    DataFrame.corr, infinities included: when any column has them, three
+    extra products in every chunk give each pair its sums over the rows
+    both columns share. Constant columns correlate as NaN. Spearman
+    ranks each column once, so with missing values it can differ slightly
+    from pandas, which re-ranks every pair. Listwise handling instead
+    keeps only the rows finite in every column, found with one mask.
+
+    Args:
+        df: Resident dataframe
+        columns: Numeric columns to correlate
+        method: "pearson" or "spearman"
+        missing: "pairwise" (rows complete for each pair) or "listwise"
+            (rows complete for all columns)
+
+    Returns:
+        Square float64 matrix in column order; NaN where undefined
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}. Use one of {', '.join(CORRELATION_METHODS)}")
+    if missing not in MISSING_STRATEGIES:
+        raise ValueError(f"Unsupported missing value handling: {missing}. Use one of {', '.join(MISSING_STRATEGIES)}")
+
+    values = df[columns]
+    if missing == "listwise":
+        values = values[~np.isnan(_finite_block(values)).any(axis=1)]
+    if method == "spearman":
+        values = values.replace([np.inf, -np.inf], np.nan).rank()
+    means, norms, counts = _column_moments(values)
+    width = len(columns)
+    scale = np.where(norms > 0, norms, np.inf)
+
+    gram = np.zeros((width, width))
+    sums = np.zeros((width, width))
+    squares = np.zeros((width, width))
+    overlap = np.zeros((width, width))
+    # Decided for the whole frame, so chunks before the first missing value count too.
+    pairwise = bool((counts < len(values)).any())
+
+    chunk_rows = min(_CHUNK_ROWS, max(1024, _CHUNK_ELEMENTS // max(width, 1)))
+    for start in range(0, len(values), chunk_rows):
+        chunk = _finite_block(values.iloc[start:start + chunk_rows])
+        present = ~np.isnan(chunk)
+        z = np.where(present, (chunk - means) / scale, 0.0).astype("float32")
+        gram += z.T @ z
+
+        if pairwise:
+            mask = present.astype("float32")
+            sums += z.T @ mask
+            squares += (z * z).T @ mask
+            overlap += mask.T @ mask
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if pairwise:
+            # Sums over the rows shared by each pair, centered on those rows.
+            covariance = gram - sums * sums.T / overlap
+            variance = squares - sums ** 2 / overlap
+            matrix = covariance / np.sqrt(variance * variance.T)
+        else:
+            matrix = gram / np.sqrt(np.outer(np.diag(gram), np.diag(gram)))
+
+    undefined = ~(norms > 0)
+    matrix[undefined, :] = np.nan
+    matrix[:, undefined] = np.nan
+    matrix = np.clip(matrix, -1.0, 1.0)
+    diagonal = np.flatnonzero(~undefined)
+    matrix[diagonal, diagonal] = 1.0
+    return matrix
+
+
+def _pairs(columns: List[str], matrix: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> List[Dict[str, Any]]:
+    values = matrix[rows, cols]
+    return [
+        {
+            "variable1": columns[i],
+            "variable2": columns[j],
+            "correlation": float(value),
+            "strength": str(strength)
+        }
+        for i, j, value, strength in zip(rows, cols, values, _strength(values))
+    ]
+
+
+def summarize_correlations(columns: List[str], matrix: np.ndarray, method: str = "pearson",
+                           missing: str = CORRELATION_MISSING) -> Dict[str, Any]:
+    """
+    Compact JSON-ready summary of a correlation matrix.
+
+    Args:
+        columns: Column names of the matrix
+        matrix: Square correlation matrix
+        method: Correlation method, echoed in the summary
+        missing: Missing value handling, echoed in the summary
+
+    Returns:
+        The matrix truncated to the CORRELATION_MATRIX_COLUMNS most strongly
+        correlated columns, the strong pairs (|r| > 0.5) in column order and
+        the CORRELATION_TOP_K strongest pairs
+    """
+    # Thresholds apply to the reported values, so float32 noise cannot push
+    # a pair of exactly 0.5 into the strong list.
+    matrix = np.round(matrix, 6)
+    upper_rows, upper_cols = np.triu_indices(len(columns), k=1)
+    upper = matrix[upper_rows, upper_cols]
+    valid = ~np.isnan(upper)
+    magnitude = np.where(valid, np.abs(upper), -1.0)
+
+    strong = np.flatnonzero(magnitude > STRONG_CORRELATION)
+    top = np.flatnonzero(valid)
+    if len(top) > CORRELATION_TOP_K:
+        top = top[np.argpartition(-magnitude[top], CORRELATION_TOP_K)[:CORRELATION_TOP_K]]
+    top = top[np.argsort(-magnitude[top], kind="stable")]
+
+    shown = np.arange(len(columns))
+    if len(columns) > CORRELATION_MATRIX_COLUMNS:
+        off_diagonal = np.nan_to_num(np.abs(matrix), nan=-1.0)
+        np.fill_diagonal(off_diagonal, -1.0)
+        strongest = off_diagonal.max(axis=1)
+        shown = np.sort(np.argsort(-strongest, kind="stable")[:CORRELATION_MATRIX_COLUMNS])
+
+    shown_matrix = matrix[np.ix_(shown, shown)]
+    return {
+        "method": method,
+        "missing": missing,
+        "correlation_matrix": {
+            columns[i]: {
+                columns[j]: None if np.isnan(shown_matrix[a, b]) else float(shown_matrix[a, b])
+                for b, j in enumerate(shown)
+            }
+            for a, i in enumerate(shown)
+        },
+        "matrix_truncated": len(shown) < len(columns),
+        "total_columns": len(columns),
+        "strong_correlations": _pairs(columns, matrix, upper_rows[strong[:CORRELATION_MAX_PAIRS]], upper_cols[strong[:CORRELATION_MAX_PAIRS]]),
+        "strong_correlations_total": int(len(strong)),
+        "top_correlations": _pairs(columns, matrix, upper_rows[top], upper_cols[top])
+    }
@@ -0,0 +1,51 @@
+import threading
+import uuid
+import pandas as pd
+from typing import Dict, Optional
+
+
+_lock = threading.Lock()
+_dataframes: Dict[str, pd.DataFrame] = {}
+_owners: Dict[str, Optional[str]] = {}
+
+
+def register_dataframe(df: pd.DataFrame, owner: Optional[str] = None) -> str:
+    """Keep a parsed dataframe resident and return the key tools use to read it.
+
+    Args:
+        df: Parsed dataframe
+        owner: Optional run id, so every frame of one analysis can be released together
+
+    Returns:
+        Registry key of the dataframe
+    """
+    df_key = uuid.uuid4().hex
+    with _lock:
+        _dataframes[df_key] = df
+        _owners[df_key] = owner
+    return df_key
+
+
+def get_dataframe(df_key: str) -> pd.DataFrame:
+    """Return the resident dataframe registered under df_key."""
+    with _lock:
+        df = _dataframes.get(df_key)
+    if df is None:
+        raise KeyError(f"Dataset '{df_key}' is not available")
+    return df
+
+
+def release_dataframe(df_key: str) -> None:
+    """Drop a resident dataframe. Unknown keys are ignored."""
+    with _lock:
+        _dataframes.pop(df_key, None)
+        _owners.pop(df_key, None)
+
+
+def release_owner(owner: str) -> None:
+    """Drop every resident dataframe registered by one analysis run."""
+    with _lock:
+        keys = [key for key, key_owner in _owners.items() if key_owner == owner]
+        for key in keys:
+            _dataframes.pop(key, None)
+            _owners.pop(key, None)
@@ -1,6 +1,8 @@
 from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from langgraph.graph.message import add_messages
+from langgraph.config import get_stream_writer
 from langchain_core.messages import HumanMessage, AIMessage
 from backend.services.llm import get_llm
 from backend.services.db_tools import (
@@ -10,12 +12,17 @@ from backend.services.db_tools import (
     query_mongodb_collection
 )
 from backend.services.tools import analyze_basic_stats, get_visualization_data
+from backend.services.datasets import register_dataframe, get_dataframe
+from backend.services.chart_store import LAZY_CHARTS, chart_descriptor
 from backend.services.prompts import NARRATIVE_SUMMARY_PROMPT
+import pandas as pd
 import json
+import operator
 
 
 class DatabaseAgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    run_id: str
     db_type: str
     connection_string: str
     database_name: str
@@ -23,6 +30,13 @@ class DatabaseAgentState(TypedDict):
     analysis_results: dict
     narrative_summary: str
     table_data: dict  
+    table_charts: Annotated[list, operator.add]
+
+
+class TableChartTask(TypedDict):
+    table_name: str
+    df_key: str
+    table_stats: dict
 
 
 def explore_database_node(state: DatabaseAgentState):
@@ -31,14 +45,12 @@ def explore_database_node(state: DatabaseAgentState):
     database_name = state.get("database_name", "")
     
     if db_type == "postgresql":
-        db_info = explore_postgresql_database.invoke({"connection_string": connection_string})
-        db_info_dict = json.loads(db_info)
+        db_info_dict = explore_postgresql_database.invoke({"connection_string": connection_string})
     else: 
-        db_info = explore_mongodb_database.invoke({
+        db_info_dict = explore_mongodb_database.invoke({
             "connection_string": connection_string,
             "database_name": database_name
         })
-        db_info_dict = json.loads(db_info)
     
     return {
         "database_info": db_info_dict,
@@ -51,6 +63,8 @@ def analyze_tables_node(state: DatabaseAgentState):
     connection_string = state["connection_string"]
     database_name = state.get("database_name", "")
     database_info = state["database_info"]
+    run_id = state["run_id"]
+    writer = get_stream_writer()
     
     table_analyses = []
     table_data = {}
@@ -61,20 +75,22 @@ def analyze_tables_node(state: DatabaseAgentState):
         for table in tables:
             table_name = table["name"]
             
-            data_json = query_postgresql_table.invoke({
+            rows = query_postgresql_table.invoke({
                 "connection_string": connection_string,
                 "table_name": table_name,
                 "limit": 1000
             })
             
             try:
-                basic_stats = analyze_basic_stats.invoke({"df_json": data_json})
+                df_key = register_dataframe(pd.DataFrame(rows), owner=run_id)
+                basic_stats = analyze_basic_stats.invoke({"df_key": df_key})
                 table_analyses.append({
                     "table_name": table_name,
-                    "stats": json.loads(basic_stats),
+                    "stats": basic_stats,
                     "type": "table"
                 })
-                table_data[table_name] = data_json
+                writer({"event": "table_stats", "data": table_analyses[-1]})
+                table_data[table_name] = df_key
             except:
                 pass
     
@@ -84,7 +100,7 @@ def analyze_tables_node(state: DatabaseAgentState):
         for collection in collections:
             collection_name = collection["name"]
             
-            data_json = query_mongodb_collection.invoke({
+            rows = query_mongodb_collection.invoke({
                 "connection_string": connection_string,
                 "database_name": database_name,
                 "collection_name": collection_name,
@@ -92,13 +108,15 @@ def analyze_tables_node(state: DatabaseAgentState):
             })
             
             try:
-                basic_stats = analyze_basic_stats.invoke({"df_json": data_json})
+                df_key = register_dataframe(pd.DataFrame(rows), owner=run_id)
+                basic_stats = analyze_basic_stats.invoke({"df_key": df_key})
                 table_analyses.append({
                     "collection_name": collection_name,
-                    "stats": json.loads(basic_stats),
+                    "stats": basic_stats,
                     "type": "collection"
                 })
-                table_data[collection_name] = data_json
+                writer({"event": "table_stats", "data": table_analyses[-1]})
+                table_data[collection_name] = df_key
             except:
                 pass
     
@@ -109,98 +127,112 @@ def analyze_tables_node(state: DatabaseAgentState):
     }
 
 
-def database_visualization_node(state: DatabaseAgentState):
-    table_data = state["table_data"]
-    analysis_results = state["analysis_results"]
+def route_after_table_analysis(state: DatabaseAgentState):
+    table_stats_by_name = {}
+    for analysis in state["analysis_results"]["table_analyses"]:
+        table_stats_by_name[analysis.get("table_name") or analysis.get("collection_name")] = analysis["stats"]
     
-    all_visualizations = {}
+    return ["narrative"] + [
+        Send("table_visualizations", {
+            "table_name": table_name,
+            "df_key": df_key,
+            "table_stats": table_stats_by_name[table_name]
+        })
+        for table_name, df_key in state["table_data"].items()
+        if table_name in table_stats_by_name
+    ]
+
+
+def table_visualization_node(task: TableChartTask):
+    table_name = task["table_name"]
+    df_key = task["df_key"]
+    table_stats = task["table_stats"]
     
-    for table_name, data_json in table_data.items():
-        viz_data = {
-            "univariate": [],
-            "bivariate": []
-        }
-        
-        table_stats = None
-        for analysis in analysis_results["table_analyses"]:
-            if analysis.get("table_name") == table_name or analysis.get("collection_name") == table_name:
-                table_stats = analysis["stats"]
-                break
-        
-        if not table_stats:
-            continue
-            
-        numerical_cols = table_stats.get("numerical_columns", [])
-        categorical_cols = table_stats.get("categorical_columns", [])
-        
-        for col in numerical_cols[:3]:  
-            try:
-                hist_data = get_visualization_data.invoke({
-                    "df_json": data_json,
-                    "chart_type": "histogram",
-                    "column": col
-                })
-                viz_data["univariate"].append({
-                    "type": "histogram",
+    viz_data = {
+        "univariate": [],
+        "bivariate": []
+    }
+    writer = get_stream_writer()
+    
+    def add_chart(group, chart):
+        viz_data[group].append(chart)
+        writer({"event": "chart", "data": {"group": group, **chart}})
+    
+    def chart_data(chart_type, column, second_column=None):
+        # Lazy charts are only described here and rendered on request.
+        if LAZY_CHARTS:
+            return chart_descriptor(df_key, chart_type, column, second_column,
+                                    basic_stats=table_stats, rows=len(get_dataframe(df_key)))
+        request = {"df_key": df_key, "chart_type": chart_type, "column": column}
+        if second_column:
+            request["second_column"] = second_column
+        return get_visualization_data.invoke(request)
+    
+    numerical_cols = table_stats.get("numerical_columns", [])
+    categorical_cols = table_stats.get("categorical_columns", [])
+    
+    for col in numerical_cols[:3]:  
+        try:
+            hist_data = chart_data("histogram", col)
+            add_chart("univariate", {
+                "type": "histogram",
+                "column": col,
+                "table": table_name,
+                "data": hist_data
+            })
+        except:
+            pass
+    
+    for col in categorical_cols[:3]:  
+        try:
+            if table_stats["categorical_stats"][col]["unique_values"] <= 15:
+                bar_data = chart_data("bar", col)
+                add_chart("univariate", {
+                    "type": "bar",
                     "column": col,
                     "table": table_name,
-                    "data": json.loads(hist_data)
+                    "data": bar_data
                 })
-            except:
-                pass
-        
-        for col in categorical_cols[:3]:  
-            try:
-                if table_stats["categorical_stats"][col]["unique_values"] <= 15:
-                    bar_data = get_visualization_data.invoke({
-                        "df_json": data_json,
-                        "chart_type": "bar",
-                        "column": col
-                    })
-                    viz_data["univariate"].append({
-                        "type": "bar",
+                
+                if table_stats["categorical_stats"][col]["unique_values"] <= 10:
+                    pie_data = chart_data("pie", col)
+                    add_chart("univariate", {
+                        "type": "pie",
                         "column": col,
                         "table": table_name,
-                        "data": json.loads(bar_data)
+                        "data": pie_data
                     })
-                    
-                    if table_stats["categorical_stats"][col]["unique_values"] <= 10:
-                        pie_data = get_visualization_data.invoke({
-                            "df_json": data_json,
-                            "chart_type": "pie",
-                            "column": col
-                        })
-                        viz_data["univariate"].append({
-                            "type": "pie",
-                            "column": col,
-                            "table": table_name,
-                            "data": json.loads(pie_data)
-                        })
-            except:
-                pass
-        
-        if len(numerical_cols) >= 2:
-            try:
-                scatter_data = get_visualization_data.invoke({
-                    "df_json": data_json,
-                    "chart_type": "scatter",
-                    "column": numerical_cols[0],
-                    "second_column": numerical_cols[1]
-                })
-                viz_data["bivariate"].append({
-                    "type": "scatter",
-                    "table": table_name,
-                    "data": json.loads(scatter_data)
-                })
-            except:
-                pass
-        
-        all_visualizations[table_name] = viz_data
+        except:
+            pass
     
-    analysis_results["visualizations"] = all_visualizations
+    if len(numerical_cols) >= 2:
+        try:
+            scatter_data = chart_data("scatter", numerical_cols[0], numerical_cols[1])
+            add_chart("bivariate", {
+                "type": "scatter",
+                "table": table_name,
+                "data": scatter_data
+            })
+        except:
+            pass
+    
+    return {"table_charts": [{"table_name": table_name, "visualizations": viz_data}]}
+
+
+def database_visualization_node(state: DatabaseAgentState):
+    charts_by_table = {
+        rendered["table_name"]: rendered["visualizations"]
+        for rendered in state.get("table_charts", [])
+    }
+    
+    all_visualizations = {
+        table_name: charts_by_table[table_name]
+        for table_name in state["table_data"]
+        if table_name in charts_by_table
+    }
     
     return {
-        "analysis_results": analysis_results,
+        "analysis_results": {**state["analysis_results"], "visualizations": all_visualizations},
         "messages": [AIMessage(content="Database visualization data prepared")]
     }
 
@@ -245,14 +277,16 @@ def create_database_analysis_graph():
     
     workflow.add_node("explore", explore_database_node)
     workflow.add_node("analyze", analyze_tables_node)
-    workflow.add_node("visualizations", database_visualization_node)
     workflow.add_node("narrative", database_narrative_node)
+    workflow.add_node("table_visualizations", table_visualization_node)
+    workflow.add_node("visualizations", database_visualization_node)
     
     workflow.set_entry_point("explore")
     workflow.add_edge("explore", "analyze")
-    workflow.add_edge("analyze", "visualizations")
-    workflow.add_edge("visualizations", "narrative")
-    workflow.add_edge("narrative", END)
+    workflow.add_conditional_edges("analyze", route_after_table_analysis, ["narrative", "table_visualizations"])
+    workflow.add_edge("narrative", "visualizations")
+    workflow.add_edge("table_visualizations", "visualizations")
+    workflow.add_edge("visualizations", END)
     
     app = workflow.compile()
     return app
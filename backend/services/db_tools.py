@@ -1,21 +1,20 @@
 import pandas as pd
 from langchain_core.tools import tool
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List, Union
 from pymongo import MongoClient
 from sqlalchemy import create_engine, inspect
 import traceback
 
 
 @tool
-def explore_postgresql_database(connection_string: str) -> str:
+def explore_postgresql_database(connection_string: str) -> Dict[str, Any]:
     """Explore PostgreSQL database schema and get table information.
     
     Args:
         connection_string: PostgreSQL connection string
     
     Returns:
-        JSON string with database schema information
+        Dictionary with database schema information
     """
     try:
         engine = create_engine(connection_string)
@@ -44,15 +43,15 @@ def explore_postgresql_database(connection_string: str) -> str:
         result["total_tables"] = len(result["tables"])
         engine.dispose()
         
-        return json.dumps(result)
+        return result
     
     except Exception as e:
-        return json.dumps({"error": str(e), "traceback": traceback.format_exc()})
+        return {"error": str(e), "traceback": traceback.format_exc()}
 
 
 @tool
-def query_postgresql_table(connection_string: str, table_name: str, limit: int = 1000) -> str:
-    """Query PostgreSQL table and return data as JSON.
+def query_postgresql_table(connection_string: str, table_name: str, limit: int = 1000) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """Query PostgreSQL table and return its rows.
     
     Args:
         connection_string: PostgreSQL connection string
@@ -60,7 +59,7 @@ def query_postgresql_table(connection_string: str, table_name: str, limit: int =
         limit: Maximum number of rows to return
     
     Returns:
-        JSON string with table data
+        List of row records, or a dictionary with the error
     """
     try:
         engine = create_engine(connection_string)
@@ -68,14 +67,14 @@ def query_postgresql_table(connection_string: str, table_name: str, limit: int =
         df = pd.read_sql(query, engine)
         engine.dispose()
         
-        return df.to_json(orient='records')
+        return df.to_dict(orient='records')
     
     except Exception as e:
-        return json.dumps({"error": str(e), "traceback": traceback.format_exc()})
+        return {"error": str(e), "traceback": traceback.format_exc()}
 
 
 @tool
-def explore_mongodb_database(connection_string: str, database_name: str) -> str:
+def explore_mongodb_database(connection_string: str, database_name: str) -> Dict[str, Any]:
     """Explore MongoDB database and get collection information.
     
     Args:
@@ -83,7 +82,7 @@ def explore_mongodb_database(connection_string: str, database_name: str) -> str:
         database_name: Name of the database
     
     Returns:
-        JSON string with database schema information
+        Dictionary with database schema information
     """
     try:
         client = MongoClient(connection_string)
@@ -116,15 +115,15 @@ def explore_mongodb_database(connection_string: str, database_name: str) -> str:
         result["total_collections"] = len(result["collections"])
         client.close()
         
-        return json.dumps(result)
+        return result
     
     except Exception as e:
-        return json.dumps({"error": str(e), "traceback": traceback.format_exc()})
+        return {"error": str(e), "traceback": traceback.format_exc()}
 
 
 @tool
-def query_mongodb_collection(connection_string: str, database_name: str, collection_name: str, limit: int = 1000) -> str:
-    """Query MongoDB collection and return data as JSON.
+def query_mongodb_collection(connection_string: str, database_name: str, collection_name: str, limit: int = 1000) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    """Query MongoDB collection and return its documents.
     
     Args:
         connection_string: MongoDB connection string
@@ -133,7 +132,7 @@ def query_mongodb_collection(connection_string: str, database_name: str, collect
         limit: Maximum number of documents to return
     
     Returns:
-        JSON string with collection data
+        List of documents, or a dictionary with the error
     """
     try:
         client = MongoClient(connection_string)
@@ -148,7 +147,7 @@ def query_mongodb_collection(connection_string: str, database_name: str, collect
         
         client.close()
         
-        return json.dumps(documents)
+        return documents
     
     except Exception as e:
-        return json.dumps({"error": str(e), "traceback": traceback.format_exc()})
+        return {"error": str(e), "traceback": traceback.format_exc()}
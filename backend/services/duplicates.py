@@ -0,0 +1,259 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from backend.services.sketches import SpaceSaving
+
+
+DUPLICATE_MODES = ("exact", "approximate")
+DUPLICATE_MODE = os.getenv("VIZBOT_DUPLICATE_MODE", "exact")
+DUPLICATE_BLOOM_MB = int(os.getenv("VIZBOT_DUPLICATE_BLOOM_MB", "16"))
+DUPLICATE_TOP_KEYS = 5
+# Distinct duplicated rows whose counts are tracked while streaming.
+DUPLICATE_TRACKED_KEYS = 10000
+BLOOM_HASHES = 4
+_APPROXIMATE_CHUNK_ROWS = 100000
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of each row, combining the vectorized hashes of its cells."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in DUPLICATE_MODES:
+        raise ValueError(f"Unsupported duplicate mode: {mode}. Use one of {', '.join(DUPLICATE_MODES)}")
+
+
+def _key_frame(df: pd.DataFrame, key_columns: Optional[List[str]]) -> pd.DataFrame:
+    if not key_columns:
+        return df
+    missing = [col for col in key_columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Key columns not found in data: {', '.join(map(str, missing))}")
+    return df[key_columns]
+
+
+def _native(value):
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _duplicate_entry(frame: pd.DataFrame, position: int, count: int, with_key: bool) -> Dict[str, Any]:
+    entry = {"first_duplicate_row": _native(frame.index[position]), "count": int(count)}
+    if with_key:
+        entry["key"] = {col: _native(value) for col, value in frame.iloc[position].items()}
+    return entry
+
+
+class BloomFilter:
+    """Bit array membership filter over 64-bit hashes (Bloom).
+
+    Never misses an added hash; reports an absent one as present with
+    probability false_positive_rate, which grows as the filter fills.
+    """
+
+    def __init__(self, size_bytes: int, hashes: int = BLOOM_HASHES):
+        self.bits = np.zeros(size_bytes, dtype="uint8")
+        self.size = np.uint64(size_bytes * 8)
+        self.hashes = hashes
+        self.added = 0
+
+    def _positions(self, values: np.ndarray):
+        # Double hashing: the two 32-bit halves yield all probe positions.
+        low = values & np.uint64(0xFFFFFFFF)
+        high = (values >> np.uint64(32)) | np.uint64(1)
+        for i in range(self.hashes):
+            yield (low + np.uint64(i) * high) % self.size
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        present = np.ones(len(values), dtype=bool)
+        for positions in self._positions(values):
+            present &= ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype("uint8")) & 1).astype(bool)
+        return present
+
+    def add(self, values: np.ndarray) -> None:
+        for positions in self._positions(values):
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype("uint8"))
+        self.added += len(values)
+
+    @property
+    def false_positive_rate(self) -> float:
+        return float((1 - np.exp(-self.hashes * self.added / float(self.size))) ** self.hashes)
+
+
+class DuplicateCounter:
+    """Counts rows identical to an earlier row over a stream of chunks.
+
+    Exact mode keeps the distinct row hashes as sorted runs merged like a
+    binary counter, 8 bytes per distinct row; two rows count as equal when
+    their 64-bit hashes are. Approximate mode tests hashes against a Bloom
+    filter of fixed size and corrects the count for its expected false
+    positives. The most repeated rows are tracked in a bounded Space-Saving
+    summary in both modes.
+    """
+
+    def __init__(self, mode: str = DUPLICATE_MODE, bloom_mb: int = DUPLICATE_BLOOM_MB,
+                 tracked_keys: int = DUPLICATE_TRACKED_KEYS):
+        _check_mode(mode)
+        self.mode = mode
+        self.rows = 0
+        self._duplicates = 0.0
+        self._runs: List[np.ndarray] = []
+        self._bloom = BloomFilter(bloom_mb * 1024 * 1024) if mode == "approximate" else None
+        self._repeats = SpaceSaving(capacity=tracked_keys)
+        self._examples: Dict[int, Dict[str, Any]] = {}
+        self._with_key = False
+
+    @property
+    def duplicates(self) -> int:
+        return int(round(self._duplicates))
+
+    def update(self, chunk: pd.DataFrame, with_key: bool = False) -> "DuplicateCounter":
+        self._with_key = with_key
+        hashes = row_hashes(chunk)
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        first = np.concatenate(([True], sorted_hashes[1:] != sorted_hashes[:-1]))
+        distinct = sorted_hashes[first]
+
+        seen = self._contains(distinct)
+        self._add(distinct[~seen])
+
+        repeated_sorted = ~first
+        repeated_sorted[first] = seen
+        repeated = np.empty(len(hashes), dtype=bool)
+        repeated[order] = repeated_sorted
+
+        self.rows += len(hashes)
+        self._duplicates += np.count_nonzero(~first) + self._seen_count(seen)
+        self._track(chunk, hashes, repeated)
+        return self
+
+    def _contains(self, hashes: np.ndarray) -> np.ndarray:
+        if self._bloom is not None:
+            return self._bloom.contains(hashes)
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            seen |= run[positions] == hashes
+        return seen
+
+    def _add(self, hashes: np.ndarray) -> None:
+        if self._bloom is not None:
+            self._bloom.add(hashes)
+            return
+        # Runs are disjoint, so merging two of them is a sort of two sorted halves.
+        while self._runs and len(self._runs[-1]) <= len(hashes):
+            hashes = np.sort(np.concatenate([self._runs.pop(), hashes]), kind="stable")
+        self._runs.append(hashes)
+
+    def _seen_count(self, seen: np.ndarray) -> float:
+        hits = np.count_nonzero(seen)
+        if self._bloom is None:
+            return hits
+        # Of the distinct hashes tested, about rate * len(seen) hit by chance.
+        rate = self._bloom.false_positive_rate
+        return float(np.clip((hits - rate * len(seen)) / (1 - rate), 0, hits))
+
+    def _track(self, chunk: pd.DataFrame, hashes: np.ndarray, repeated: np.ndarray) -> None:
+        positions = np.flatnonzero(repeated)
+        if len(positions) == 0:
+            return
+        repeats = pd.Series(positions, index=hashes[positions])
+        self._repeats.update_counts(repeats.index.value_counts(sort=False))
+
+        firsts = repeats[~repeats.index.duplicated()]
+        tracked = self._repeats.counts.index
+        for value in firsts.index[firsts.index.isin(tracked)]:
+            if value not in self._examples:
+                self._examples[value] = _duplicate_entry(chunk, firsts[value], 0, self._with_key)
+        self._examples = {value: self._examples[value] for value in tracked if value in self._examples}
+
+    def result(self, top: int = DUPLICATE_TOP_KEYS) -> Dict[str, Any]:
+        top_duplicates = []
+        for value, repeats in self._repeats.top(top).items():
+            # A row repeated n times occurs n + 1 times.
+            top_duplicates.append({**self._examples[value], "count": int(repeats) + 1})
+
+        result = {
+            "mode": self.mode,
+            "rows": self.rows,
+            "duplicates": self.duplicates,
+            "duplicate_percentage": float(round(self._duplicates / self.rows * 100, 2)) if self.rows else 0.0,
+            "top_duplicates": top_duplicates
+        }
+        if self._bloom is not None:
+            result["false_positive_rate"] = self._bloom.false_positive_rate
+        return result
+
+
+def find_duplicates(df: pd.DataFrame, key_columns: Optional[List[str]] = None, mode: str = DUPLICATE_MODE,
+                    top: int = DUPLICATE_TOP_KEYS) -> Dict[str, Any]:
+    """
+    Count duplicated rows, or duplicated keys over a subset of columns.
+
+    Exact mode hashes every row and only compares the values of rows whose
+    hashes collide, so the count equals DataFrame.duplicated().sum() while
+    the value comparison is limited to likely duplicates. Approximate mode
+    streams the frame through a DuplicateCounter with a fixed-size Bloom
+    filter.
+
+    Args:
+        df: Resident dataframe
+        key_columns: Columns forming the key; whole rows by default
+        mode: "exact" or "approximate"
+        top: Number of most repeated rows or keys to report
+
+    Returns:
+        Duplicate count and percentage, and the top duplicated rows with
+        their occurrence counts and first repeated row label; keys are
+        included when key_columns are given
+    """
+    _check_mode(mode)
+    frame = _key_frame(df, key_columns)
+    with_key = bool(key_columns)
+
+    if mode == "approximate":
+        counter = DuplicateCounter(mode="approximate")
+        for start in range(0, len(frame), _APPROXIMATE_CHUNK_ROWS):
+            counter.update(frame.iloc[start:start + _APPROXIMATE_CHUNK_ROWS], with_key=with_key)
+        result = counter.result(top)
+    else:
+        hashes = row_hashes(frame)
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        same = sorted_hashes[1:] == sorted_hashes[:-1]
+        colliding = np.zeros(len(hashes), dtype=bool)
+        colliding[1:] |= same
+        colliding[:-1] |= same
+
+        # Rows with a hash of their own are unique; the rest are grouped by value.
+        positions = np.sort(order[colliding])
+        candidates = frame.iloc[positions]
+        groups = candidates.groupby(list(candidates.columns), dropna=False, sort=False, observed=True).ngroup().to_numpy()
+        repeated = np.zeros(len(groups), dtype=bool)
+        repeated[np.unique(groups, return_index=True)[1]] = True
+        repeated = ~repeated
+
+        counts = np.bincount(groups) if len(groups) else np.empty(0, dtype="int64")
+        top_groups = np.flatnonzero(counts > 1)
+        top_groups = top_groups[np.argsort(-counts[top_groups], kind="stable")][:top]
+        first_repeats = dict(zip(*np.unique(groups[repeated], return_index=True)))
+        repeated_positions = positions[repeated]
+
+        duplicates = int(np.count_nonzero(repeated))
+        result = {
+            "mode": "exact",
+            "rows": int(len(frame)),
+            "duplicates": duplicates,
+            "duplicate_percentage": float(round(duplicates / len(frame) * 100, 2)) if len(frame) else 0.0,
+            "top_duplicates": [
+                _duplicate_entry(frame, repeated_positions[first_repeats[group]], counts[group], with_key)
+                for group in top_groups
+            ]
+        }
+
+    result["key_columns"] = list(key_columns) if key_columns else None
+    return result
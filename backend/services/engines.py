@@ -0,0 +1,517 @@
+import math
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from backend.services.correlations import CORRELATION_MATRIX_COLUMNS, CORRELATION_MISSING, summarize_correlations
+from backend.services.ingest import read_csv, sniff_csv
+from backend.services.profiler import PROFILE_SAMPLE_ROWS, profile_csv_in_chunks, profile_options, should_profile_in_chunks
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+ENGINES = ("auto", "pandas", "polars", "duckdb")
+ANALYSIS_ENGINE = os.getenv("VIZBOT_ENGINE", "auto")
+# Rows read to infer column types before a file is scanned.
+ENGINE_SCHEMA_ROWS = 100000
+# pandas' default missing value markers, so every engine reads the same nulls.
+NULL_STRINGS = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+]
+
+
+def _numeric_stats(row: Dict[str, Any]) -> Dict[str, Any]:
+    count = int(row["count"] or 0)
+    if count == 0:
+        return {"mean": None, "median": None, "std": None, "min": None, "max": None, "q25": None, "q75": None,
+                "count": 0, "null_count": int(row["null_count"]), "infinite_count": int(row["infinite_count"])}
+    return {
+        "mean": float(row["mean"]),
+        "median": float(row["median"]),
+        "std": float(row["std"]) if count > 1 else 0.0,
+        "min": float(row["min"]),
+        "max": float(row["max"]),
+        "q25": float(row["q25"]),
+        "q75": float(row["q75"]),
+        "count": count,
+        "null_count": int(row["null_count"]),
+        "infinite_count": int(row["infinite_count"])
+    }
+
+
+def _categorical_stats(total_count: int, null_count: int, unique_values: int, top_values: List[Tuple[Any, int]]) -> Dict[str, Any]:
+    return {
+        "unique_values": int(unique_values) if total_count else 0,
+        "mode": str(top_values[0][0]) if top_values else None,
+        "top_values": {str(value): int(count) for value, count in top_values},
+        "total_count": int(total_count),
+        "null_count": int(null_count)
+    }
+
+
+def _iqr_bounds(q1, q3) -> Optional[Tuple[float, float]]:
+    if q1 is None or q3 is None or not np.isfinite(q3 - q1):
+        return None
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+def _outlier_entry(count: int, rows: int, bounds: Tuple[float, float], values: List[Any]) -> Dict[str, Any]:
+    return {
+        "count": int(count),
+        "percentage": float(round(count / rows * 100, 2)),
+        "lower_bound": float(bounds[0]),
+        "upper_bound": float(bounds[1]),
+        "outlier_values": values
+    }
+
+
+def _correlation_columns(numerical_stats: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Columns with a finite value, or [] when the engine should leave correlations to the resident sample."""
+    columns = [col for col, stats in numerical_stats.items() if stats["count"]]
+    return columns if 2 <= len(columns) <= CORRELATION_MATRIX_COLUMNS else []
+
+
+def _correlation_pairs(columns: List[str]) -> List[Tuple[int, int]]:
+    return [(i, j) for i in range(len(columns)) for j in range(i + 1, len(columns))]
+
+
+def _correlations(columns: List[str], numerical_stats: Dict[str, Dict[str, Any]], sums: np.ndarray) -> Dict[str, Any]:
+    """
+    Pearson correlations from per-pair sums of mean-centered finite values.
+
+    Each row of sums holds, over the rows where both columns are finite,
+    the row count, the two sums, the two sums of squares and the sum of
+    products; the centering constant cancels out, so this matches
+    DataFrame.corr's pairwise-complete handling.
+    """
+    width = len(columns)
+    matrix = np.full((width, width), np.nan)
+    n, sa, sb, saa, sbb, sab = np.nan_to_num(np.asarray(sums, dtype="float64").reshape(-1, 6)).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = sab - sa * sb / n
+        variance = np.maximum(saa - sa ** 2 / n, 0) * np.maximum(sbb - sb ** 2 / n, 0)
+        values = np.clip(covariance / np.sqrt(variance), -1.0, 1.0)
+    for (i, j), value in zip(_correlation_pairs(columns), values):
+        matrix[i, j] = matrix[j, i] = value
+
+    for i, col in enumerate(columns):
+        stats = numerical_stats[col]
+        if stats["count"] > 1 and stats["std"] > 0:
+            matrix[i, i] = 1.0
+        else:
+            matrix[i, :] = np.nan
+            matrix[:, i] = np.nan
+    return summarize_correlations(columns, matrix, method="pearson", missing=CORRELATION_MISSING)
+
+
+def _profile(columns: List[str], dtypes: Dict[str, str], rows: int, null_counts: Dict[str, int], duplicates: int,
+             sample: pd.DataFrame, numerical_stats: Dict[str, Dict[str, Any]], categorical_stats: Dict[str, Dict[str, Any]],
+             datetime_columns: List[str], outliers: Dict[str, Any], correlations: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # The whole file is never in memory, so its footprint is extrapolated from the sample.
+    sample_bytes = sample.memory_usage(deep=True, index=False).sum()
+    memory_bytes = sample_bytes / len(sample) * rows if len(sample) else 0
+    profile = {
+        "basic_stats": {
+            "shape": {"rows": int(rows), "columns": len(columns)},
+            "columns": columns,
+            "dtypes": dtypes,
+            "missing_values": null_counts,
+            "missing_percentage": {col: float(round(null_counts[col] / rows * 100, 2)) if rows else 0.0 for col in columns},
+            "duplicates": int(duplicates),
+            "memory_usage": float(round(memory_bytes / 1024**2, 2)),
+            "numerical_columns": list(numerical_stats),
+            "categorical_columns": list(categorical_stats),
+            "datetime_columns": datetime_columns,
+            "numerical_stats": numerical_stats,
+            "categorical_stats": categorical_stats
+        },
+        "outliers": outliers
+    }
+    if correlations is not None:
+        profile["correlations"] = correlations
+    return profile
+
+
+class Engine(ABC):
+    """Compute backend that turns an uploaded CSV file into what the analysis graph reads.
+
+    profile_csv returns the resident dataframe for the tools and, when the
+    engine computed statistics itself, a profile with "basic_stats",
+    "outliers" and optionally "correlations" for the whole file; the
+    dataframe is then a row sample used for the remaining tools and charts.
+    """
+
+    name = ""
+
+    def available(self) -> bool:
+        return True
+
+    def options(self, size_bytes: int) -> Dict[str, Any]:
+        """Settings that change the result of profile_csv, for the result cache key."""
+        return {"engine": self.name}
+
+    @abstractmethod
+    def profile_csv(self, path: str, size_bytes: int) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        ...
+
+
+class PandasEngine(Engine):
+    """Eager pandas: files that fit are loaded whole, larger ones are profiled chunk by chunk."""
+
+    name = "pandas"
+
+    def options(self, size_bytes: int) -> Dict[str, Any]:
+        options = profile_options() if should_profile_in_chunks(size_bytes) else {}
+        return {**options, "engine": self.name}
+
+    def profile_csv(self, path: str, size_bytes: int) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        if should_profile_in_chunks(size_bytes):
+            return profile_csv_in_chunks(path)
+        return read_csv(path), None
+
+
+class PolarsEngine(Engine):
+    """Polars lazy scan of the file, run by its multithreaded streaming engine."""
+
+    name = "polars"
+
+    def available(self) -> bool:
+        return pl is not None
+
+    def options(self, size_bytes: int) -> Dict[str, Any]:
+        return {"engine": self.name, "version": pl.__version__, "sample_rows": PROFILE_SAMPLE_ROWS,
+                "correlation_missing": CORRELATION_MISSING}
+
+    def profile_csv(self, path: str, size_bytes: int) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        dialect = sniff_csv(path)
+        try:
+            lf = pl.scan_csv(
+                path,
+                separator=dialect["delimiter"],
+                quote_char=dialect["quotechar"],
+                has_header=dialect["header"],
+                new_columns=dialect["columns"],
+                # Polars decodes UTF-8 only; other encodings are read lossily.
+                encoding="utf8" if dialect["encoding"].startswith("utf-8") else "utf8-lossy",
+                infer_schema_length=ENGINE_SCHEMA_ROWS,
+                null_values=NULL_STRINGS
+            )
+            return self._profile(lf)
+        except (pl.exceptions.ComputeError, pl.exceptions.NoDataError) as e:
+            raise ValueError(f"Error parsing CSV file: {str(e)}")
+
+    def _profile(self, lf) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        schema = lf.collect_schema()
+        columns = schema.names()
+        numerical = [col for col, dtype in schema.items() if dtype.is_numeric()]
+        categorical = [col for col, dtype in schema.items() if dtype in (pl.String, pl.Categorical)]
+        datetime_columns = [col for col, dtype in schema.items() if dtype.is_temporal()]
+
+        exprs = [pl.len().alias("rows")]
+        for i, col in enumerate(columns):
+            exprs.append(pl.col(col).null_count().alias(f"null{i}"))
+        for i, col in enumerate(numerical):
+            x = pl.col(col).cast(pl.Float64)
+            finite = pl.when(x.is_finite()).then(x)
+            # IQR bounds are taken over infinite values too, like detect_outliers.
+            bounded = pl.when(x.is_nan().not_()).then(x)
+            exprs += [
+                x.is_nan().sum().alias(f"nan{i}"),
+                x.is_infinite().sum().alias(f"infinite_count{i}"),
+                finite.count().alias(f"count{i}"),
+                finite.mean().alias(f"mean{i}"),
+                finite.std().alias(f"std{i}"),
+                finite.min().alias(f"min{i}"),
+                finite.max().alias(f"max{i}"),
+                finite.quantile(0.25, "linear").alias(f"q25{i}"),
+                finite.median().alias(f"median{i}"),
+                finite.quantile(0.75, "linear").alias(f"q75{i}"),
+                bounded.quantile(0.25, "linear").alias(f"bound_q25{i}"),
+                bounded.quantile(0.75, "linear").alias(f"bound_q75{i}")
+            ]
+        for i, col in enumerate(categorical):
+            exprs.append(pl.col(col).drop_nulls().n_unique().alias(f"unique{i}"))
+
+        top_queries = [
+            lf.select(pl.col(col).alias("value")).drop_nulls()
+              .group_by("value").agg(pl.len().alias("count"))
+              .top_k(10, by="count").sort("count", descending=True)
+            for col in categorical
+        ]
+        results = pl.collect_all([lf.select(exprs), lf.unique().select(pl.len())] + top_queries, engine="streaming")
+        stats = results[0].row(0, named=True)
+        duplicates = stats["rows"] - results[1].item()
+        rows = stats["rows"]
+
+        null_counts = {col: int(stats[f"null{i}"]) for i, col in enumerate(columns)}
+        numerical_stats = {}
+        for i, col in enumerate(numerical):
+            # pandas reads NaN as missing.
+            null_counts[col] += int(stats[f"nan{i}"])
+            row = {key: stats[f"{key}{i}"] for key in ("count", "mean", "std", "min", "max", "q25", "median", "q75", "infinite_count")}
+            numerical_stats[col] = _numeric_stats({**row, "null_count": null_counts[col]})
+        categorical_stats = {
+            col: _categorical_stats(rows - null_counts[col], null_counts[col], stats[f"unique{i}"], top.rows())
+            for i, (col, top) in enumerate(zip(categorical, results[2:]))
+        }
+
+        bounds = {}
+        for i, col in enumerate(numerical):
+            col_bounds = _iqr_bounds(stats[f"bound_q25{i}"], stats[f"bound_q75{i}"])
+            if col_bounds is not None:
+                bounds[col] = col_bounds
+        correlation_columns = _correlation_columns(numerical_stats)
+
+        second = []
+        for i, (col, (lower, upper)) in enumerate(bounds.items()):
+            x = pl.col(col).cast(pl.Float64)
+            second += [
+                ((x < lower).sum() + (x > upper).sum()).alias(f"outliers{i}"),
+                pl.col(col).filter(x < lower).head(5).implode().alias(f"low{i}"),
+                pl.col(col).filter(x > upper).head(5).implode().alias(f"high{i}")
+            ]
+        frame = lf
+        if correlation_columns and CORRELATION_MISSING == "listwise":
+            frame = lf.filter(pl.all_horizontal([pl.col(col).cast(pl.Float64).is_finite() for col in correlation_columns]))
+        centered = [
+            pl.when(pl.col(col).cast(pl.Float64).is_finite()).then(pl.col(col).cast(pl.Float64) - numerical_stats[col]["mean"])
+            for col in correlation_columns
+        ]
+        correlation_exprs = []
+        for k, (i, j) in enumerate(_correlation_pairs(correlation_columns)):
+            shared = centered[i].is_not_null() & centered[j].is_not_null()
+            a = pl.when(shared).then(centered[i])
+            b = pl.when(shared).then(centered[j])
+            correlation_exprs += [
+                shared.sum().alias(f"n{k}"), a.sum().alias(f"sa{k}"), b.sum().alias(f"sb{k}"),
+                (a * a).sum().alias(f"saa{k}"), (b * b).sum().alias(f"sbb{k}"), (a * b).sum().alias(f"sab{k}")
+            ]
+
+        queries = [lf.select(second)] if second else []
+        if correlation_exprs:
+            queries.append(frame.select(correlation_exprs))
+        results = pl.collect_all(queries, engine="streaming") if queries else []
+
+        outliers = {}
+        if second:
+            found = results[0].row(0, named=True)
+            for i, (col, col_bounds) in enumerate(bounds.items()):
+                if found[f"outliers{i}"]:
+                    outliers[col] = _outlier_entry(found[f"outliers{i}"], rows, col_bounds, list(found[f"low{i}"]) + list(found[f"high{i}"]))
+        correlations = None
+        if correlation_exprs:
+            sums = results[-1].row(0)
+            correlations = _correlations(correlation_columns, numerical_stats, np.array(sums, dtype="float64"))
+
+        step = max(1, math.ceil(rows / PROFILE_SAMPLE_ROWS))
+        sampled = lf.gather_every(step).collect(engine="streaming")
+        sample = pd.DataFrame({col: sampled.get_column(col).to_numpy() for col in sampled.columns}, columns=columns)
+
+        dtypes = {col: str(dtype) for col, dtype in schema.items()}
+        return sample, _profile(columns, dtypes, rows, null_counts, duplicates, sample, numerical_stats,
+                                categorical_stats, datetime_columns, outliers, correlations)
+
+
+def _identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(text: str) -> str:
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+# DuckDB reads cp1252 text as latin-1, which differs only in rarely used punctuation.
+_DUCKDB_ENCODINGS = {"utf-8": "utf-8", "utf-8-sig": "utf-8", "utf-16": "utf-16"}
+_DUCKDB_NUMERIC = {"TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                   "UINTEGER", "UBIGINT", "UHUGEINT", "FLOAT", "DOUBLE"}
+
+
+class DuckDBEngine(Engine):
+    """DuckDB SQL aggregates over the file where it lies; only the row sample is materialized."""
+
+    name = "duckdb"
+
+    def available(self) -> bool:
+        return duckdb is not None
+
+    def options(self, size_bytes: int) -> Dict[str, Any]:
+        return {"engine": self.name, "version": duckdb.__version__, "sample_rows": PROFILE_SAMPLE_ROWS,
+                "correlation_missing": CORRELATION_MISSING}
+
+    def profile_csv(self, path: str, size_bytes: int) -> Tuple[pd.DataFrame, Optional[Dict[str, Any]]]:
+        dialect = sniff_csv(path)
+        options = [
+            f"delim = {_literal(dialect['delimiter'])}",
+            f"quote = {_literal(dialect['quotechar'])}",
+            f"header = {str(dialect['header']).lower()}",
+            f"encoding = {_literal(_DUCKDB_ENCODINGS.get(dialect['encoding'], 'latin-1'))}",
+            f"sample_size = {ENGINE_SCHEMA_ROWS}",
+            f"nullstr = [{', '.join(_literal(value) for value in NULL_STRINGS)}]"
+        ]
+        if dialect["columns"]:
+            options.append(f"names = [{', '.join(_literal(col) for col in dialect['columns'])}]")
+        connection = duckdb.connect()
+        try:
+            source = f"read_csv({_literal(path)}, {', '.join(options)})"
+            return self._profile(connection, source)
+        except (duckdb.InvalidInputException, duckdb.ConversionException) as e:
+            raise ValueError(f"Error parsing CSV file: {str(e)}")
+        finally:
+            connection.close()
+
+    def _profile(self, connection, source: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        schema = [(row[0], row[1]) for row in connection.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+        columns = [col for col, _ in schema]
+        numerical = [col for col, dtype in schema if dtype in _DUCKDB_NUMERIC or dtype.startswith("DECIMAL")]
+        categorical = [col for col, dtype in schema if dtype == "VARCHAR"]
+        datetime_columns = [col for col, dtype in schema if dtype in ("DATE", "TIME") or dtype.startswith("TIMESTAMP")]
+
+        def number(col):
+            return f"CAST({_identifier(col)} AS DOUBLE)"
+
+        def finite(col):
+            return f"CASE WHEN isfinite({number(col)}) THEN {number(col)} END"
+
+        aggregates = [("rows", "count(*)")]
+        for col in columns:
+            aggregates.append((("null", col), f"count(*) - count({_identifier(col)})"))
+        for col in numerical:
+            x = number(col)
+            aggregates += [
+                (("nan", col), f"count_if(isnan({x}))"),
+                (("infinite_count", col), f"count_if(isinf({x}))"),
+                (("count", col), f"count({finite(col)})"),
+                (("mean", col), f"avg({finite(col)})"),
+                (("std", col), f"stddev_samp({finite(col)})"),
+                (("min", col), f"min({finite(col)})"),
+                (("max", col), f"max({finite(col)})"),
+                (("quantiles", col), f"quantile_cont({finite(col)}, [0.25, 0.5, 0.75])"),
+                # IQR bounds are taken over infinite values too, like detect_outliers.
+                (("bounds", col), f"quantile_cont(CASE WHEN NOT isnan({x}) THEN {x} END, [0.25, 0.75])")
+            ]
+        for col in categorical:
+            aggregates.append((("unique", col), f"count(DISTINCT {_identifier(col)})"))
+
+        values = connection.execute(f"SELECT {', '.join(sql for _, sql in aggregates)} FROM {source}").fetchone()
+        stats = dict(zip((key for key, _ in aggregates), values))
+        rows = int(stats["rows"])
+        distinct_rows = connection.execute(f"SELECT count(*) FROM (SELECT DISTINCT * FROM {source})").fetchone()[0]
+
+        null_counts = {col: int(stats[("null", col)]) for col in columns}
+        numerical_stats = {}
+        for col in numerical:
+            # pandas reads NaN as missing.
+            null_counts[col] += int(stats[("nan", col)])
+            q25, median, q75 = stats[("quantiles", col)] or (None, None, None)
+            row = {key: stats[(key, col)] for key in ("count", "mean", "std", "min", "max", "infinite_count")}
+            numerical_stats[col] = _numeric_stats({**row, "q25": q25, "median": median, "q75": q75, "null_count": null_counts[col]})
+
+        top_values = {col: [] for col in categorical}
+        if categorical:
+            # One scan counts every text column: unpivoted to (column, value) pairs, nulls dropped.
+            query = (
+                f"WITH text AS (SELECT {', '.join(_identifier(col) for col in categorical)} FROM {source}), "
+                f"counts AS (SELECT column_name, column_value, count(*) AS n "
+                f"FROM (UNPIVOT text ON COLUMNS(*) INTO NAME column_name VALUE column_value) GROUP BY ALL) "
+                f"SELECT column_name, column_value, n FROM counts "
+                f"QUALIFY row_number() OVER (PARTITION BY column_name ORDER BY n DESC, column_value) <= 10 "
+                f"ORDER BY column_name, n DESC, column_value"
+            )
+            for col, value, count in connection.execute(query).fetchall():
+                top_values[col].append((value, count))
+        categorical_stats = {
+            col: _categorical_stats(rows - null_counts[col], null_counts[col], stats[("unique", col)], top_values[col])
+            for col in categorical
+        }
+
+        bounds = {}
+        for col in numerical:
+            col_bounds = _iqr_bounds(*(stats[("bounds", col)] or (None, None)))
+            if col_bounds is not None:
+                bounds[col] = col_bounds
+        outliers = {}
+        if bounds:
+            second = []
+            for col, (lower, upper) in bounds.items():
+                x, lower, upper = number(col), f"CAST({lower!r} AS DOUBLE)", f"CAST({upper!r} AS DOUBLE)"
+                # The most extreme values stand in for the first ones in file order.
+                second += [
+                    f"count_if({x} < {lower} OR {x} > {upper})",
+                    f"min({_identifier(col)}, 5) FILTER (WHERE {x} < {lower})",
+                    f"max({_identifier(col)}, 5) FILTER (WHERE {x} > {upper})"
+                ]
+            found = connection.execute(f"SELECT {', '.join(second)} FROM {source}").fetchone()
+            for i, (col, col_bounds) in enumerate(bounds.items()):
+                count, low, high = found[3 * i:3 * i + 3]
+                if count:
+                    outliers[col] = _outlier_entry(count, rows, col_bounds, list(low or []) + list(high or []))
+
+        correlations = None
+        correlation_columns = _correlation_columns(numerical_stats)
+        if correlation_columns:
+            centered = [f"({finite(col)} - {numerical_stats[col]['mean']!r})" for col in correlation_columns]
+            sums = []
+            for i, j in _correlation_pairs(correlation_columns):
+                shared = f"FILTER (WHERE {centered[i]} IS NOT NULL AND {centered[j]} IS NOT NULL)"
+                sums += [
+                    f"count(*) {shared}", f"sum({centered[i]}) {shared}", f"sum({centered[j]}) {shared}",
+                    f"sum({centered[i]} * {centered[i]}) {shared}", f"sum({centered[j]} * {centered[j]}) {shared}",
+                    f"sum({centered[i]} * {centered[j]}) {shared}"
+                ]
+            where = ""
+            if CORRELATION_MISSING == "listwise":
+                where = " WHERE " + " AND ".join(f"isfinite({number(col)})" for col in correlation_columns)
+            found = connection.execute(f"SELECT {', '.join(sums)} FROM {source}{where}").fetchone()
+            correlations = _correlations(correlation_columns, numerical_stats,
+                                         np.array([np.nan if value is None else value for value in found], dtype="float64"))
+
+        sample = connection.execute(
+            f"SELECT * FROM {source} USING SAMPLE reservoir({PROFILE_SAMPLE_ROWS} ROWS) REPEATABLE (0)"
+        ).df()
+        dtypes = {col: dtype for col, dtype in schema}
+        return sample, _profile(columns, dtypes, rows, null_counts, rows - distinct_rows, sample, numerical_stats,
+                                categorical_stats, datetime_columns, outliers, correlations)
+
+
+_ENGINES = {engine.name: engine for engine in (PandasEngine(), PolarsEngine(), DuckDBEngine())}
+
+
+def select_engine(name: Optional[str], size_bytes: int) -> Engine:
+    """
+    Resolve the compute engine for one upload.
+
+    "auto" keeps pandas for files that load whole and moves files that
+    pandas would profile chunk by chunk to DuckDB, or Polars, when installed.
+
+    Args:
+        name: Requested engine, one of ENGINES; VIZBOT_ENGINE when omitted
+        size_bytes: Size of the uploaded file
+
+    Returns:
+        The engine instance
+    """
+    name = name or ANALYSIS_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unsupported engine: {name}. Use one of {', '.join(ENGINES)}")
+    if name == "auto":
+        if should_profile_in_chunks(size_bytes):
+            for candidate in ("duckdb", "polars"):
+                if _ENGINES[candidate].available():
+                    return _ENGINES[candidate]
+        return _ENGINES["pandas"]
+
+    engine = _ENGINES[name]
+    if not engine.available():
+        raise ValueError(f"The {name} engine is not installed; install the 'engines' extra to use it")
+    return engine
@@ -0,0 +1,83 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+
+GRAPH_WORKERS = int(os.getenv("VIZBOT_GRAPH_WORKERS", "4"))
+
+PROFILE_WORKERS = int(os.getenv("VIZBOT_PROFILE_WORKERS", str(os.cpu_count() or 1)))
+
+_executor = ThreadPoolExecutor(max_workers=GRAPH_WORKERS, thread_name_prefix="vizbot-graph")
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call (graph invocation, CSV parsing, driver I/O) off the event loop.
+
+    Calls share one bounded pool per worker process, so at most GRAPH_WORKERS
+    of them run at once and the rest queue without stalling other requests.
+
+    Args:
+        func: Synchronous callable to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool for CPU-bound profiling, started on first use.
+
+    Workers are spawned rather than forked, so they do not inherit the
+    server's threads and locks.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PROFILE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def reset_process_pool() -> None:
+    """Discard a broken process pool so the next get_process_pool starts a new one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def invoke_graph(graph, initial_state: Dict[str, Any], on_node: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Invoke a compiled graph, reporting each completed node to on_node.
+
+    Args:
+        graph: Compiled LangGraph workflow
+        initial_state: Initial graph state
+        on_node: Optional callback receiving the name of every node as it finishes
+
+    Returns:
+        Final graph state
+    """
+    if on_node is None:
+        return graph.invoke(initial_state)
+
+    final_state = None
+    for mode, chunk in graph.stream(initial_state, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            for node in chunk:
+                on_node(node)
+        else:
+            final_state = chunk
+    return final_state
@@ -1,6 +1,8 @@
 from typing import TypedDict, Annotated
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from langgraph.graph.message import add_messages
+from langgraph.config import get_stream_writer
 from langchain_core.messages import HumanMessage, AIMessage
 from backend.services.llm import get_llm
 from backend.services.tools import (
@@ -9,28 +11,64 @@ from backend.services.tools import (
     analyze_correlations,
     get_visualization_data
 )
+from backend.services.chart_store import LAZY_CHARTS, chart_descriptor
+from backend.services.charts import CHART_BINARY, HISTOGRAM_MAX_BINS, SCATTER_DENSITY_POINTS, SCATTER_MAX_POINTS
+from backend.services.correlations import CORRELATION_MATRIX_COLUMNS, CORRELATION_MAX_PAIRS, CORRELATION_MISSING
+from backend.services.duplicates import DUPLICATE_BLOOM_MB, DUPLICATE_MODE
+from backend.services.ingest import ARROW_CSV, OPTIMIZE_DTYPES
+from backend.services.sketches import SKETCH_EXACT_LIMIT
+from backend.services.datasets import get_dataframe
 from backend.services.prompts import NARRATIVE_SUMMARY_PROMPT
 import json
+import operator
 
 
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
-    df_json: str
+    df_key: str
+    dataset_id: str
+    profile: dict
     analysis_results: dict
     narrative_summary: str
+    charts: Annotated[list, operator.add]
+
+
+class ChartTask(TypedDict, total=False):
+    df_key: str
+    spec: dict
+    correlation_matrix: dict
+    column_stats: dict
 
 
 def analysis_node(state: AgentState):
-    df_json = state["df_json"]
+    df_key = state["df_key"]
+    writer = get_stream_writer()
     
-    basic_stats = analyze_basic_stats.invoke({"df_json": df_json})
-    outliers = detect_outliers.invoke({"df_json": df_json})
-    correlations = analyze_correlations.invoke({"df_json": df_json})
+    profile = state.get("profile")
+    
+    # Files profiled chunk by chunk or by another engine arrive with their
+    # statistics; the resident dataframe is then only a sample used for
+    # charts and, unless the engine computed them, correlations.
+    if profile:
+        basic_stats = profile["basic_stats"]
+    else:
+        basic_stats = analyze_basic_stats.invoke({"df_key": df_key})
+    writer({"event": "basic_stats", "data": basic_stats})
+    if profile:
+        outliers = profile["outliers"]
+    else:
+        outliers = detect_outliers.invoke({"df_key": df_key})
+    writer({"event": "outliers", "data": outliers})
+    if profile and "correlations" in profile:
+        correlations = profile["correlations"]
+    else:
+        correlations = analyze_correlations.invoke({"df_key": df_key})
+    writer({"event": "correlations", "data": correlations})
     
     analysis_results = {
-        "basic_stats": json.loads(basic_stats),
-        "outliers": json.loads(outliers),
-        "correlations": json.loads(correlations)
+        "basic_stats": basic_stats,
+        "outliers": outliers,
+        "correlations": correlations
     }
     
     return {
@@ -58,101 +96,178 @@ Generate a comprehensive narrative summary of the dataset analysis."""
     }
 
 
-def visualization_prep_node(state: AgentState):
-    df_json = state["df_json"]
-    analysis_results = state["analysis_results"]
-    
-    viz_data = {
-        "univariate": [],
-        "bivariate": []
-    }
+def plan_visualizations(basic_stats: dict) -> list:
+    numerical_cols = basic_stats.get("numerical_columns", [])
+    categorical_cols = basic_stats.get("categorical_columns", [])
     
-    numerical_cols = analysis_results["basic_stats"].get("numerical_columns", [])
-    categorical_cols = analysis_results["basic_stats"].get("categorical_columns", [])
+    chart_specs = []
     
     for col in numerical_cols[:5]:
-        hist_data = get_visualization_data.invoke({
-            "df_json": df_json,
-            "chart_type": "histogram",
-            "column": col
-        })
-        chart_data = json.loads(hist_data)
-        viz_data["univariate"].append({
-            "type": "histogram",
-            "column": col,
-            **chart_data  
-        })
+        chart_specs.append({"group": "univariate", "chart_type": "histogram", "column": col})
     
     for col in categorical_cols[:5]:
-        if analysis_results["basic_stats"]["categorical_stats"][col]["unique_values"] <= 15:
-            bar_data = get_visualization_data.invoke({
-                "df_json": df_json,
-                "chart_type": "bar",
-                "column": col
-            })
-            chart_data = json.loads(bar_data)
-            viz_data["univariate"].append({
-                "type": "bar",
-                "column": col,
-                **chart_data  
-            })
+        if basic_stats["categorical_stats"][col]["unique_values"] <= 15:
+            chart_specs.append({"group": "univariate", "chart_type": "bar", "column": col})
             
-            if analysis_results["basic_stats"]["categorical_stats"][col]["unique_values"] <= 10:
-                pie_data = get_visualization_data.invoke({
-                    "df_json": df_json,
-                    "chart_type": "pie",
-                    "column": col
-                })
-                chart_data = json.loads(pie_data)
-                viz_data["univariate"].append({
-                    "type": "pie",
-                    "column": col,
-                    **chart_data  
-                })
+            if basic_stats["categorical_stats"][col]["unique_values"] <= 10:
+                chart_specs.append({"group": "univariate", "chart_type": "pie", "column": col})
     
     if len(numerical_cols) >= 2:
         for i in range(min(3, len(numerical_cols)-1)):
-            scatter_data = get_visualization_data.invoke({
-                "df_json": df_json,
+            chart_specs.append({
+                "group": "bivariate",
                 "chart_type": "scatter",
                 "column": numerical_cols[i],
                 "second_column": numerical_cols[i+1]
             })
-            chart_data = json.loads(scatter_data)
-            viz_data["bivariate"].append({
-                "type": "scatter",
-                **chart_data 
-            })
         
-        heatmap_data = get_visualization_data.invoke({
-            "df_json": df_json,
-            "chart_type": "correlation_heatmap",
-            "column": "correlation" 
-        })
-        chart_data = json.loads(heatmap_data)
-        viz_data["bivariate"].append({
-            "type": "correlation_heatmap",
-            **chart_data  
-        })
-    
-    analysis_results["visualizations"] = viz_data
+        chart_specs.append({"group": "bivariate", "chart_type": "correlation_heatmap", "column": "correlation"})
+    
+    for position, spec in enumerate(chart_specs):
+        spec["position"] = position
+    
+    return chart_specs
+
+
+def route_after_analysis(state: AgentState):
+    # Lazy charts are described by visualization_prep_node and rendered on request.
+    if LAZY_CHARTS:
+        return ["narrative"]
+    
+    basic_stats = state["analysis_results"]["basic_stats"]
+    chart_specs = plan_visualizations(basic_stats)
+    correlations = state["analysis_results"]["correlations"]
+    
+    sends = []
+    for spec in chart_specs:
+        task = {"df_key": state["df_key"], "spec": spec}
+        # The heatmap draws the matrix the analysis already computed.
+        if spec["chart_type"] == "correlation_heatmap" and "correlation_matrix" in correlations:
+            task["correlation_matrix"] = correlations["correlation_matrix"]
+        # Histograms take their bins from the column statistics.
+        if spec["chart_type"] == "histogram" and spec["column"] in basic_stats.get("numerical_stats", {}):
+            task["column_stats"] = basic_stats["numerical_stats"][spec["column"]]
+        sends.append(Send("chart", task))
+    
+    return ["narrative"] + sends
+
+
+def chart_node(task: ChartTask):
+    spec = task["spec"]
+    
+    request = {
+        "df_key": task["df_key"],
+        "chart_type": spec["chart_type"],
+        "column": spec["column"]
+    }
+    if "second_column" in spec:
+        request["second_column"] = spec["second_column"]
+    if "correlation_matrix" in task:
+        request["correlation_matrix"] = task["correlation_matrix"]
+    if "column_stats" in task:
+        request["column_stats"] = task["column_stats"]
+    
+    chart_data = get_visualization_data.invoke(request)
+    
+    if spec["group"] == "univariate":
+        chart = {"type": spec["chart_type"], "column": spec["column"], **chart_data}
+    else:
+        chart = {"type": spec["chart_type"], **chart_data}
+    
+    get_stream_writer()({"event": "chart", "data": {"group": spec["group"], **chart}})
+    
+    return {"charts": [{"position": spec["position"], "group": spec["group"], "chart": chart}]}
+
+
+def describe_charts(state: AgentState) -> dict:
+    basic_stats = state["analysis_results"]["basic_stats"]
+    correlations = state["analysis_results"]["correlations"]
+    dataset_id = state.get("dataset_id") or state["df_key"]
+    rows = len(get_dataframe(state["df_key"]))
+    writer = get_stream_writer()
+    
+    viz_data = {
+        "univariate": [],
+        "bivariate": []
+    }
+    
+    for spec in plan_visualizations(basic_stats):
+        descriptor = chart_descriptor(
+            dataset_id,
+            spec["chart_type"],
+            spec["column"],
+            spec.get("second_column"),
+            basic_stats=basic_stats,
+            rows=rows,
+            correlation_columns=len(correlations.get("correlation_matrix", {}))
+        )
+        chart = {"type": spec["chart_type"], **descriptor}
+        writer({"event": "chart", "data": {"group": spec["group"], **chart}})
+        viz_data[spec["group"]].append(chart)
+    
+    return viz_data
+
+
+def visualization_prep_node(state: AgentState):
+    if LAZY_CHARTS:
+        return {
+            "analysis_results": {**state["analysis_results"], "visualizations": describe_charts(state)},
+            "messages": [AIMessage(content="Visualization descriptors prepared")]
+        }
+    
+    viz_data = {
+        "univariate": [],
+        "bivariate": []
+    }
+    
+    for rendered in sorted(state.get("charts", []), key=lambda rendered: rendered["position"]):
+        viz_data[rendered["group"]].append(rendered["chart"])
     
     return {
-        "analysis_results": analysis_results,
+        "analysis_results": {**state["analysis_results"], "visualizations": viz_data},
         "messages": [AIMessage(content="Visualization data prepared")]
     }
 
 
+def analysis_options() -> dict:
+    """
+    Settings that change the result of the analysis graph, for the result cache key.
+
+    Constants in the code are covered by the cache's code version; these
+    are the ones read from the environment.
+
+    Returns:
+        Dictionary of setting names and values
+    """
+    return {
+        "lazy_charts": LAZY_CHARTS,
+        "chart_binary": CHART_BINARY,
+        "histogram_max_bins": HISTOGRAM_MAX_BINS,
+        "scatter_max_points": SCATTER_MAX_POINTS,
+        "scatter_density_points": SCATTER_DENSITY_POINTS,
+        "correlation_missing": CORRELATION_MISSING,
+        "correlation_matrix_columns": CORRELATION_MATRIX_COLUMNS,
+        "correlation_max_pairs": CORRELATION_MAX_PAIRS,
+        "duplicate_mode": DUPLICATE_MODE,
+        "duplicate_bloom_mb": DUPLICATE_BLOOM_MB,
+        "sketch_exact_limit": SKETCH_EXACT_LIMIT,
+        "arrow_csv": ARROW_CSV,
+        "optimize_dtypes": OPTIMIZE_DTYPES
+    }
+
+
 def create_analysis_graph():
     workflow = StateGraph(AgentState)
     
     workflow.add_node("analysis", analysis_node)
     workflow.add_node("narrative", narrative_generation_node)
+    workflow.add_node("chart", chart_node)
     workflow.add_node("visualizations", visualization_prep_node)
     
     workflow.set_entry_point("analysis")
-    workflow.add_edge("analysis", "narrative")
+    workflow.add_conditional_edges("analysis", route_after_analysis, ["narrative", "chart"])
     workflow.add_edge("narrative", "visualizations")
+    workflow.add_edge("chart", "visualizations")
     workflow.add_edge("visualizations", END)
     
     app = workflow.compile()
@@ -0,0 +1,279 @@
+import codecs
+import csv
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Any, Dict
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+OPTIMIZE_DTYPES = os.getenv("VIZBOT_OPTIMIZE_DTYPES", "true").lower() == "true"
+ARROW_CSV = os.getenv("VIZBOT_ARROW_CSV", "true").lower() == "true"
+# The dialect is sniffed from this much of the head of the file.
+SNIFF_BYTES = 64 * 1024
+DELIMITERS = ",;\t|"
+# Text columns with at most this share of distinct values become categories.
+CATEGORY_MAX_RATIO = 0.5
+_DATETIME_PROBE_ROWS = 100
+
+
+def _downcast_numeric(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+
+    values = series.to_numpy()
+    narrow = values.astype("float32")
+    # Only values that survive the round trip keep every statistic identical.
+    if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+        return pd.Series(narrow, index=series.index, name=series.name)
+    return series
+
+
+def _parse_datetimes(series: pd.Series):
+    present = series.dropna()
+    if len(present) == 0:
+        return None
+    try:
+        with warnings.catch_warnings():
+            # pandas warns when it cannot infer one format and would fall
+            # back to parsing each value on its own.
+            warnings.simplefilter("error", UserWarning)
+            if pd.to_datetime(present.head(_DATETIME_PROBE_ROWS), errors="coerce").isna().any():
+                return None
+            parsed = pd.to_datetime(series, errors="coerce")
+    except (UserWarning, ValueError, TypeError, OverflowError):
+        return None
+    if parsed.isna().sum() != series.isna().sum():
+        return None
+    return parsed
+
+
+def _encode_text(series: pd.Series) -> pd.Series:
+    codes, uniques = pd.factorize(series)
+    present = np.count_nonzero(codes >= 0)
+    if present == 0 or len(uniques) > present * CATEGORY_MAX_RATIO:
+        return series
+    # Categories keep first-appearance order so value counts tie-break as before.
+    return pd.Series(pd.Categorical.from_codes(codes, uniques), index=series.index, name=series.name)
+
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink a freshly parsed dataframe without changing its values.
+
+    Integers are downcast to the smallest integer type holding them and
+    floats to float32 when every value converts exactly. Text columns whose
+    values all parse as dates with one inferred format become datetime64;
+    other text columns with few distinct values become categories.
+
+    Args:
+        df: Dataframe as returned by pd.read_csv
+
+    Returns:
+        Dataframe with the same values in narrower dtypes
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            columns[col] = series
+        elif pd.api.types.is_numeric_dtype(series):
+            columns[col] = _downcast_numeric(series)
+        elif series.dtype == object:
+            parsed = _parse_datetimes(series)
+            columns[col] = parsed if parsed is not None else _encode_text(series)
+        else:
+            columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+class ChunkedDtypes:
+    """The dtypes optimize_dtypes would give a whole file, decided chunk by chunk.
+
+    Integers narrow by their range over all chunks, floats to float32 only
+    when every chunk converts exactly, and text to datetime64 only when
+    every chunk holding values parses with one inferred format. Whether
+    text becomes a category depends on its distinct values over the whole
+    file, which the caller counts.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for col in chunk.columns:
+            series = chunk[col]
+            state = self._columns.setdefault(col, {"dtypes": set(), "float32": True, "datetime": None})
+            state["dtypes"].add(series.dtype)
+            if pd.api.types.is_bool_dtype(series):
+                continue
+            if pd.api.types.is_integer_dtype(series) and len(series):
+                state["min"] = min(state.get("min", series.min()), series.min())
+                state["max"] = max(state.get("max", series.max()), series.max())
+            if pd.api.types.is_numeric_dtype(series):
+                if state["float32"]:
+                    state["float32"] = _downcast_numeric(series.astype("float64")).dtype == np.float32
+            elif series.dtype == object and state["datetime"] is not False and series.notna().any():
+                parsed = _parse_datetimes(series)
+                state["datetime"] = False if parsed is None else state["datetime"] or parsed.dtype
+
+    def result(self, distinct: Dict[str, int], present: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Narrowed dtype of every column seen.
+
+        Args:
+            distinct: Distinct values of each text column
+            present: Non-null values of each text column
+
+        Returns:
+            Dictionary of column names and dtypes
+        """
+        dtypes = {}
+        for col, state in self._columns.items():
+            dtype = np.result_type(*state["dtypes"]) if len(state["dtypes"]) > 1 else next(iter(state["dtypes"]))
+            if pd.api.types.is_bool_dtype(dtype):
+                dtypes[col] = dtype
+            elif pd.api.types.is_integer_dtype(dtype):
+                bounds = pd.Series([state.get("min", 0), state.get("max", 0)], dtype=dtype)
+                dtypes[col] = pd.to_numeric(bounds, downcast="integer").dtype
+            elif pd.api.types.is_float_dtype(dtype):
+                dtypes[col] = np.dtype("float32") if state["float32"] else dtype
+            elif dtype == object and state["datetime"]:
+                dtypes[col] = state["datetime"]
+            elif dtype == object and 0 < present.get(col, 0) and distinct.get(col, 0) <= present[col] * CATEGORY_MAX_RATIO:
+                dtypes[col] = pd.CategoricalDtype()
+            else:
+                dtypes[col] = dtype
+        return dtypes
+
+
+def _detect_encoding(head: bytes) -> str:
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    for encoding in ("utf-8", "cp1252"):
+        try:
+            # Incremental, so a character cut at the end of the block is not an error.
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    # Every byte sequence is valid latin-1.
+    return "latin-1"
+
+
+def _is_fractional(value: str) -> bool:
+    try:
+        int(value)
+        return False
+    except ValueError:
+        pass
+    try:
+        return np.isfinite(float(value))
+    except ValueError:
+        return False
+
+
+def sniff_csv(path: str) -> Dict[str, Any]:
+    """
+    Sniff the encoding, delimiter, quote character and header of a CSV file from its first block.
+
+    The encoding is taken from a byte order mark, else the first of UTF-8
+    and cp1252 that decodes the block, else latin-1. The header row is only
+    considered missing when csv.Sniffer finds none and the first row holds
+    a fractional number; integers such as years do make column names.
+
+    Args:
+        path: Path of the CSV file
+
+    Returns:
+        Dialect with "encoding", "delimiter", "quotechar", "header" and,
+        for files without a header row, generated "columns" names
+    """
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    encoding = _detect_encoding(head)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(head, final=False)
+    if len(head) == SNIFF_BYTES and "\n" in text:
+        # Only whole lines; the last one may be cut off.
+        text = text[:text.rfind("\n") + 1]
+
+    dialect = {"encoding": encoding, "delimiter": ",", "quotechar": '"', "header": True, "columns": None}
+    if not text.strip():
+        return dialect
+
+    sniffer = csv.Sniffer()
+    try:
+        sniffed = sniffer.sniff(text, delimiters=DELIMITERS)
+        dialect["delimiter"] = sniffed.delimiter
+        dialect["quotechar"] = sniffed.quotechar or '"'
+    except csv.Error:
+        pass
+
+    rows = csv.reader(text.splitlines(), delimiter=dialect["delimiter"], quotechar=dialect["quotechar"])
+    first = next(rows, [])
+    try:
+        has_header = sniffer.has_header(text)
+    except csv.Error:
+        has_header = True
+    if not has_header and any(_is_fractional(value) for value in first):
+        dialect["header"] = False
+        dialect["columns"] = [f"column_{i + 1}" for i in range(len(first))]
+    return dialect
+
+
+def pandas_options(dialect: Dict[str, Any]) -> Dict[str, Any]:
+    """pd.read_csv keyword arguments for a dialect from sniff_csv."""
+    options = {"sep": dialect["delimiter"], "quotechar": dialect["quotechar"], "encoding": dialect["encoding"]}
+    if not dialect["header"]:
+        options.update(header=None, names=dialect["columns"])
+    return options
+
+
+def _as_nanoseconds(df: pd.DataFrame) -> pd.DataFrame:
+    # Arrow parses timestamps in seconds; the dates optimize_dtypes parses,
+    # and those of chunked profiles, are in nanoseconds.
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col].dtype) and df[col].dt.unit != "ns":
+            try:
+                df[col] = df[col].dt.as_unit("ns")
+            except (OverflowError, pd.errors.OutOfBoundsDatetime):
+                pass
+    return df
+
+
+def read_csv(path: str) -> pd.DataFrame:
+    """
+    Parse a whole CSV file in its sniffed dialect.
+
+    With pyarrow installed and VIZBOT_ARROW_CSV enabled, the file is parsed
+    by Arrow's multithreaded reader, whose numeric columns convert to numpy
+    without copies; otherwise, or when Arrow rejects the file, by pandas'
+    C parser over a memory map. Dtypes are then narrowed unless
+    VIZBOT_OPTIMIZE_DTYPES is false.
+
+    Args:
+        path: Path of the CSV file
+
+    Returns:
+        Parsed dataframe
+    """
+    options = pandas_options(sniff_csv(path))
+    df = None
+    if ARROW_CSV and pyarrow is not None:
+        try:
+            df = _as_nanoseconds(pd.read_csv(path, engine="pyarrow", **options))
+        except pd.errors.EmptyDataError:
+            raise
+        except ValueError:
+            # Arrow rejects some files the C parser reads, such as ragged rows.
+            pass
+    if df is None:
+        df = pd.read_csv(path, memory_map=True, **options)
+    return optimize_dtypes(df) if OPTIMIZE_DTYPES else df
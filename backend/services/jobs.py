@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+import orjson
+from backend.services.responses import encode_json
+
+
+JOB_STORE = os.getenv("VIZBOT_JOB_STORE", "memory")
+JOB_DB_PATH = os.getenv("VIZBOT_JOB_DB", "vizbot_jobs.db")
+JOB_TTL_SECONDS = int(os.getenv("VIZBOT_JOB_TTL_SECONDS", "3600"))
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class JobStore(ABC):
+    """Persistence for job records. Implementations must be thread-safe,
+    because graph nodes report progress from executor threads."""
+
+    @abstractmethod
+    def create(self, job_id: str, kind: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> None:
+        ...
+
+    @abstractmethod
+    def add_progress(self, job_id: str, node: str) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def purge(self, older_than: float) -> None:
+        ...
+
+
+def _new_job(job_id: str, kind: str) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        "job_id": job_id,
+        "kind": kind,
+        "status": "queued",
+        "progress": [],
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now
+    }
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    def create(self, job_id: str, kind: str) -> Dict[str, Any]:
+        job = _new_job(job_id, kind)
+        with self._lock:
+            self._jobs[job_id] = job
+        return dict(job)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=time.time())
+
+    def add_progress(self, job_id: str, node: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job["progress"].append({"node": node, "completed_at": time.time()})
+                job["updated_at"] = time.time()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "progress": list(job["progress"])}
+
+    def purge(self, older_than: float) -> None:
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in FINISHED_STATUSES and job["updated_at"] < older_than
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore(JobStore):
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def create(self, job_id: str, kind: str) -> Dict[str, Any]:
+        job = _new_job(job_id, kind)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, job["status"], "[]", None, None, job["created_at"], job["updated_at"])
+            )
+            self._conn.commit()
+        return job
+
+    def update(self, job_id: str, **fields) -> None:
+        columns = []
+        values = []
+        for name, value in fields.items():
+            if name == "result":
+                value = encode_json(value)
+            columns.append(f"{name} = ?")
+            values.append(value)
+        columns.append("updated_at = ?")
+        values.extend([time.time(), job_id])
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {', '.join(columns)} WHERE job_id = ?", values)
+            self._conn.commit()
+
+    def add_progress(self, job_id: str, node: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT progress FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            progress = json.loads(row[0])
+            progress.append({"node": node, "completed_at": time.time()})
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE job_id = ?",
+                (json.dumps(progress), time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, kind, status, progress, result, error, created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "progress": json.loads(row[3]),
+            "result": orjson.loads(row[4]) if row[4] is not None else None,
+            "error": row[5],
+            "created_at": row[6],
+            "updated_at": row[7]
+        }
+
+    def purge(self, older_than: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*FINISHED_STATUSES, older_than)
+            )
+            self._conn.commit()
+
+
+def create_job_store() -> JobStore:
+    if JOB_STORE == "sqlite":
+        return SQLiteJobStore(JOB_DB_PATH)
+    if JOB_STORE == "memory":
+        return InMemoryJobStore()
+    raise ValueError(f"Unknown job store '{JOB_STORE}'. Must be 'memory' or 'sqlite'")
+
+
+class JobManager:
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._tasks: set = set()
+
+    def submit(self, kind: str, runner: Callable[[Callable[[str], None]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Queue an analysis and return its job record immediately.
+
+        Args:
+            kind: Job kind reported back to clients (e.g. "csv", "database")
+            runner: Coroutine factory that receives a per-node progress callback
+                and returns the analysis response
+
+        Returns:
+            The newly created job record
+        """
+        self.store.purge(time.time() - JOB_TTL_SECONDS)
+        job_id = uuid.uuid4().hex
+        job = self.store.create(job_id, kind)
+
+        task = asyncio.create_task(self._run(job_id, runner))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job_id: str, runner) -> None:
+        def on_node(node: str) -> None:
+            self.store.add_progress(job_id, node)
+
+        # Off the event loop: a store may write to disk, and a result can be large.
+        await asyncio.to_thread(self.store.update, job_id, status="running")
+        try:
+            result = await runner(on_node)
+            await asyncio.to_thread(self.store.update, job_id, status="completed", result=result)
+        except Exception as e:
+            await asyncio.to_thread(self.store.update, job_id, status="failed", error=str(e))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+
+job_manager = JobManager(create_job_store())
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from backend.services.parallel import map_column_batches, should_run_in_parallel
+from backend.services.profiler import iter_numeric_blocks
+
+
+OUTLIER_METHODS = ("iqr", "mad", "percentile")
+IQR_MULTIPLIER = 1.5
+# Modified z-score cut-off of Iglewicz and Hoaglin.
+MAD_THRESHOLD = 3.5
+TRIM_PERCENTILES = (1.0, 99.0)
+
+
+def _column_quantiles(block: np.ndarray, qs: List[float]) -> np.ndarray:
+    """Exact quantiles of each column over its non-NaN values, like Series.quantile.
+
+    Columns without NaN are selected together with one partition per
+    quantile; the others one at a time over their non-NaN values.
+    """
+    result = np.full((len(qs), block.shape[1]), np.nan)
+    if not len(block):
+        return result
+    nan_mask = np.isnan(block)
+    nan_counts = nan_mask.sum(axis=0)
+
+    dense = np.flatnonzero(nan_counts == 0)
+    if len(dense):
+        dense_block = block if len(dense) == block.shape[1] else np.asfortranarray(block[:, dense])
+        result[:, dense] = np.quantile(dense_block, qs, axis=0)
+        if 0.5 in qs:
+            # pandas' median averages the two middle values.
+            result[qs.index(0.5), dense] = np.median(dense_block, axis=0)
+
+    for col in np.flatnonzero((nan_counts > 0) & (nan_counts < len(block))):
+        values = block[~nan_mask[:, col], col]
+        result[:, col] = np.quantile(values, qs)
+        if 0.5 in qs:
+            result[qs.index(0.5), col] = np.median(values)
+    return result
+
+
+def _bounds(block: np.ndarray, method: str):
+    if method == "iqr":
+        q1, q3 = _column_quantiles(block, [0.25, 0.75])
+        with np.errstate(invalid="ignore"):
+            iqr = q3 - q1
+            return q1 - IQR_MULTIPLIER * iqr, q3 + IQR_MULTIPLIER * iqr
+
+    if method == "mad":
+        median = _column_quantiles(block, [0.5])[0]
+        deviations = np.abs(block - median)
+        mad = _column_quantiles(deviations, [0.5])[0]
+        with np.errstate(invalid="ignore"):
+            # Columns with a MAD of zero fall back to the mean absolute
+            # deviation, scaled to agree with the MAD on normal data.
+            scale = np.where(mad > 0, mad / 0.6745, 1.253314 * np.nanmean(deviations, axis=0))
+        return median - MAD_THRESHOLD * scale, median + MAD_THRESHOLD * scale
+
+    if method == "percentile":
+        lower_q, upper_q = TRIM_PERCENTILES
+        return _column_quantiles(block, [lower_q / 100, upper_q / 100])
+
+    raise ValueError(f"Unsupported outlier method: {method}. Use one of {', '.join(OUTLIER_METHODS)}")
+
+
+def outlier_mask(df: pd.DataFrame, columns: Optional[List[str]] = None, method: str = "iqr") -> pd.DataFrame:
+    """
+    Row-level outlier index: which cells fall outside their column's bounds.
+
+    Args:
+        df: Resident dataframe
+        columns: Numeric columns to check; all numeric columns by default
+        method: Detector, one of OUTLIER_METHODS
+
+    Returns:
+        Boolean dataframe with df's index and the checked columns
+    """
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+
+    masks = []
+    for block_columns, block in iter_numeric_blocks(df, columns):
+        lower, upper = _bounds(block, method)
+        masks.append(pd.DataFrame((block < lower) | (block > upper), index=df.index, columns=block_columns))
+    if not masks:
+        return pd.DataFrame(index=df.index)
+    return pd.concat(masks, axis=1)
+
+
+def _scan_block(block: np.ndarray, method: str, include_rows: bool) -> List[Optional[Dict[str, Any]]]:
+    """Bounds, counts and row positions of each column's outliers; None for clean columns."""
+    lower, upper = _bounds(block, method)
+    low = block < lower
+    high = block > upper
+    counts = low.sum(axis=0) + high.sum(axis=0)
+
+    scans: List[Optional[Dict[str, Any]]] = [None] * block.shape[1]
+    for i in np.flatnonzero(counts):
+        scans[i] = {
+            "count": counts[i],
+            "lower_bound": lower[i],
+            "upper_bound": upper[i],
+            "low": np.flatnonzero(low[:, i])[:5],
+            "high": np.flatnonzero(high[:, i])[:5],
+            "rows": np.flatnonzero(low[:, i] | high[:, i]) if include_rows else None
+        }
+    return scans
+
+
+def find_outliers(df: pd.DataFrame, method: str = "iqr", include_rows: bool = False) -> Dict[str, Any]:
+    """
+    Detect outliers in all numeric columns, one vectorized pass per column block.
+
+    Frames of at least VIZBOT_PARALLEL_PROFILE_CELLS cells are scanned in
+    column batches across the profiling process pool.
+
+    Args:
+        df: Resident dataframe
+        method: "iqr" (Tukey fences at 1.5 IQR), "mad" (modified z-score
+            above 3.5) or "percentile" (outside the 1st-99th percentile)
+        include_rows: Also list the index labels of each column's outliers
+
+    Returns:
+        Per-column outlier counts, bounds and sample values, for columns
+        with at least one outlier
+    """
+    columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Unsupported outlier method: {method}. Use one of {', '.join(OUTLIER_METHODS)}")
+
+    if should_run_in_parallel(len(df), len(columns)):
+        scans = map_column_batches(df, columns, _scan_block, method, include_rows)
+    else:
+        scans = [
+            scan
+            for _, block in iter_numeric_blocks(df, columns)
+            for scan in _scan_block(block, method, include_rows)
+        ]
+
+    outliers = {}
+    for col, scan in zip(columns, scans):
+        if scan is None:
+            continue
+        # Sample values come from the column itself so integers stay integers.
+        values = df[col]
+        outliers[col] = {
+            "count": int(scan["count"]),
+            "percentage": float(round(scan["count"] / len(df) * 100, 2)),
+            "lower_bound": float(scan["lower_bound"]),
+            "upper_bound": float(scan["upper_bound"]),
+            "outlier_values": values.iloc[scan["low"]].tolist() + values.iloc[scan["high"]].tolist()
+        }
+        if include_rows:
+            outliers[col]["rows"] = df.index[scan["rows"]].tolist()
+
+    return outliers
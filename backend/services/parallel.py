@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List, Tuple
+from backend.services.executor import PROFILE_WORKERS, get_process_pool, reset_process_pool
+
+
+PARALLEL_PROFILE_CELLS = int(os.getenv("VIZBOT_PARALLEL_PROFILE_CELLS", "50000000"))
+# Columns a worker reduces at a time, as in the serial column blocks.
+_WORKER_BLOCK_COLUMNS = 64
+# Batches per worker, so columns of uneven cost still spread evenly.
+_BATCHES_PER_WORKER = 4
+
+
+def should_run_in_parallel(rows: int, columns: int) -> bool:
+    return PROFILE_WORKERS > 1 and columns > 1 and rows * columns >= PARALLEL_PROFILE_CELLS
+
+
+def _run_on_columns(name: str, shape: Tuple[int, int], start: int, stop: int, func: Callable, args: tuple) -> List[Any]:
+    shm = SharedMemory(name=name)
+    try:
+        matrix = np.ndarray(shape, dtype="float64", buffer=shm.buf, order="F")
+        results = []
+        for block_start in range(start, stop, _WORKER_BLOCK_COLUMNS):
+            results.extend(func(matrix[:, block_start:min(block_start + _WORKER_BLOCK_COLUMNS, stop)], *args))
+        del matrix
+        return results
+    finally:
+        shm.close()
+
+
+def map_column_batches(df: pd.DataFrame, columns: List[str], func: Callable, *args) -> List[Any]:
+    """
+    Apply a per-column block function to numeric columns across the process pool.
+
+    The columns are written once into a column-major float64 matrix in
+    shared memory. Workers map it and pass column slices to func without
+    copying, and only the small per-column results travel back. A column
+    slice of the matrix is the same contiguous run as a serial block, so
+    results are identical to the serial path.
+
+    Args:
+        df: Resident dataframe
+        columns: Numeric columns to process
+        func: Picklable function of (block, *args) returning one result per column
+        *args: Extra arguments for func
+
+    Returns:
+        Results of func, one per column in column order
+    """
+    rows, width = len(df), len(columns)
+    shm = SharedMemory(create=True, size=max(rows * width * 8, 1))
+    try:
+        matrix = np.ndarray((rows, width), dtype="float64", buffer=shm.buf, order="F")
+        for start in range(0, width, _WORKER_BLOCK_COLUMNS):
+            block_columns = columns[start:start + _WORKER_BLOCK_COLUMNS]
+            matrix[:, start:start + len(block_columns)] = df[block_columns].to_numpy(dtype="float64", na_value=np.nan)
+        del matrix
+
+        batch = -(-width // (PROFILE_WORKERS * _BATCHES_PER_WORKER))
+        try:
+            pool = get_process_pool()
+            futures = [
+                pool.submit(_run_on_columns, shm.name, (rows, width), start, min(start + batch, width), func, args)
+                for start in range(0, width, batch)
+            ]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            return results
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory); the next call starts a
+            # fresh pool and this one finishes in process.
+            reset_process_pool()
+            return _run_on_columns(shm.name, (rows, width), 0, width, func, args)
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,515 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from backend.services.duplicates import DUPLICATE_MODE, DuplicateCounter
+from backend.services.ingest import OPTIMIZE_DTYPES, ChunkedDtypes, pandas_options, sniff_csv
+from backend.services.parallel import map_column_batches, should_run_in_parallel
+from backend.services.sketches import SKETCH_EXACT_LIMIT, HyperLogLog, KLLSketch, SpaceSaving, counts_mode
+
+
+CHUNKED_PROFILE_MB = float(os.getenv("VIZBOT_CHUNKED_PROFILE_MB", "64"))
+PROFILE_CHUNK_ROWS = int(os.getenv("VIZBOT_PROFILE_CHUNK_ROWS", "100000"))
+PROFILE_SAMPLE_ROWS = int(os.getenv("VIZBOT_PROFILE_SAMPLE_ROWS", "100000"))
+# Numeric columns are profiled as float64 blocks of this many columns.
+PROFILE_BLOCK_COLUMNS = 64
+
+
+def should_profile_in_chunks(size_bytes: int) -> bool:
+    return size_bytes >= CHUNKED_PROFILE_MB * 1024**2
+
+
+def profile_options() -> Dict[str, Any]:
+    """Settings that change the result of a chunked profile."""
+    return {
+        "profile": "chunked",
+        "sample_rows": PROFILE_SAMPLE_ROWS,
+        "sketch_exact_limit": SKETCH_EXACT_LIMIT,
+        "duplicate_mode": DUPLICATE_MODE,
+        "optimize_dtypes": OPTIMIZE_DTYPES
+    }
+
+
+def _numeric_stats(null_count: int, infinite_count: int, count: int = 0, mean=None, std=None, minimum=None, maximum=None, quantiles=(None, None, None)) -> Dict[str, Any]:
+    q25, median, q75 = quantiles
+    return {
+        "mean": mean,
+        "median": median,
+        "std": std,
+        "min": minimum,
+        "max": maximum,
+        "q25": q25,
+        "q75": q75,
+        "count": count,
+        "null_count": null_count,
+        "infinite_count": infinite_count
+    }
+
+
+def _block_quantiles(block: np.ndarray) -> np.ndarray:
+    # Linear interpolation like Series.quantile; the median averages the
+    # two middle values like Series.median.
+    q25, q75 = np.quantile(block, [0.25, 0.75], axis=0)
+    return np.array([q25, np.median(block, axis=0), q75])
+
+
+def _profile_numeric_block(block: np.ndarray) -> List[Dict[str, Any]]:
+    rows = len(block)
+    nulls = np.isnan(block)
+    finite = np.isfinite(block)
+    null_counts = nulls.sum(axis=0)
+    finite_counts = finite.sum(axis=0)
+    infinite_counts = rows - null_counts - finite_counts
+
+    # Columns without NaN or infinities are reduced together; the others are
+    # compacted first, so every sum adds exactly the values pandas would.
+    dense = np.flatnonzero((finite_counts == rows) & (rows > 0))
+    columns_stats: List[Optional[Dict[str, Any]]] = [None] * block.shape[1]
+    if len(dense):
+        dense_block = block if len(dense) == block.shape[1] else np.asfortranarray(block[:, dense])
+        means = dense_block.sum(axis=0) / rows
+        stds = np.sqrt(((means - dense_block) ** 2).sum(axis=0) / (rows - 1)) if rows > 1 else np.zeros(len(dense))
+        minimums = dense_block.min(axis=0)
+        maximums = dense_block.max(axis=0)
+        quantiles = _block_quantiles(dense_block)
+        for i, col in enumerate(dense):
+            columns_stats[col] = _numeric_stats(
+                0, 0, rows, float(means[i]), float(stds[i]), float(minimums[i]), float(maximums[i]),
+                tuple(float(q) for q in quantiles[:, i])
+            )
+
+    for col in range(block.shape[1]):
+        if columns_stats[col] is not None:
+            continue
+        null_count, infinite_count = int(null_counts[col]), int(infinite_counts[col])
+        values = block[finite[:, col], col]
+        if len(values) == 0:
+            columns_stats[col] = _numeric_stats(null_count, infinite_count)
+            continue
+        mean = values.sum() / len(values)
+        std = float(np.sqrt(((mean - values) ** 2).sum() / (len(values) - 1))) if len(values) > 1 else 0.0
+        columns_stats[col] = _numeric_stats(
+            null_count, infinite_count, len(values), float(mean), std, float(values.min()), float(values.max()),
+            tuple(float(q) for q in _block_quantiles(values[:, None])[:, 0])
+        )
+    return columns_stats
+
+
+def iter_numeric_blocks(df: pd.DataFrame, columns: List[str]):
+    """
+    Yield numeric columns as float64 blocks of PROFILE_BLOCK_COLUMNS columns.
+
+    Blocks are column-major, so each column reduces as one contiguous run
+    with numpy's pairwise summation, exactly like a Series.
+
+    Yields:
+        (block_columns, block) tuples; missing values are NaN
+    """
+    for start in range(0, len(columns), PROFILE_BLOCK_COLUMNS):
+        block_columns = columns[start:start + PROFILE_BLOCK_COLUMNS]
+        yield block_columns, np.asfortranarray(df[block_columns].to_numpy(dtype="float64", na_value=np.nan))
+
+
+def profile_numeric_columns(df: pd.DataFrame, columns: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Profile numeric columns in one vectorized pass per block of columns.
+
+    Frames of at least VIZBOT_PARALLEL_PROFILE_CELLS cells are split into
+    column batches across the profiling process pool.
+
+    Args:
+        df: Resident dataframe
+        columns: Numeric columns to profile
+
+    Returns:
+        Per-column statistics in the schema of analyze_basic_stats
+    """
+    if should_run_in_parallel(len(df), len(columns)):
+        return dict(zip(columns, map_column_batches(df, columns, _profile_numeric_block)))
+
+    stats = {}
+    for block_columns, block in iter_numeric_blocks(df, columns):
+        stats.update(zip(block_columns, _profile_numeric_block(block)))
+    return stats
+
+
+def profile_categorical_columns(df: pd.DataFrame, columns: List[str], null_counts: pd.Series) -> Dict[str, Dict[str, Any]]:
+    """
+    Profile categorical columns with one value_counts pass per column.
+
+    Top values, mode and the distinct count all derive from the same exact
+    counts; the sketches of chunked profiles are only needed where partial
+    counts are merged.
+
+    Args:
+        df: Resident dataframe
+        columns: Categorical columns to profile
+        null_counts: Missing values per column
+
+    Returns:
+        Per-column statistics in the schema of analyze_basic_stats
+    """
+    stats = {}
+    for col in columns:
+        null_count = int(null_counts[col])
+        total_count = len(df) - null_count
+        if total_count == 0:
+            stats[col] = {
+                "unique_values": 0,
+                "mode": None,
+                "top_values": {},
+                "total_count": 0,
+                "null_count": null_count
+            }
+            continue
+
+        counts = df[col].value_counts(sort=False)
+        unique_values = int(np.count_nonzero(counts))
+        mode_value = counts_mode(counts)
+        # The same sort as value_counts, so ties break the same way.
+        top_values = counts.sort_values(ascending=False).head(10)
+        stats[col] = {
+            "unique_values": unique_values,
+            "mode": str(mode_value) if mode_value is not None else None,
+            "top_values": {str(k): int(v) for k, v in top_values.items()},
+            "total_count": total_count,
+            "null_count": null_count
+        }
+    return stats
+
+
+def _column_kind(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype):
+        return "other"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numerical"
+    if pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return "categorical"
+    return "other"
+
+
+class _NumericAccumulator:
+    """Running count, mean, variance (Chan et al.), min, max and quantile sketch of one column."""
+
+    def __init__(self):
+        self.count = 0
+        self.null_count = 0
+        self.infinite_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.quantiles = KLLSketch()
+        # detect_outliers takes its IQR bounds over infinite values too; the
+        # separate sketch is only started once the column has any.
+        self.bounds_quantiles: Optional[KLLSketch] = None
+
+    def update(self, series: pd.Series) -> None:
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        nulls = np.isnan(values)
+        finite = values[np.isfinite(values)]
+        self.null_count += int(nulls.sum())
+        self.infinite_count += int(len(values) - nulls.sum() - len(finite))
+        if self.bounds_quantiles is None and self.infinite_count:
+            self.bounds_quantiles = KLLSketch().merge(self.quantiles)
+        if self.bounds_quantiles is not None:
+            self.bounds_quantiles.update(values)
+        if len(finite) == 0:
+            return
+
+        chunk_mean = finite.mean()
+        chunk_m2 = float(((finite - chunk_mean) ** 2).sum())
+        total = self.count + len(finite)
+        delta = chunk_mean - self.mean
+        self.mean += delta * len(finite) / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * len(finite) / total
+        self.count = total
+        self.min = min(self.min, float(finite.min()))
+        self.max = max(self.max, float(finite.max()))
+        self.quantiles.merge(KLLSketch().update(finite))
+
+    def iqr_bounds(self) -> Optional[Tuple[float, float]]:
+        q1, q3 = (self.bounds_quantiles or self.quantiles).quantiles([0.25, 0.75])
+        if q1 is None or not np.isfinite(q3 - q1):
+            return None
+        iqr = q3 - q1
+        return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    def result(self) -> Dict[str, Any]:
+        if self.count == 0:
+            return {
+                "mean": None,
+                "median": None,
+                "std": None,
+                "min": None,
+                "max": None,
+                "q25": None,
+                "q75": None,
+                "count": 0,
+                "null_count": self.null_count,
+                "infinite_count": self.infinite_count
+            }
+
+        q25, median, q75 = self.quantiles.quantiles([0.25, 0.5, 0.75])
+        return {
+            "mean": float(self.mean),
+            "median": median,
+            "std": float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0,
+            "min": float(self.min),
+            "max": float(self.max),
+            "q25": q25,
+            "q75": q75,
+            "count": self.count,
+            "null_count": self.null_count,
+            "infinite_count": self.infinite_count
+        }
+
+
+class _CategoricalAccumulator:
+    """Top values and distinct count of one column, merged from per-chunk sketches."""
+
+    def __init__(self):
+        self.total_count = 0
+        self.null_count = 0
+        self.top_values = SpaceSaving()
+        self.distinct = HyperLogLog()
+
+    def update(self, series: pd.Series) -> None:
+        clean_series = series.dropna()
+        self.null_count += len(series) - len(clean_series)
+        self.total_count += len(clean_series)
+        self.top_values.update(clean_series)
+        self.distinct.merge(HyperLogLog().update(clean_series))
+
+    def result(self) -> Dict[str, Any]:
+        if self.total_count == 0:
+            return {
+                "unique_values": 0,
+                "mode": None,
+                "top_values": {},
+                "total_count": 0,
+                "null_count": self.null_count
+            }
+
+        return {
+            "unique_values": self.distinct.count(),
+            "mode": str(self.top_values.mode()),
+            "top_values": {str(k): int(v) for k, v in self.top_values.top(10).items()},
+            "total_count": self.total_count,
+            "null_count": self.null_count
+        }
+
+
+class RowSampler:
+    """Uniform sample of at most size rows, kept in file order."""
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.sample: Optional[pd.DataFrame] = None
+        self._keys = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        keys = self._rng.random(len(chunk))
+        if self.sample is not None:
+            chunk = pd.concat([self.sample, chunk])
+            keys = np.concatenate([self._keys, keys])
+
+        if len(chunk) > self.size:
+            keep = np.sort(np.argpartition(keys, self.size)[:self.size])
+            chunk = chunk.iloc[keep]
+            keys = keys[keep]
+        self.sample = chunk
+        self._keys = keys
+
+
+def _column_memory(dtype, rows: int, raw_bytes: int, distinct: int, present: int) -> int:
+    # Bytes of a column in its narrowed dtype; a category column holds its
+    # codes and one copy of each distinct value.
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = next(np.dtype(code) for code in ("int8", "int16", "int32", "int64") if distinct < np.iinfo(code).max)
+        return rows * codes.itemsize + raw_bytes * distinct // max(present, 1)
+    if dtype == object:
+        return raw_bytes
+    return rows * dtype.itemsize
+
+
+def _read_chunks(path: str, chunk_rows: int, **kwargs):
+    return pd.read_csv(path, chunksize=chunk_rows, memory_map=True, **kwargs)
+
+
+def _profile_pass(path: str, chunk_rows: int, sample_rows: int, forced_dtypes: Dict[str, str], options: Dict[str, Any]):
+    columns = None
+    chunk_dtypes: Dict[str, set] = {}
+    numeric: Dict[str, _NumericAccumulator] = {}
+    categorical: Dict[str, _CategoricalAccumulator] = {}
+    duplicates = DuplicateCounter()
+    sampler = RowSampler(sample_rows)
+    narrowing = ChunkedDtypes()
+    null_counts = None
+    memory_bytes = None
+    rows = 0
+
+    for chunk in _read_chunks(path, chunk_rows, dtype=forced_dtypes or None, **options):
+        if columns is None:
+            columns = list(chunk.columns)
+        rows += len(chunk)
+        chunk_memory = chunk.memory_usage(deep=True, index=False)
+        memory_bytes = chunk_memory if memory_bytes is None else memory_bytes + chunk_memory
+        chunk_nulls = chunk.isna().sum()
+        null_counts = chunk_nulls if null_counts is None else null_counts + chunk_nulls
+        if OPTIMIZE_DTYPES:
+            narrowing.update(chunk)
+
+        for col in columns:
+            chunk_dtypes.setdefault(col, set()).add(chunk[col].dtype)
+            kind = _column_kind(chunk[col].dtype)
+            if kind == "numerical":
+                numeric.setdefault(col, _NumericAccumulator()).update(chunk[col])
+            elif kind == "categorical":
+                categorical.setdefault(col, _CategoricalAccumulator()).update(chunk[col])
+
+        duplicates.update(chunk)
+        sampler.update(chunk)
+
+    dtypes = {}
+    conflicts = []
+    for col in columns or []:
+        kinds = {_column_kind(dtype) for dtype in chunk_dtypes[col]}
+        if len(kinds) > 1:
+            conflicts.append(col)
+        elif len(chunk_dtypes[col]) > 1:
+            dtypes[col] = np.result_type(*chunk_dtypes[col])
+        else:
+            dtypes[col] = next(iter(chunk_dtypes[col]))
+
+    return {
+        "columns": columns or [],
+        "dtypes": dtypes,
+        "conflicts": conflicts,
+        "rows": rows,
+        "null_counts": {col: int(null_counts[col]) for col in columns or []},
+        "memory_bytes": {col: int(memory_bytes[col]) for col in columns or []},
+        "narrowing": narrowing,
+        "numeric": numeric,
+        "categorical": categorical,
+        "duplicates": duplicates.duplicates,
+        "sample": sampler.sample
+    }
+
+
+def _outlier_pass(path: str, chunk_rows: int, dtypes: Dict[str, Any], bounds: Dict[str, Tuple[float, float]], rows: int,
+                  options: Dict[str, Any]) -> Dict[str, Any]:
+    counts = {col: 0 for col in bounds}
+    low_values = {col: [] for col in bounds}
+    high_values = {col: [] for col in bounds}
+
+    if bounds:
+        usecols = list(bounds)
+        for chunk in _read_chunks(path, chunk_rows, usecols=usecols, dtype={col: dtypes[col] for col in usecols}, **options):
+            for col, (lower_bound, upper_bound) in bounds.items():
+                values = chunk[col]
+                low = values[values < lower_bound]
+                high = values[values > upper_bound]
+                counts[col] += len(low) + len(high)
+                low_values[col].extend(low.tolist()[:5 - len(low_values[col])])
+                high_values[col].extend(high.tolist()[:5 - len(high_values[col])])
+
+    outliers = {}
+    for col, (lower_bound, upper_bound) in bounds.items():
+        if counts[col] > 0:
+            outliers[col] = {
+                "count": counts[col],
+                "percentage": float(round(counts[col] / rows * 100, 2)),
+                "lower_bound": float(lower_bound),
+                "upper_bound": float(upper_bound),
+                "outlier_values": low_values[col] + high_values[col]
+            }
+    return outliers
+
+
+def profile_csv_in_chunks(
+    path: str,
+    chunk_rows: int = PROFILE_CHUNK_ROWS,
+    sample_rows: int = PROFILE_SAMPLE_ROWS
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Profile a CSV file too large to load, reading it chunk by chunk.
+
+    The first pass keeps running per-column accumulators and mergeable
+    sketches, the duplicate row hashes and a uniform row sample for charts;
+    the second pass counts outliers against IQR bounds from the quantile
+    sketches. Memory stays bounded by the chunk, the sample and the sketches,
+    except for 8 bytes per distinct row for an exact duplicate count; with
+    VIZBOT_DUPLICATE_MODE=approximate a fixed-size Bloom filter is used. Sketched
+    statistics are exact up to VIZBOT_SKETCH_EXACT_LIMIT values per column.
+    Dtypes, and the date columns among them, are those read_csv reports for
+    the whole file, narrowed unless VIZBOT_OPTIMIZE_DTYPES is false; memory
+    usage is estimated for them.
+
+    Args:
+        path: Path of the CSV file
+        chunk_rows: Rows parsed at a time
+        sample_rows: Size of the row sample
+
+    Returns:
+        Tuple of the row sample and a profile with "basic_stats" and
+        "outliers" in the schema of analyze_basic_stats and detect_outliers
+    """
+    options = pandas_options(sniff_csv(path))
+    scan = _profile_pass(path, chunk_rows, sample_rows, {}, options)
+    if scan["conflicts"]:
+        # Columns mixing numbers and text parse as text when read whole.
+        scan = _profile_pass(path, chunk_rows, sample_rows, {col: "object" for col in scan["conflicts"]}, options)
+
+    columns = scan["columns"]
+    rows = scan["rows"]
+    sample = scan["sample"]
+    if sample is None:
+        sample = pd.DataFrame(columns=columns)
+    sample = sample.reset_index(drop=True)
+
+    distinct = {col: accumulator.distinct.count() for col, accumulator in scan["categorical"].items()}
+    present = {col: accumulator.total_count for col, accumulator in scan["categorical"].items()}
+    # The dtypes the resident path reports after optimize_dtypes, so dates
+    # are classified alike whatever the size of the file.
+    dtypes = scan["narrowing"].result(distinct, present) if OPTIMIZE_DTYPES else scan["dtypes"]
+    datetime_cols = [col for col in columns if pd.api.types.is_datetime64_dtype(dtypes.get(col))]
+
+    numerical_cols = [col for col in columns if col in scan["numeric"]]
+    categorical_cols = [col for col in columns if col in scan["categorical"] and col not in datetime_cols]
+
+    null_counts = scan["null_counts"]
+    memory_bytes = sum(
+        _column_memory(dtypes.get(col, np.dtype(object)), rows, scan["memory_bytes"][col], distinct.get(col, 0),
+                       present.get(col, 0))
+        for col in columns
+    )
+
+    numerical_stats = {col: scan["numeric"][col].result() for col in numerical_cols}
+    bounds = {}
+    for col in numerical_cols:
+        col_bounds = scan["numeric"][col].iqr_bounds()
+        if col_bounds is not None:
+            bounds[col] = col_bounds
+
+    basic_stats = {
+        "shape": {"rows": rows, "columns": len(columns)},
+        "columns": columns,
+        "dtypes": {col: str(dtypes.get(col, "object")) for col in columns},
+        "missing_values": null_counts,
+        "missing_percentage": {col: float(round(null_counts[col] / rows * 100, 2)) if rows else 0.0 for col in columns},
+        "duplicates": scan["duplicates"],
+        "memory_usage": float(round(memory_bytes / 1024**2, 2)),
+        "numerical_columns": numerical_cols,
+        "categorical_columns": categorical_cols,
+        "datetime_columns": datetime_cols,
+        "numerical_stats": numerical_stats,
+        "categorical_stats": {col: scan["categorical"][col].result() for col in categorical_cols}
+    }
+
+    profile = {
+        "basic_stats": basic_stats,
+        "outliers": _outlier_pass(path, chunk_rows, scan["dtypes"], bounds, rows, options) if rows else {}
+    }
+    return sample, profile
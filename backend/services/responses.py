@@ -0,0 +1,189 @@
+import os
+import zlib
+from itertools import chain
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+import numpy as np
+import orjson
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESS_MIN_BYTES = int(os.getenv("VIZBOT_COMPRESS_MIN_BYTES", "1024"))
+STREAM_RESPONSE_MB = float(os.getenv("VIZBOT_STREAM_RESPONSE_MB", "4"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Streamed bodies are serialized one value at a time down to this depth,
+# e.g. response -> analysis_results -> visualizations -> univariate -> chart.
+STREAM_DEPTH = 4
+STREAM_CHUNK_BYTES = 64 * 1024
+
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Serialize to JSON with orjson.
+
+    Numpy arrays and scalars are written directly, NaN and infinities as
+    null, and any other unknown object as its str().
+
+    Args:
+        content: JSON-like structure
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    return orjson.dumps(content, default=_default, option=JSON_OPTIONS)
+
+
+class FastJSONResponse(Response):
+    """JSON response serialized with encode_json; the application's default response class."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def iter_json(content: Any, depth: int = STREAM_DEPTH) -> Iterator[bytes]:
+    """
+    Serialize to JSON piece by piece; the pieces concatenate to one document.
+
+    Dictionaries and lists are opened up to depth levels deep, so no more
+    than one of their values (a chart, say) is held serialized at a time.
+
+    Args:
+        content: JSON-like structure
+        depth: Levels of nesting to open up
+
+    Yields:
+        JSON fragments
+    """
+    if depth > 0 and isinstance(content, dict) and content:
+        opening = b"{"
+        for key, value in content.items():
+            yield opening + encode_json(str(key)) + b":"
+            yield from iter_json(value, depth - 1)
+            opening = b","
+        yield b"}"
+    elif depth > 0 and isinstance(content, list) and content:
+        opening = b"["
+        for value in content:
+            yield opening
+            yield from iter_json(value, depth - 1)
+            opening = b","
+        yield b"]"
+    else:
+        yield encode_json(content)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the content coding of a response from the request's Accept-Encoding.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+
+    Returns:
+        "br" when brotli is installed and accepted, otherwise "gzip" when
+        accepted, otherwise None
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.partition(";")
+        quality = 1.0
+        parameters = parameters.strip().replace(" ", "")
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def _compressor(encoding: Optional[str]) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+    return bytes, bytes
+
+
+def _chunks(fragments: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    compress, finish = _compressor(encoding)
+    buffer, size = [], 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= STREAM_CHUNK_BYTES:
+            chunk = compress(b"".join(buffer))
+            buffer, size = [], 0
+            if chunk:
+                yield chunk
+    yield compress(b"".join(buffer)) + finish()
+
+
+def json_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """
+    Serialize a route result into a JSON response, compressed when the client allows.
+
+    Returned directly from a route, the response skips FastAPI's
+    jsonable_encoder pass over the result. Bodies of VIZBOT_COMPRESS_MIN_BYTES
+    or more are brotli or gzip compressed, as negotiated from Accept-Encoding.
+    Bodies up to VIZBOT_STREAM_RESPONSE_MB are sent whole; larger ones are
+    streamed in chunks as they are serialized and compressed, so the whole
+    body is never held in memory.
+
+    Args:
+        request: The request being answered
+        content: JSON-like route result
+        status_code: HTTP status of the response
+
+    Returns:
+        A Response, or a StreamingResponse for large bodies
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+
+    fragments = iter_json(content)
+    head, size = [], 0
+    for fragment in fragments:
+        head.append(fragment)
+        size += len(fragment)
+        if size > STREAM_RESPONSE_MB * 1024**2:
+            break
+    else:
+        body = b"".join(head)
+        if encoding and len(body) >= COMPRESS_MIN_BYTES:
+            compress, finish = _compressor(encoding)
+            body = compress(body) + finish()
+            headers["Content-Encoding"] = encoding
+        return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        _chunks(chain(head, fragments), encoding),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
@@ -0,0 +1,374 @@
+import io
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from backend.services.ingest import pandas_options, sniff_csv
+from backend.services.profiler import PROFILE_CHUNK_ROWS, RowSampler
+
+
+SAMPLE_TARGET_ERROR = float(os.getenv("VIZBOT_SAMPLE_TARGET_ERROR", "0.01"))
+SAMPLE_TIME_BUDGET = float(os.getenv("VIZBOT_SAMPLE_TIME_BUDGET", "10"))
+SAMPLE_CONFIDENCE = 0.95
+# Two-sided normal quantile for SAMPLE_CONFIDENCE.
+Z_SCORE = 1.959963984540054
+SAMPLE_BLOCK_BYTES = 64 * 1024
+SAMPLE_MAX_STRATA = 100
+MIN_STRATUM_ROWS = 30
+_PROBE_BYTES = 1024 * 1024
+# Seek and parser start-up cost of one random block, in seconds.
+_BLOCK_OVERHEAD = 0.002
+
+
+def rows_for_error(target_error: float) -> int:
+    """Simple random sample size whose 95% interval for a proportion has half-width target_error."""
+    return math.ceil(Z_SCORE ** 2 * 0.25 / target_error ** 2)
+
+
+class _Design:
+    """A weighted sample: rows grouped into primary sampling units within strata."""
+
+    def __init__(self, weights: np.ndarray, psu: np.ndarray, psu_strata: np.ndarray, fpc: np.ndarray):
+        self.weights = weights
+        self.psu = psu
+        self.psu_strata = psu_strata
+        self.fpc = fpc
+
+    @property
+    def population(self) -> float:
+        return float(self.weights.sum())
+
+    def ratio(self, values: np.ndarray, domain: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+        """Weighted mean of values over the domain rows, and its standard error.
+
+        The variance linearizes the ratio and sums squared deviations of
+        PSU totals within each stratum (with-replacement approximation,
+        scaled by the finite population correction).
+        """
+        domain_weights = self.weights * domain
+        total = domain_weights.sum()
+        if total == 0:
+            return None, None
+        values = np.where(domain, values, 0.0)
+        estimate = float((domain_weights * values).sum() / total)
+
+        scores = domain_weights * (values - estimate) / total
+        psu_totals = np.bincount(self.psu, weights=scores, minlength=len(self.psu_strata))
+        counts = np.bincount(self.psu_strata)
+        means = np.bincount(self.psu_strata, weights=psu_totals) / np.maximum(counts, 1)
+        squares = np.bincount(self.psu_strata, weights=(psu_totals - means[self.psu_strata]) ** 2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = np.where(counts > 1, counts / (counts - 1) * squares * self.fpc, 0.0).sum()
+        return estimate, float(np.sqrt(variance))
+
+    def quantile(self, values: np.ndarray, domain: np.ndarray, q: float) -> Optional[float]:
+        weights = self.weights[domain]
+        if len(weights) == 0:
+            return None
+        order = np.argsort(values[domain], kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = min(np.searchsorted(cumulative, q * cumulative[-1], side="left"), len(order) - 1)
+        return float(values[domain][order][position])
+
+
+def sampling_options(target_error: Optional[float] = None, time_budget: Optional[float] = None,
+                     stratify_by: Optional[str] = None) -> Dict[str, Any]:
+    """Sampling settings for sample_csv, with unset ones taken from the environment defaults."""
+    return {
+        "target_error": target_error or SAMPLE_TARGET_ERROR,
+        "time_budget": time_budget or SAMPLE_TIME_BUDGET,
+        "stratify_by": stratify_by
+    }
+
+
+def _interval(estimate: Optional[float], error: Optional[float], low: float = -np.inf, high: float = np.inf) -> Optional[List[float]]:
+    if estimate is None:
+        return None
+    return [float(max(low, estimate - Z_SCORE * error)), float(min(high, estimate + Z_SCORE * error))]
+
+
+def _percent(interval: Optional[List[float]]) -> Optional[List[float]]:
+    return None if interval is None else [round(bound * 100, 2) for bound in interval]
+
+
+def _quantile_interval(design: _Design, values: np.ndarray, domain: np.ndarray, q: float):
+    """Quantile estimate with a Woodruff interval: a proportion interval mapped back through the weighted CDF."""
+    estimate = design.quantile(values, domain, q)
+    if estimate is None:
+        return None, None
+    proportion, error = design.ratio((values <= estimate).astype("float64"), domain)
+    low, high = _interval(proportion, error, 0.0, 1.0)
+    return estimate, [design.quantile(values, domain, low), design.quantile(values, domain, high)]
+
+
+def _parse_probe(path: str, options: Dict[str, Any]) -> Tuple[float, float]:
+    """Parse the head of the file to measure throughput (bytes/s) and bytes per row."""
+    with open(path, "rb") as f:
+        head = f.read(_PROBE_BYTES)
+    if len(head) == _PROBE_BYTES:
+        head = head[:head.rfind(b"\n") + 1] or head
+    started = time.perf_counter()
+    # A multi-byte character cut by the probe is replaced rather than fatal.
+    rows = len(pd.read_csv(io.BytesIO(head), encoding_errors="replace", **options))
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    return len(head) / elapsed, len(head) / max(rows, 1)
+
+
+def _reservoir_sample(path: str, sample_rows: int, stratify_by: Optional[str], options: Dict[str, Any]):
+    """One pass over the file keeping a uniform reservoir per stratum."""
+    samplers: Dict[str, RowSampler] = {}
+    totals: Dict[str, int] = {}
+    for chunk in pd.read_csv(path, chunksize=PROFILE_CHUNK_ROWS, memory_map=True, **options):
+        if stratify_by is None:
+            groups = [("all", chunk)]
+        else:
+            if stratify_by not in chunk.columns:
+                raise ValueError(f"Stratification column '{stratify_by}' not found in data")
+            labels = chunk[stratify_by].astype(str).where(chunk[stratify_by].notna(), "(missing)")
+            groups = chunk.groupby(labels, sort=False)
+        for label, rows in groups:
+            if label not in samplers:
+                if len(samplers) == SAMPLE_MAX_STRATA:
+                    raise ValueError(f"Stratification column '{stratify_by}' has more than {SAMPLE_MAX_STRATA} values")
+                samplers[label] = RowSampler(sample_rows, seed=len(samplers))
+                totals[label] = 0
+            samplers[label].update(rows)
+            totals[label] += len(rows)
+
+    population = sum(totals.values())
+    frames, weights, strata, fpc = [], [], [], []
+    for code, (label, sampler) in enumerate(samplers.items()):
+        sample = sampler.sample
+        if stratify_by is not None:
+            # Proportional allocation, with a floor so small strata still get an interval.
+            allocation = min(totals[label], max(MIN_STRATUM_ROWS, math.ceil(sample_rows * totals[label] / population)))
+            subsample = RowSampler(allocation, seed=code)
+            subsample.update(sample)
+            sample = subsample.sample
+        frames.append(sample)
+        weights.append(np.full(len(sample), totals[label] / len(sample)))
+        strata.append(np.full(len(sample), code))
+        fpc.append(1 - len(sample) / totals[label])
+
+    sample = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    rows = len(sample)
+    design = _Design(np.concatenate(weights), np.arange(rows), np.concatenate(strata), np.array(fpc))
+    return sample, design, population, len(samplers)
+
+
+def _block_sample(path: str, blocks: int, dialect: Dict[str, Any], block_bytes: int = SAMPLE_BLOCK_BYTES, seed: int = 0):
+    """Rows starting inside randomly chosen fixed-size byte blocks of the file.
+
+    Every row starts in exactly one block, so each has the same inclusion
+    probability, blocks / total blocks; blocks are the sampling units.
+    Quoted fields spanning lines are not supported in this mode.
+    """
+    rng = np.random.default_rng(seed)
+    options = pandas_options(dialect)
+    with open(path, "rb") as f:
+        header = f.readline() if dialect["header"] else b""
+        data_start = f.tell()
+        total_blocks = max(1, math.ceil((os.path.getsize(path) - data_start) / block_bytes))
+        picks = np.sort(rng.choice(total_blocks, size=min(blocks, total_blocks), replace=False))
+
+        frames, psu = [], []
+        for unit, block in enumerate(picks):
+            start = data_start + int(block) * block_bytes
+            if start == 0:
+                previous = b"\n"
+            else:
+                f.seek(start - 1)
+                previous = f.read(1)
+            raw = f.read(block_bytes)
+            if previous != b"\n":
+                cut = raw.find(b"\n")
+                raw = raw[cut + 1:] if cut >= 0 else b""
+            if not raw:
+                continue
+            if not raw.endswith(b"\n"):
+                # Finish the last row, which starts inside the block.
+                raw += f.readline()
+            frame = pd.read_csv(io.BytesIO(header + raw), **options)
+            frames.append(frame)
+            psu.append(np.full(len(frame), unit))
+
+    sample = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=dialect["columns"])
+    psu = np.concatenate(psu) if psu else np.empty(0, dtype="int64")
+    weights = np.full(len(sample), total_blocks / len(picks))
+    design = _Design(weights, psu, np.zeros(len(picks), dtype="int64"), np.array([1 - len(picks) / total_blocks]))
+    return sample, design, len(picks), total_blocks
+
+
+def _numeric_estimates(design: _Design, series: pd.Series) -> Dict[str, Any]:
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    finite = np.isfinite(values)
+    null = np.isnan(values)
+    stats = {
+        "count": int(round((design.weights * finite).sum())),
+        "null_count": int(round((design.weights * null).sum())),
+        "infinite_count": int(round((design.weights * (~finite & ~null)).sum()))
+    }
+    if not finite.any():
+        return {"mean": None, "median": None, "std": None, "min": None, "max": None, "q25": None, "q75": None, **stats,
+                "mean_ci": None, "median_ci": None, "q25_ci": None, "q75_ci": None}
+
+    mean, mean_error = design.ratio(values, finite)
+    variance, _ = design.ratio((values - mean) ** 2, finite)
+    q25, q25_ci = _quantile_interval(design, values, finite, 0.25)
+    median, median_ci = _quantile_interval(design, values, finite, 0.5)
+    q75, q75_ci = _quantile_interval(design, values, finite, 0.75)
+    return {
+        "mean": mean,
+        "median": median,
+        "std": float(np.sqrt(variance)),
+        "min": float(values[finite].min()),
+        "max": float(values[finite].max()),
+        "q25": q25,
+        "q75": q75,
+        **stats,
+        "mean_ci": _interval(mean, mean_error),
+        "median_ci": median_ci,
+        "q25_ci": q25_ci,
+        "q75_ci": q75_ci
+    }
+
+
+def _categorical_estimates(design: _Design, series: pd.Series) -> Dict[str, Any]:
+    present = series.notna().to_numpy()
+    counts = pd.Series(design.weights[present]).groupby(series[present].to_numpy(), sort=False).sum()
+    counts = counts.sort_values(ascending=False)
+    return {
+        # Distinct values seen in the sample, a lower bound for the file.
+        "unique_values": int(len(counts)),
+        "mode": str(counts.index[0]) if len(counts) else None,
+        "top_values": {str(k): int(round(v)) for k, v in counts.head(10).items()},
+        "total_count": int(round(design.weights[present].sum())),
+        "null_count": int(round(design.weights[~present].sum()))
+    }
+
+
+def _outlier_estimates(design: _Design, sample: pd.DataFrame, columns: List[str]) -> Dict[str, Any]:
+    outliers = {}
+    everything = np.ones(len(sample), dtype=bool)
+    for col in columns:
+        values = sample[col].to_numpy(dtype="float64", na_value=np.nan)
+        observed = ~np.isnan(values)
+        if not observed.any():
+            continue
+        q1 = design.quantile(values, observed, 0.25)
+        q3 = design.quantile(values, observed, 0.75)
+        lower, upper = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        low, high = values < lower, values > upper
+        if not (low.any() or high.any()):
+            continue
+        share, error = design.ratio((low | high).astype("float64"), everything)
+        outliers[col] = {
+            "count": int(round(share * design.population)),
+            "percentage": float(round(share * 100, 2)),
+            "percentage_ci": _percent(_interval(share, error, 0.0, 1.0)),
+            "lower_bound": float(lower),
+            "upper_bound": float(upper),
+            "outlier_values": sample[col][low].head(5).tolist() + sample[col][high].head(5).tolist()
+        }
+    return outliers
+
+
+def sample_csv(
+    path: str,
+    target_error: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    stratify_by: Optional[str] = None
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Estimate a CSV profile from a random sample, with 95% confidence intervals.
+
+    The head of the file is parsed to measure throughput. When the whole
+    file can be read within the time budget, it is read once into a
+    reservoir sample of rows_for_error(target_error) rows, one reservoir
+    per value of stratify_by when given. Otherwise blocks of the file are
+    read at random offsets, as many as the budget allows and the target
+    error needs but at least two, so their variance can be estimated;
+    stratification is then not possible and is skipped.
+
+    Args:
+        path: Path of the CSV file
+        target_error: Half-width of the 95% interval for proportions; sets the sample size
+        time_budget: Seconds available for reading the sample
+        stratify_by: Categorical column to stratify the reservoir by
+
+    Returns:
+        Tuple of the sampled rows and {"basic_stats", "outliers"} estimates,
+        with intervals next to means, quantiles, missing and outlier
+        percentages and the sampling design under basic_stats["sampling"]
+    """
+    started = time.perf_counter()
+    target_error = target_error or SAMPLE_TARGET_ERROR
+    time_budget = time_budget or SAMPLE_TIME_BUDGET
+    sample_rows = rows_for_error(target_error)
+
+    dialect = sniff_csv(path)
+    options = pandas_options(dialect)
+    throughput, row_bytes = _parse_probe(path, options)
+    size = os.path.getsize(path)
+    sampling = {
+        "confidence": SAMPLE_CONFIDENCE,
+        "target_error": target_error,
+        "time_budget": time_budget,
+        "stratify_by": stratify_by
+    }
+
+    # Blocks are cut at newline bytes, which UTF-16 does not have.
+    if size / throughput <= time_budget or dialect["encoding"] == "utf-16":
+        sample, design, population, strata = _reservoir_sample(path, sample_rows, stratify_by, options)
+        sampling.update({
+            "method": "stratified reservoir" if stratify_by else "reservoir",
+            "strata": strata,
+            "total_rows": population,
+            "total_rows_exact": True
+        })
+    else:
+        affordable = int(time_budget / (SAMPLE_BLOCK_BYTES / throughput + _BLOCK_OVERHEAD))
+        needed = math.ceil(sample_rows * row_bytes / SAMPLE_BLOCK_BYTES)
+        sample, design, blocks, total_blocks = _block_sample(path, max(2, min(affordable, needed)), dialect)
+        sampling.update({
+            "method": "random blocks",
+            "blocks": blocks,
+            "total_blocks": total_blocks,
+            "total_rows": int(round(design.population)),
+            "total_rows_exact": False,
+            "stratify_by": None
+        })
+
+    if sample.empty:
+        raise ValueError("CSV file is empty")
+
+    numerical_cols = sample.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_cols = sample.select_dtypes(include=['object', 'category']).columns.tolist()
+    population = sampling["total_rows"]
+    missing = {}
+    for col in sample.columns:
+        share, error = design.ratio(sample[col].isna().to_numpy().astype("float64"), np.ones(len(sample), dtype=bool))
+        missing[col] = (share, error)
+
+    sampling["sample_rows"] = len(sample)
+    sampling["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    basic_stats = {
+        "shape": {"rows": population, "columns": int(sample.shape[1])},
+        "columns": list(sample.columns),
+        "dtypes": {col: str(dtype) for col, dtype in sample.dtypes.items()},
+        "missing_values": {col: int(round(share * population)) for col, (share, _) in missing.items()},
+        "missing_percentage": {col: float(round(share * 100, 2)) for col, (share, _) in missing.items()},
+        "missing_percentage_ci": {col: _percent(_interval(share, error, 0.0, 1.0)) for col, (share, error) in missing.items()},
+        # Duplicates can only be counted within the sample.
+        "duplicates": int(sample.duplicated().sum()),
+        "memory_usage": float(round(sample.memory_usage(deep=True).sum() / 1024**2, 2)),
+        "numerical_columns": numerical_cols,
+        "categorical_columns": categorical_cols,
+        "datetime_columns": sample.select_dtypes(include=['datetime64']).columns.tolist(),
+        "numerical_stats": {col: _numeric_estimates(design, sample[col]) for col in numerical_cols},
+        "categorical_stats": {col: _categorical_estimates(design, sample[col]) for col in categorical_cols},
+        "sampling": sampling
+    }
+    return sample, {"basic_stats": basic_stats, "outliers": _outlier_estimates(design, sample, numerical_cols)}
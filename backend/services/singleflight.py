@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key onto one in-flight computation.
+
+    The first caller for a key starts the computation; callers arriving while
+    it runs attach to it and receive the same result (or exception). Progress
+    reported by the computation is broadcast to every attached listener, from
+    the point it attached until it leaves.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Tuple[asyncio.Future, List[Callable[[Any], None]]]] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(
+        self,
+        key: str,
+        factory: Callable[[Callable[[Any], None]], Awaitable[Any]],
+        listener: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """
+        Run factory once per key among concurrent callers.
+
+        Args:
+            key: Identity of the computation
+            factory: Coroutine factory receiving a progress callback that
+                broadcasts to all attached listeners
+            listener: Optional progress callback of this caller
+
+        Returns:
+            The shared result of the computation
+        """
+        call = self._calls.get(key)
+        if call is None:
+            listeners: List[Callable[[Any], None]] = []
+
+            def broadcast(event: Any) -> None:
+                for attached in list(listeners):
+                    attached(event)
+
+            task = asyncio.ensure_future(factory(broadcast))
+            call = (task, listeners)
+            self._calls[key] = call
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        task, listeners = call
+        if listener is None:
+            return await asyncio.shield(task)
+        listeners.append(listener)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            listeners.remove(listener)
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away.
+            task.exception()
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
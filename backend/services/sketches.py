@@ -0,0 +1,312 @@
+import base64
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+
+SKETCH_EXACT_LIMIT = int(os.getenv("VIZBOT_SKETCH_EXACT_LIMIT", "100000"))
+KLL_K = 200
+HLL_PRECISION = 14
+
+
+def hash_values(values) -> np.ndarray:
+    """64-bit hashes of values, as used by HyperLogLog."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def sorted_unique(values: np.ndarray) -> np.ndarray:
+    """np.unique by sorting, which beats its hash-based path on large uint64 arrays."""
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang, Liberty).
+
+    Exact while it has seen at most exact_limit values: the values are kept
+    and quantiles interpolate linearly like pandas. Beyond that, items are
+    compacted into levels of weight 2**level and quantiles have a rank error
+    of about 1.7 / k.
+    """
+
+    def __init__(self, k: int = KLL_K, exact_limit: int = SKETCH_EXACT_LIMIT, seed: Optional[int] = 0):
+        self.k = k
+        self.exact_limit = exact_limit
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1 and len(self.levels[0]) == self.n
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        self.n += other.n
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    def quantiles(self, qs) -> List[float]:
+        if self.n == 0:
+            return [None for _ in qs]
+        if self.is_exact:
+            # pandas' median averages the two middle values, which can round
+            # differently from interpolating at 0.5.
+            return [
+                float(np.median(self.levels[0])) if q == 0.5 else float(value)
+                for q, value in zip(qs, np.quantile(self.levels[0], qs))
+            ]
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** i) for i, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left")
+        return [float(items[min(position, len(items) - 1)]) for position in positions]
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        if self.is_exact and self.n <= self.exact_limit:
+            return
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                leftover = items[len(items) - len(items) % 2:]
+                promoted = items[self._rng.integers(2):len(items) - len(items) % 2:2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "kll",
+            "k": self.k,
+            "exact_limit": self.exact_limit,
+            "n": self.n,
+            "levels": [level.tolist() for level in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=data["k"], exact_limit=data["exact_limit"])
+        sketch.n = data["n"]
+        sketch.levels = [np.asarray(level, dtype="float64") for level in data["levels"]]
+        return sketch
+
+
+def _leading_zeros(words: np.ndarray) -> np.ndarray:
+    zeros = np.zeros(len(words), dtype="int64")
+    words = words.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        small = words < np.uint64(1 << (64 - shift))
+        zeros[small] += shift
+        words[small] <<= np.uint64(shift)
+    zeros[words == 0] = 64
+    return zeros
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch (Flajolet et al.).
+
+    Exact while it has seen at most exact_limit distinct hashes, which are
+    then kept as a sorted array. Beyond that the hashes are folded into
+    2**precision registers with a standard error of about 1.04 / sqrt(2**precision).
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION, exact_limit: int = SKETCH_EXACT_LIMIT):
+        self.precision = precision
+        self.exact_limit = exact_limit
+        self.hashes: Optional[np.ndarray] = np.empty(0, dtype="uint64")
+        self.registers: Optional[np.ndarray] = None
+
+    @property
+    def is_exact(self) -> bool:
+        return self.registers is None
+
+    def update(self, values) -> "HyperLogLog":
+        return self.update_hashes(hash_values(values))
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        if self.is_exact:
+            self.hashes = sorted_unique(np.concatenate([self.hashes, hashes]))
+            if len(self.hashes) > self.exact_limit:
+                self._to_registers()
+        else:
+            self._add_to_registers(hashes)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        if other.is_exact:
+            return self.update_hashes(other.hashes)
+        if self.is_exact:
+            self._to_registers()
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        if self.is_exact:
+            return int(len(self.hashes))
+
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype("float64"))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+    def _to_registers(self) -> None:
+        self.registers = np.zeros(1 << self.precision, dtype="uint8")
+        self._add_to_registers(self.hashes)
+        self.hashes = None
+
+    def _add_to_registers(self, hashes: np.ndarray) -> None:
+        hashes = np.asarray(hashes, dtype="uint64")
+        index = (hashes >> np.uint64(64 - self.precision)).astype("int64")
+        rank = np.minimum(_leading_zeros(hashes << np.uint64(self.precision)) + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype("uint8"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "hll",
+            "precision": self.precision,
+            "exact_limit": self.exact_limit,
+            "hashes": None if self.hashes is None else base64.b64encode(self.hashes.tobytes()).decode(),
+            "registers": None if self.registers is None else base64.b64encode(self.registers.tobytes()).decode()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(precision=data["precision"], exact_limit=data["exact_limit"])
+        if data["registers"] is not None:
+            sketch.hashes = None
+            sketch.registers = np.frombuffer(base64.b64decode(data["registers"]), dtype="uint8").copy()
+        else:
+            sketch.hashes = np.frombuffer(base64.b64decode(data["hashes"]), dtype="uint64").copy()
+        return sketch
+
+
+def counts_mode(counts: pd.Series):
+    """Most frequent value of value counts; the smallest of tied values, like Series.mode."""
+    if len(counts) == 0:
+        return None
+    modes = counts.index[counts == counts.max()]
+    try:
+        return sorted(modes)[0]
+    except TypeError:
+        return modes[0]
+
+
+class SpaceSaving:
+    """Mergeable heavy-hitter summary (Metwally et al.) with at most capacity counters.
+
+    Counts are exact while the column has at most capacity distinct values.
+    Beyond that each count overestimates by at most the tracked error.
+    """
+
+    def __init__(self, capacity: int = SKETCH_EXACT_LIMIT):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.errors = pd.Series(dtype="int64")
+        self.truncated = False
+
+    @property
+    def is_exact(self) -> bool:
+        return not self.truncated
+
+    def update(self, series: pd.Series) -> "SpaceSaving":
+        return self.update_counts(series.value_counts(sort=False))
+
+    def update_counts(self, counts: pd.Series) -> "SpaceSaving":
+        """Add exact counts of a batch, as returned by value_counts(sort=False)."""
+        chunk = SpaceSaving(capacity=self.capacity)
+        chunk.counts = counts
+        chunk.errors = pd.Series(0, index=chunk.counts.index, dtype="int64")
+        chunk._truncate()
+        return self.merge(chunk)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        if len(self.counts) == 0 and not self.truncated:
+            self.counts = other.counts.copy()
+            self.errors = other.errors.copy()
+            self.truncated = other.truncated
+            self._truncate()
+            return self
+
+        # An item missing from a full summary may have been counted up to
+        # its smallest counter (Cafaro et al.).
+        own_floor = self._floor()
+        other_floor = other._floor()
+        index = self.counts.index.append(other.counts.index[~other.counts.index.isin(self.counts.index)])
+        self.counts = self.counts.reindex(index, fill_value=own_floor) + other.counts.reindex(index, fill_value=other_floor)
+        self.errors = self.errors.reindex(index, fill_value=own_floor) + other.errors.reindex(index, fill_value=other_floor)
+        self.truncated = self.truncated or other.truncated
+        self._truncate()
+        return self
+
+    def top(self, n: int) -> pd.Series:
+        # Same sort as value_counts over first-appearance counts, so ties
+        # break the same way.
+        return self.counts.sort_values(ascending=False).head(n)
+
+    def mode(self):
+        return counts_mode(self.counts)
+
+    def _floor(self) -> int:
+        if len(self.counts) < self.capacity:
+            return 0
+        return int(self.counts.min())
+
+    def _truncate(self) -> None:
+        if len(self.counts) > self.capacity:
+            keep = self.counts.rank(method="first", ascending=False) <= self.capacity
+            self.counts = self.counts[keep]
+            self.errors = self.errors[keep]
+            self.truncated = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "space_saving",
+            "capacity": self.capacity,
+            "truncated": self.truncated,
+            "items": [str(item) for item in self.counts.index],
+            "counts": self.counts.astype("int64").tolist(),
+            "errors": self.errors.astype("int64").tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SpaceSaving":
+        sketch = cls(capacity=data["capacity"])
+        sketch.counts = pd.Series(data["counts"], index=data["items"], dtype="int64")
+        sketch.errors = pd.Series(data["errors"], index=data["items"], dtype="int64")
+        sketch.truncated = data["truncated"]
+        return sketch
+
+
+def sketch_from_dict(data: Dict[str, Any]):
+    """Restore a sketch serialized with to_dict."""
+    sketch_types = {"kll": KLLSketch, "hll": HyperLogLog, "space_saving": SpaceSaving}
+    return sketch_types[data["type"]].from_dict(data)
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Tuple
+from langchain_core.messages import AIMessageChunk
+from backend.services.executor import run_blocking
+from backend.services.responses import encode_json
+
+
+GRAPH_STREAM_MODES = ["updates", "custom", "messages", "values"]
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def stream_graph(graph, initial_state: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+    """Run graph.stream in the bounded graph executor and yield its chunks on the event loop.
+
+    Args:
+        graph: Compiled LangGraph workflow
+        initial_state: Initial graph state
+
+    Yields:
+        (stream_mode, chunk) tuples as produced by graph.stream
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+    finished = object()
+
+    def publish(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            stopped.set()
+
+    def produce():
+        try:
+            for item in graph.stream(initial_state, stream_mode=GRAPH_STREAM_MODES):
+                if stopped.is_set():
+                    break
+                publish(item)
+        except Exception as e:
+            publish(e)
+        finally:
+            publish(finished)
+
+    producer = asyncio.ensure_future(run_blocking(produce))
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+    finally:
+        stopped.set()
+
+
+async def graph_events(graph, initial_state: Dict[str, Any], narrative_node: str = "narrative") -> AsyncIterator[Tuple[str, Any]]:
+    """Translate graph stream chunks into client-facing events.
+
+    Nodes publish partial results (statistics, charts) through the LangGraph
+    stream writer as {"event": ..., "data": ...} dicts. Completed nodes are
+    reported as "node_completed", and LLM tokens from the narrative node as
+    "narrative_token". The final graph state is yielded last as "final_state".
+
+    Args:
+        graph: Compiled LangGraph workflow
+        initial_state: Initial graph state
+        narrative_node: Name of the node whose LLM tokens are forwarded
+
+    Yields:
+        (event, data) tuples
+    """
+    final_state = None
+    async for mode, chunk in stream_graph(graph, initial_state):
+        if mode == "custom":
+            yield chunk["event"], chunk["data"]
+        elif mode == "updates":
+            for node in chunk:
+                yield "node_completed", {"node": node}
+        elif mode == "messages":
+            message, metadata = chunk
+            if (
+                isinstance(message, AIMessageChunk)
+                and metadata.get("langgraph_node") == narrative_node
+                and message.content
+            ):
+                yield "narrative_token", {"token": message.content}
+        else:
+            final_state = chunk
+    yield "final_state", final_state
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {encode_json(data).decode()}\n\n"
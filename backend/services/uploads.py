@@ -0,0 +1,97 @@
+import hashlib
+import os
+import tempfile
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_UPLOAD_MB = float(os.getenv("VIZBOT_MAX_UPLOAD_MB", "200"))
+UPLOAD_DIR = os.getenv("VIZBOT_UPLOAD_DIR") or None
+# Room for the multipart boundaries, part headers and form fields around the file.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class SpooledUpload:
+    """A client upload spooled to a temporary file, with its size and SHA-256."""
+
+    def __init__(self, path: str, size: int, fingerprint: str):
+        self.path = path
+        self.size = size
+        self.fingerprint = fingerprint
+
+    def cleanup(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_upload(file, suffix: str = "", max_bytes: int = int(MAX_UPLOAD_MB * 1024**2)) -> SpooledUpload:
+    """
+    Copy an upload to a temporary file chunk by chunk.
+
+    The content is hashed and its exact size checked while copying, so
+    the whole upload is never held in memory. Starlette has already
+    received the multipart body by then (spooled to its own temporary
+    file), so this check applies after the upload; UploadLimitMiddleware
+    turns oversized requests away before their body is read.
+
+    Args:
+        file: UploadFile object from FastAPI
+        suffix: Suffix of the temporary file
+        max_bytes: Largest accepted upload
+
+    Returns:
+        The spooled upload; the caller owns its temporary file
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="vizbot-upload-", dir=UPLOAD_DIR)
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"File exceeds the {max_bytes / 1024**2:g} MB upload limit")
+                digest.update(chunk)
+                spool.write(chunk)
+
+        if size == 0:
+            raise ValueError("File is empty")
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return SpooledUpload(path, size, digest.hexdigest())
+
+
+class UploadLimitMiddleware:
+    """Reject multipart requests whose Content-Length exceeds the upload limit.
+
+    Runs before Starlette parses the form, so an oversized upload is
+    answered with 413 without its body being received. Requests sent
+    without a Content-Length (chunked) are still limited by spool_upload,
+    after they are received.
+    """
+
+    def __init__(self, app, max_bytes: int = int(MAX_UPLOAD_MB * 1024**2)):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if headers.get("content-type", "").startswith("multipart/form-data"):
+                try:
+                    length = int(headers.get("content-length", ""))
+                except ValueError:
+                    length = 0
+                if length > self.max_bytes + MULTIPART_OVERHEAD_BYTES:
+                    response = JSONResponse(
+                        {"detail": f"File exceeds the {self.max_bytes / 1024**2:g} MB upload limit"},
+                        status_code=413
+                    )
+                    await response(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
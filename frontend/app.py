@@ -1,11 +1,14 @@
 import streamlit as st
 import requests
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 import plotly.io as pio
 from io import BytesIO
+import base64
 import json
+import time
 
 # ===========================
 # PAGE CONFIGURATION
@@ -323,12 +326,74 @@ st.markdown("""
 # CONSTANTS
 # ===========================
 API_URL = "http://localhost:8000"
+JOB_POLL_INTERVAL = 2
+JOB_TIMEOUT = 1800
 
 # ===========================
 # HELPER FUNCTIONS
 # ===========================
+def run_analysis_job(submit_path, **request_kwargs):
+    response = requests.post(f"{API_URL}{submit_path}", timeout=60, **request_kwargs)
+    if response.status_code != 202:
+        return None, response.json().get('detail', 'Unknown error occurred')
+    
+    job_id = response.json()["job_id"]
+    progress_placeholder = st.empty()
+    deadline = time.time() + JOB_TIMEOUT
+    
+    while time.time() < deadline:
+        job = requests.get(f"{API_URL}/api/jobs/{job_id}", timeout=10).json()
+        
+        if job["status"] == "completed":
+            progress_placeholder.empty()
+            return job["result"], None
+        if job["status"] == "failed":
+            progress_placeholder.empty()
+            return None, job["error"]
+        
+        completed_steps = [step["node"] for step in job["progress"]]
+        if completed_steps:
+            progress_placeholder.caption(f"✅ Completed steps: {', '.join(completed_steps)}")
+        time.sleep(JOB_POLL_INTERVAL)
+    
+    raise requests.exceptions.Timeout(f"Job {job_id} did not finish within {JOB_TIMEOUT} seconds")
+
+def decode_typed_arrays(obj):
+    """Replace the base64 typed arrays ({"dtype", "bdata"}) of a chart with numpy arrays."""
+    if isinstance(obj, dict):
+        if "bdata" in obj and "dtype" in obj:
+            values = np.frombuffer(base64.b64decode(obj["bdata"]), dtype=obj["dtype"])
+            if "shape" in obj:
+                values = values.reshape([int(size) for size in obj["shape"].split(",")])
+            return values
+        return {key: decode_typed_arrays(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [decode_typed_arrays(value) for value in obj]
+    return obj
+
+@st.cache_data(show_spinner=False, ttl=1800)
+def fetch_chart(dataset_id, chart_type, column, second_column=None):
+    """Render a lazily described chart on the backend; charts are only fetched once displayed."""
+    payload = {"chart_type": chart_type, "column": column, "second_column": second_column}
+    response = requests.post(f"{API_URL}/api/charts/{dataset_id}", json=payload, timeout=300)
+    if response.status_code != 200:
+        # Raised rather than returned, so failures are not cached.
+        raise RuntimeError(response.json().get("detail", f"Chart request failed ({response.status_code})"))
+    return response.json()
+
 def display_chart_from_backend(chart_data):
     try:
+        if chart_data.get("lazy"):
+            try:
+                chart_data = fetch_chart(
+                    chart_data["dataset_id"],
+                    chart_data["chart_type"],
+                    chart_data["column"],
+                    chart_data.get("second_column")
+                )
+            except Exception as e:
+                chart_data = {"error": str(e)}
+        
         if "error" in chart_data:
             st.error(f"❌ {chart_data['error']}")
             return False
@@ -339,16 +404,21 @@ def display_chart_from_backend(chart_data):
         
         chart_obj = chart_data["plotly_chart"]
         
+        render = chart_data.get("render", {})
+        if render.get("strategy") == "downsampled":
+            st.caption(f"Showing {render['plotted']:,} of {render['points']:,} points, extremes included")
+        elif render.get("strategy") == "density":
+            st.caption(f"{render['points']:,} points shown as a density grid")
+        
         try:
-            fig_json = json.dumps(chart_obj)
-            fig = pio.from_json(fig_json)
+            fig = go.Figure(decode_typed_arrays(chart_obj))
             st.plotly_chart(fig, use_container_width=True)
             return True
         except Exception as e1:
             st.warning(f"Method 1 failed: {str(e1)}")
         
         try:
-            fig = go.Figure(chart_obj)
+            fig = pio.from_json(json.dumps(chart_obj))
             st.plotly_chart(fig, use_container_width=True)
             return True
         except Exception as e2:
@@ -514,6 +584,21 @@ if analysis_type == "📁 CSV File Analysis":
         col1, col2, col3 = st.columns([1, 2, 1])
         
         with col2:
+            with st.expander("⚙️ Analysis Options"):
+                engine = st.selectbox(
+                    "Compute engine",
+                    ["Server default", "auto", "pandas", "polars", "duckdb"],
+                    help="Engine that parses and profiles the file; polars and duckdb need the engines extra on the server"
+                )
+                sample = st.checkbox(
+                    "Estimate from a random sample",
+                    help="Faster on large files; statistics come with 95% confidence intervals"
+                )
+                if sample:
+                    target_error = st.number_input("Target error", min_value=0.001, max_value=0.49, value=0.01, step=0.005, format="%.3f")
+                    time_budget = st.number_input("Time budget (seconds, 0 for the server default)", min_value=0.0, value=0.0, step=5.0)
+                    stratify_by = st.text_input("Stratify by column (optional)")
+            
             analyze_button = st.button(
                 "🚀 Start AI Analysis", 
                 type="primary", 
@@ -525,10 +610,18 @@ if analysis_type == "📁 CSV File Analysis":
             with st.spinner("🤖 AI Agent is analyzing your data... This may take a few moments."):
                 try:
                     files = {"file": (uploaded_file.name, uploaded_file.getvalue(), "text/csv")}
-                    response = requests.post(f"{API_URL}/api/analyze", files=files, timeout=300)
+                    options = {}
+                    if engine != "Server default":
+                        options["engine"] = engine
+                    if sample:
+                        options.update(sample="true", target_error=target_error)
+                        if time_budget > 0:
+                            options["time_budget"] = time_budget
+                        if stratify_by.strip():
+                            options["stratify_by"] = stratify_by.strip()
+                    result, error = run_analysis_job("/api/analyze/jobs", files=files, data=options)
                     
-                    if response.status_code == 200:
-                        result = response.json()
+                    if error is None:
                         
                         st.markdown("""
                         <div class="success-message">
@@ -688,7 +781,7 @@ if analysis_type == "📁 CSV File Analysis":
                         st.markdown(f"""
                         <div class="error-message">
                             <h3>❌ Analysis Failed</h3>
-                            <p>{response.json().get('detail', 'Unknown error occurred')}</p>
+                            <p>{error}</p>
                         </div>
                         """, unsafe_allow_html=True)
                         
@@ -839,10 +932,9 @@ else:
                             "password": pg_password
                         }
                     }
-                    response = requests.post(f"{API_URL}/api/database/analyze", json=payload, timeout=300)
+                    result, error = run_analysis_job("/api/database/analyze/jobs", json=payload)
                     
-                    if response.status_code == 200:
-                        result = response.json()
+                    if error is None:
                         
                         st.success("✅ Database analysis completed!")
                         st.markdown("---")
@@ -1006,7 +1098,7 @@ else:
                                 st.info("📊 No visualizations available for this database")
                         
                     else:
-                        st.error(f"❌ Analysis failed: {response.json().get('detail', 'Unknown error')}")
+                        st.error(f"❌ Analysis failed: {error}")
                         
                 except Exception as e:
                     st.error(f"💥 An error occurred: {str(e)}")
@@ -1092,10 +1184,9 @@ else:
                             "auth_source": mongo_auth_source
                         }
                     }
-                    response = requests.post(f"{API_URL}/api/database/analyze", json=payload, timeout=300)
+                    result, error = run_analysis_job("/api/database/analyze/jobs", json=payload)
                     
-                    if response.status_code == 200:
-                        result = response.json()
+                    if error is None:
                         
                         st.success("✅ MongoDB database analysis completed!")
                         st.markdown("---")
@@ -1236,7 +1327,7 @@ else:
                                 st.info("📊 No visualizations available for this database")
                         
                     else:
-                        st.error(f"❌ Analysis failed: {response.json().get('detail', 'Unknown error')}")
+                        st.error(f"❌ Analysis failed: {error}")
                         
                 except Exception as e:
                     st.error(f"💥 An error occurred: {str(e)}")
@@ -1,18 +1,27 @@
 import uvicorn
+from dotenv import load_dotenv
+
+# Before the backend imports: their VIZBOT_* settings are read at import time.
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.routes.analysis import router as analysis_router
 from backend.routes.database import router as database_router
-from dotenv import load_dotenv
-
-load_dotenv()
+from backend.routes.jobs import router as jobs_router
+from backend.routes.charts import router as charts_router
+from backend.services.responses import FastJSONResponse
+from backend.services.uploads import UploadLimitMiddleware
 
 app = FastAPI(
     title="VizBot Analytics API",
     description="AI-powered Exploratory Data Analysis API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Added first so CORS headers wrap its rejections too.
+app.add_middleware(UploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -23,6 +32,8 @@ app.add_middleware(
 
 app.include_router(analysis_router)
 app.include_router(database_router)
+app.include_router(jobs_router)
+app.include_router(charts_router)
 
 
 @app.get("/")
@@ -0,0 +1,77 @@
+import time
+import pytest
+import backend.services.graph as graph
+from backend.interactors.analyzer import DataAnalyzer
+from backend.services.cache import ResultCache, make_cache_key
+from backend.services.engines import PandasEngine
+from backend.services.uploads import SpooledUpload
+
+
+def test_cache_key_depends_on_content_and_options():
+    key = make_cache_key("abc", {"engine": "pandas", "sample_rows": 10})
+
+    assert key == make_cache_key("abc", {"sample_rows": 10, "engine": "pandas"})
+    assert key != make_cache_key("abd", {"engine": "pandas", "sample_rows": 10})
+    assert key != make_cache_key("abc", {"engine": "pandas", "sample_rows": 11})
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("LAZY_CHARTS", False),
+    ("CHART_BINARY", False),
+    ("HISTOGRAM_MAX_BINS", 7),
+    ("SCATTER_MAX_POINTS", 10),
+    ("SCATTER_DENSITY_POINTS", 20),
+    ("CORRELATION_MISSING", "listwise"),
+    ("CORRELATION_MATRIX_COLUMNS", 3),
+    ("CORRELATION_MAX_PAIRS", 4),
+    ("DUPLICATE_MODE", "approximate"),
+    ("SKETCH_EXACT_LIMIT", 1000),
+    ("OPTIMIZE_DTYPES", False)
+])
+def test_request_key_covers_result_settings(monkeypatch, setting, value):
+    analyzer = DataAnalyzer()
+    upload = SpooledUpload("unused.csv", 1024, "f" * 64)
+    key = analyzer._request_key(upload, PandasEngine())
+
+    monkeypatch.setattr(graph, setting, value)
+    assert analyzer._request_key(upload, PandasEngine()) != key
+
+
+def test_result_cache_round_trip_and_eviction():
+    cache = ResultCache(memory_bytes=60)
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": "x" * 40})
+
+    assert cache.get("b") == {"value": "x" * 40}
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_result_cache_expires_entries():
+    cache = ResultCache(memory_bytes=1024, ttl_seconds=0)
+    cache.set("a", {"value": 1})
+    time.sleep(0.01)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_result_cache_reads_disk_tier(tmp_path):
+    ResultCache(memory_bytes=1024, disk_dir=str(tmp_path), disk_bytes=1024).set("a", {"value": [1, 2.5, None]})
+    cache = ResultCache(memory_bytes=1024, disk_dir=str(tmp_path), disk_bytes=1024)
+
+    assert cache.get("a") == {"value": [1, 2.5, None]}
+    assert cache.get("a") == {"value": [1, 2.5, None]}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_hit_survives_concurrent_eviction(tmp_path, monkeypatch):
+    ResultCache(memory_bytes=1024, disk_dir=str(tmp_path), disk_bytes=1024).set("a", {"value": 1})
+    cache = ResultCache(memory_bytes=1024, disk_dir=str(tmp_path), disk_bytes=1024)
+
+    def evicted(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr("backend.services.cache.os.utime", evicted)
+    assert cache.get("a") == {"value": 1}
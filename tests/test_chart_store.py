@@ -0,0 +1,95 @@
+import asyncio
+import pandas as pd
+import pytest
+import backend.interactors.chart_renderer as chart_renderer
+from backend.interactors.chart_renderer import ChartRenderer
+from backend.services.chart_store import ChartDatasets, chart_descriptor
+from backend.services.datasets import get_dataframe
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0], "y": [2.0, 1.0, 4.0, 3.0], "city": list("abab")})
+
+
+def test_keeps_most_recently_used_datasets():
+    datasets = ChartDatasets(max_datasets=2, ttl_seconds=60)
+    for name in ("a", "b"):
+        datasets.retain(name, _frame(), {"numerical_stats": {}})
+    datasets.get("a")
+    datasets.retain("c", _frame(), {"numerical_stats": {}})
+
+    assert datasets.get("b") is None
+    assert datasets.available("a") and datasets.available("c")
+
+
+def test_expires_unused_datasets():
+    datasets = ChartDatasets(max_datasets=2, ttl_seconds=0)
+    datasets.retain("a", _frame(), {"numerical_stats": {}})
+
+    assert datasets.get("a") is None
+
+
+def test_reloads_spilled_dataset(tmp_path):
+    pytest.importorskip("pyarrow")
+    datasets = ChartDatasets(max_datasets=1, ttl_seconds=60, spill_dir=str(tmp_path), spill_bytes=10**6,
+                             spill_ttl_seconds=60)
+    datasets.retain("a", _frame(), {"numerical_stats": {"x": {"count": 4}}}, spill=True)
+    datasets.retain("b", _frame(), {"numerical_stats": {}})
+
+    assert datasets.available("a")
+    df_key, context = datasets.get("a")
+    pd.testing.assert_frame_equal(get_dataframe(df_key), _frame())
+    assert context == {"numerical_stats": {"x": {"count": 4}}}
+
+
+def test_does_not_spill_frames_arrow_cannot_store(tmp_path):
+    pytest.importorskip("pyarrow")
+    datasets = ChartDatasets(max_datasets=1, ttl_seconds=60, spill_dir=str(tmp_path), spill_bytes=10**6,
+                             spill_ttl_seconds=60)
+    datasets.retain("a", pd.DataFrame({"mixed": [1, "a", 2.5]}), {"numerical_stats": {}}, spill=True)
+
+    assert not list(tmp_path.iterdir())
+    assert datasets.available("a")
+
+
+def test_spill_is_bounded(tmp_path):
+    pytest.importorskip("pyarrow")
+    datasets = ChartDatasets(max_datasets=1, ttl_seconds=60, spill_dir=str(tmp_path), spill_bytes=1,
+                             spill_ttl_seconds=60)
+    datasets.retain("a", _frame(), {"numerical_stats": {}}, spill=True)
+    datasets.retain("b", _frame(), {"numerical_stats": {}})
+
+    assert not datasets.available("a")
+
+
+def test_descriptor_estimates_scatter_from_resident_rows():
+    stats = {"numerical_stats": {"x": {"count": 10_000}, "y": {"count": 9_000}}}
+    descriptor = chart_descriptor("d", "scatter", "x", "y", basic_stats=stats, rows=500)
+
+    assert descriptor["lazy"] and descriptor["dataset_id"] == "d"
+    assert descriptor["second_column"] == "y"
+    assert descriptor["estimated_bytes"] > 0
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    datasets = ChartDatasets(max_datasets=2, ttl_seconds=60)
+    datasets.retain("d", _frame(), {"numerical_stats": {}})
+    monkeypatch.setattr(chart_renderer, "chart_datasets", datasets)
+    return ChartRenderer()
+
+
+def test_renders_and_caches_charts(renderer):
+    chart = asyncio.run(renderer.render("d", "scatter", "x", "y"))
+
+    assert chart["plotly_chart"]["data"]
+    assert asyncio.run(renderer.render("d", "scatter", "x", "y")) == chart
+
+
+def test_rejects_unknown_datasets_and_columns(renderer):
+    with pytest.raises(KeyError):
+        asyncio.run(renderer.render("missing", "histogram", "x"))
+    with pytest.raises(ValueError):
+        asyncio.run(renderer.render("d", "histogram", "nope"))
+    with pytest.raises(ValueError):
+        asyncio.run(renderer.render("d", "scatter", "x"))
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.charts import (
+    DENSITY_BINS,
+    HISTOGRAM_MAX_BINS,
+    SCATTER_DENSITY_POINTS,
+    SCATTER_GRID,
+    SCATTER_MAX_POINTS,
+    density_grid,
+    downsample_points,
+    histogram_bin_count,
+    histogram_bins,
+    scatter_strategy,
+    typed_array_values
+)
+from backend.services.datasets import register_dataframe, release_dataframe
+from backend.services.tools import get_visualization_data
+
+
+def render(df: pd.DataFrame, chart_type: str, column: str, second_column: str = None) -> dict:
+    df_key = register_dataframe(df)
+    try:
+        request = {"df_key": df_key, "chart_type": chart_type, "column": column}
+        if second_column:
+            request["second_column"] = second_column
+        return get_visualization_data.invoke(request)
+    finally:
+        release_dataframe(df_key)
+
+
+def trace_values(trace: dict, name: str) -> np.ndarray:
+    values = trace[name]
+    return typed_array_values(values) if isinstance(values, dict) else np.asarray(values)
+
+
+def test_bin_count_follows_numpy_auto_rule():
+    values = np.random.default_rng(0).normal(size=1_000)
+    q25, q75 = np.quantile(values, [0.25, 0.75])
+    count = histogram_bin_count(len(values), values.min(), values.max(), q25, q75)
+
+    assert count == min(len(np.histogram_bin_edges(values, bins="auto")) - 1, HISTOGRAM_MAX_BINS)
+
+
+def test_bins_from_column_statistics_count_every_value():
+    values = np.random.default_rng(1).lognormal(size=10_000)
+    series = pd.Series(values)
+    stats = {"count": len(values), "min": values.min(), "max": values.max(),
+             "q25": series.quantile(0.25), "q75": series.quantile(0.75)}
+    counts, edges = histogram_bins(values, stats)
+
+    assert counts.sum() == len(values)
+    assert len(edges) == len(counts) + 1
+    assert edges[0] == values.min() and edges[-1] == values.max()
+    for expected, actual in zip((counts, edges), histogram_bins(values)):
+        np.testing.assert_array_equal(expected, actual)
+
+
+def test_integer_bins_are_centered_on_values():
+    values = np.array([1, 2, 2, 3, 3, 3, 7])
+    counts, edges = histogram_bins(values, integer=True)
+
+    assert counts.tolist() == [1, 2, 3, 0, 0, 0, 1]
+    assert edges.tolist() == [0.5, 1.5, 2.5, 3.5, 4.5, 5.5, 6.5, 7.5]
+
+
+def test_constant_column_gets_one_bin():
+    counts, edges = histogram_bins(np.full(10, 4.0))
+
+    assert counts.tolist() == [10]
+    assert edges.tolist() == [3.5, 4.5]
+
+
+def test_histogram_is_sent_as_binned_bars():
+    df = pd.DataFrame({"x": np.random.default_rng(2).normal(size=5_000)})
+    df.loc[::10, "x"] = np.nan
+    trace = render(df, "histogram", "x")["plotly_chart"]["data"][0]
+
+    assert trace["type"] == "bar"
+    assert trace_values(trace, "y").sum() == df["x"].notna().sum()
+    assert len(trace_values(trace, "x")) <= HISTOGRAM_MAX_BINS
+
+
+def test_scatter_strategy_by_point_count():
+    assert scatter_strategy(SCATTER_MAX_POINTS) == "exact"
+    assert scatter_strategy(SCATTER_MAX_POINTS + 1) == "downsampled"
+    assert scatter_strategy(SCATTER_DENSITY_POINTS + 1) == "density"
+
+
+def test_downsampling_keeps_extremes_and_sparse_regions():
+    rng = np.random.default_rng(3)
+    x = np.concatenate([rng.normal(size=50_000), [40.0]])
+    y = np.concatenate([rng.normal(size=50_000), [-40.0]])
+    kept = downsample_points(x, y, size=2_000)
+
+    assert len(kept) == pytest.approx(2_000, rel=0.1)
+    assert np.all(np.diff(kept) > 0)
+    assert {x.argmin(), x.argmax(), y.argmin(), y.argmax(), len(x) - 1} <= set(kept.tolist())
+    cells = lambda values: np.minimum(((values - values.min()) / np.ptp(values) * SCATTER_GRID).astype(int), SCATTER_GRID - 1)
+    occupied = set(zip(cells(x), cells(y)))
+    assert set(zip(cells(x)[kept], cells(y)[kept])) == occupied
+
+
+def test_density_grid_counts_every_point():
+    rng = np.random.default_rng(4)
+    x, y = rng.normal(size=10_000), rng.normal(size=10_000)
+    counts, x_edges, y_edges = density_grid(x, y)
+
+    assert counts.shape == (DENSITY_BINS, DENSITY_BINS)
+    assert counts.sum() == len(x)
+    assert len(x_edges) == len(y_edges) == DENSITY_BINS + 1
+
+
+@pytest.mark.parametrize("rows, strategy, trace_type", [
+    (1_000, "exact", "scatter"),
+    (SCATTER_MAX_POINTS * 4, "downsampled", "scattergl"),
+    (SCATTER_DENSITY_POINTS + 1, "density", "heatmap")
+])
+def test_scatter_chart_follows_its_strategy(rows, strategy, trace_type):
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({"x": rng.normal(size=rows), "y": rng.normal(size=rows)})
+    chart = render(df, "scatter", "x", "y")
+
+    assert chart["render"]["strategy"] == strategy
+    assert chart["render"]["points"] == rows
+    assert chart["plotly_chart"]["data"][0]["type"] == trace_type
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.correlations import correlation_matrix, summarize_correlations
+
+
+def make_frame(rows: int = 300_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=rows)
+    return pd.DataFrame({
+        "offset": base + rng.normal(scale=0.1, size=rows) + 1000,
+        "scaled": 3 * base + rng.normal(size=rows),
+        "wide": rng.normal(size=rows) * 1e6,
+        "inverse": -base + rng.normal(scale=0.5, size=rows),
+        "constant": np.ones(rows)
+    })
+
+
+def test_pearson_matches_dataframe_corr():
+    df = make_frame()
+    matrix = correlation_matrix(df, list(df.columns))
+
+    np.testing.assert_allclose(matrix, df.corr().to_numpy(), atol=1e-6)
+
+
+def test_pairwise_missing_values_match_dataframe_corr():
+    df = make_frame()
+    df.loc[::3, "offset"] = np.nan
+    df.loc[::5, "wide"] = np.inf
+    matrix = correlation_matrix(df, list(df.columns))
+
+    np.testing.assert_allclose(matrix, df.replace([np.inf, -np.inf], np.nan).corr().to_numpy(), atol=1e-6)
+
+
+def test_missing_values_after_the_first_chunk_are_handled_pairwise():
+    rng = np.random.default_rng(1)
+    a = rng.normal(size=200_000)
+    b = a + rng.normal(scale=2.0, size=200_000)
+    df = pd.DataFrame({"a": a, "b": b})
+    df.loc[150_000:150_010, "a"] = np.nan
+    matrix = correlation_matrix(df, list(df.columns))
+
+    np.testing.assert_allclose(matrix, df.corr().to_numpy(), atol=1e-6)
+
+
+def test_listwise_drops_incomplete_rows():
+    df = make_frame(10_000)
+    df.loc[::3, "offset"] = np.nan
+    matrix = correlation_matrix(df, list(df.columns), missing="listwise")
+
+    np.testing.assert_allclose(matrix, df.dropna().corr().to_numpy(), atol=1e-6)
+
+
+def test_spearman_matches_dataframe_corr():
+    df = make_frame(10_000)
+    matrix = correlation_matrix(df, list(df.columns), method="spearman")
+
+    np.testing.assert_allclose(matrix, df.corr(method="spearman").to_numpy(), atol=1e-6)
+
+
+def test_unknown_options_are_rejected():
+    df = make_frame(10)
+    with pytest.raises(ValueError):
+        correlation_matrix(df, list(df.columns), method="kendall")
+    with pytest.raises(ValueError):
+        correlation_matrix(df, list(df.columns), missing="drop")
+
+
+def test_summary_lists_strong_pairs():
+    df = make_frame(10_000)
+    columns = list(df.columns)
+    summary = summarize_correlations(columns, correlation_matrix(df, columns))
+
+    pairs = {(pair["variable1"], pair["variable2"]) for pair in summary["strong_correlations"]}
+    assert ("offset", "scaled") in pairs and ("offset", "inverse") in pairs
+    assert summary["correlation_matrix"]["constant"]["offset"] is None
+    magnitudes = [abs(pair["correlation"]) for pair in summary["top_correlations"]]
+    assert magnitudes == sorted(magnitudes, reverse=True)
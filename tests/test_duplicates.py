@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.duplicates import BloomFilter, DuplicateCounter, find_duplicates
+
+
+def make_frame(rows: int = 20_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": rng.integers(0, rows // 2, rows),
+        "city": rng.choice(["Oslo", "Lima", None], rows),
+        "score": rng.integers(0, 3, rows).astype(float)
+    })
+    df.loc[::10, "score"] = np.nan
+    return df
+
+
+def test_exact_matches_dataframe_duplicated():
+    df = make_frame()
+    result = find_duplicates(df)
+
+    assert result["duplicates"] == int(df.duplicated().sum())
+    top = result["top_duplicates"][0]
+    counts = df.value_counts(dropna=False)
+    assert top["count"] == counts.max()
+
+
+def test_key_columns():
+    df = make_frame()
+    result = find_duplicates(df, key_columns=["id"])
+
+    assert result["duplicates"] == int(df.duplicated(subset=["id"]).sum())
+    assert set(result["top_duplicates"][0]["key"]) == {"id"}
+    with pytest.raises(ValueError):
+        find_duplicates(df, key_columns=["missing"])
+
+
+def test_bloom_filter_never_misses_added_hashes():
+    rng = np.random.default_rng(1)
+    added = rng.integers(0, 2**63, 50_000, dtype="int64").astype("uint64")
+    absent = rng.integers(0, 2**63, 50_000, dtype="int64").astype("uint64")
+    bloom = BloomFilter(64 * 1024)
+    bloom.add(added)
+
+    assert bloom.contains(added).all()
+    assert bloom.contains(absent).mean() == pytest.approx(bloom.false_positive_rate, abs=0.01)
+
+
+def test_streaming_counts_match_across_chunks():
+    df = make_frame()
+    expected = int(df.duplicated().sum())
+    exact = DuplicateCounter(mode="exact")
+    approximate = DuplicateCounter(mode="approximate", bloom_mb=1)
+    for start in range(0, len(df), 3_000):
+        exact.update(df.iloc[start:start + 3_000])
+        approximate.update(df.iloc[start:start + 3_000])
+
+    assert exact.duplicates == expected
+    assert approximate.duplicates == pytest.approx(expected, rel=0.01)
+    assert exact.result()["top_duplicates"][0]["count"] == df.value_counts(dropna=False).max()
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        find_duplicates(make_frame(10), mode="fuzzy")
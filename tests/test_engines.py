@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+import backend.services.engines as engines
+from backend.services.engines import Engine, PandasEngine, select_engine
+
+
+def test_engine_is_abstract():
+    with pytest.raises(TypeError):
+        Engine()
+
+
+def test_auto_keeps_pandas_for_files_that_load_whole():
+    assert select_engine("auto", 1024).name == "pandas"
+
+
+def test_auto_prefers_an_installed_scanning_engine_for_large_files(monkeypatch):
+    monkeypatch.setattr(engines, "should_profile_in_chunks", lambda size_bytes: True)
+    expected = next(
+        (name for name in ("duckdb", "polars") if engines._ENGINES[name].available()),
+        "pandas"
+    )
+    assert select_engine("auto", 10**12).name == expected
+
+
+def test_rejects_unknown_and_missing_engines(monkeypatch):
+    with pytest.raises(ValueError):
+        select_engine("spark", 1024)
+    monkeypatch.setattr(engines, "pl", None)
+    with pytest.raises(ValueError):
+        select_engine("polars", 1024)
+
+
+def test_pandas_engine_loads_small_files(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"x": [1, 2, 3], "city": ["a", "b", "a"]}).to_csv(path, index=False)
+
+    df, profile = PandasEngine().profile_csv(str(path), path.stat().st_size)
+    assert profile is None
+    assert df["x"].tolist() == [1, 2, 3]
+    assert PandasEngine().options(path.stat().st_size) == {"engine": "pandas"}
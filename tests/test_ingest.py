@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.datasets import register_dataframe, release_dataframe
+from backend.services.ingest import optimize_dtypes, read_csv, sniff_csv
+from backend.services.tools import analyze_basic_stats
+
+
+def _stats(df: pd.DataFrame) -> dict:
+    df_key = register_dataframe(df)
+    try:
+        return analyze_basic_stats.invoke({"df_key": df_key})
+    finally:
+        release_dataframe(df_key)
+
+
+def make_frame(rows: int = 2_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "small": rng.integers(0, 100, rows),
+        "halves": rng.integers(0, 8, rows) / 2,
+        "precise": rng.normal(size=rows),
+        "flag": rng.integers(0, 2, rows).astype(bool),
+        "city": rng.choice(["Oslo", "Lima", "Pune", None], rows),
+        "id": [f"row{i}" for i in range(rows)],
+        "day": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M").to_numpy(dtype=object)
+    })
+
+
+def test_narrows_dtypes_without_changing_values():
+    df = make_frame()
+    narrow = optimize_dtypes(df)
+
+    assert str(narrow["small"].dtype) == "int8"
+    assert str(narrow["halves"].dtype) == "float32"
+    assert str(narrow["precise"].dtype) == "float64"
+    assert str(narrow["flag"].dtype) == "bool"
+    assert str(narrow["city"].dtype) == "category"
+    assert str(narrow["id"].dtype) == "object"
+    assert str(narrow["day"].dtype) == "datetime64[ns]"
+    assert narrow.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+    for col in ("small", "halves", "precise", "city", "id"):
+        assert narrow[col].astype(object).equals(df[col].astype(object))
+
+
+def test_statistics_are_unchanged():
+    df = make_frame().drop(columns="day")
+    stats, narrow_stats = _stats(df), _stats(optimize_dtypes(df))
+
+    for key in ("missing_values", "duplicates", "numerical_stats", "categorical_stats"):
+        assert narrow_stats[key] == stats[key]
+
+
+@pytest.mark.parametrize("content, encoding, delimiter", [
+    ("name;price\nCafé;1,5\nTea;2\n".encode("utf-8"), "utf-8", ";"),
+    ("name\tprice\nCafé\t1.5\nTea\t2\n".encode("cp1252"), "cp1252", "\t"),
+    ("name|price\nCafé|1.5\nTea|2\n".encode("utf-8-sig"), "utf-8-sig", "|")
+])
+def test_sniffs_encoding_and_delimiter(tmp_path, content, encoding, delimiter):
+    path = tmp_path / "data.csv"
+    path.write_bytes(content)
+    dialect = sniff_csv(str(path))
+
+    assert dialect["encoding"] == encoding
+    assert dialect["delimiter"] == delimiter
+    assert dialect["header"]
+    assert read_csv(str(path))["name"].astype(str).tolist() == ["Café", "Tea"]
+
+
+def test_files_without_header_get_column_names(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("1.5,2.25,3\n4.5,5.75,6\n7.5,8.25,9\n")
+    dialect = sniff_csv(str(path))
+
+    assert not dialect["header"]
+    assert read_csv(str(path)).columns.tolist() == ["column_1", "column_2", "column_3"]
+
+
+def test_integer_headers_such_as_years_are_kept(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("2021,2022,2023\n1.5,2.5,3.5\n4.5,5.5,6.5\n")
+
+    assert sniff_csv(str(path))["header"]
+    assert read_csv(str(path)).columns.tolist() == ["2021", "2022", "2023"]
+
+
+@pytest.mark.parametrize("arrow", [True, False])
+def test_dates_parse_to_nanoseconds_with_either_parser(tmp_path, monkeypatch, arrow):
+    if arrow:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr("backend.services.ingest.ARROW_CSV", arrow)
+    path = tmp_path / "data.csv"
+    path.write_text("day,value\n2024-01-01 10:00,1\n2024-01-02 11:30,2\n")
+
+    assert str(read_csv(str(path))["day"].dtype) == "datetime64[ns]"
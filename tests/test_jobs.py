@@ -0,0 +1,105 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from backend.services.jobs import InMemoryJobStore, JobManager, JobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteJobStore(str(tmp_path / "jobs.db"))
+    return InMemoryJobStore()
+
+
+def test_job_store_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+
+def test_records_status_progress_and_result(store):
+    job = store.create("j1", "csv")
+    assert job["status"] == "queued"
+
+    store.update("j1", status="running")
+    store.add_progress("j1", "analysis")
+    store.add_progress("j1", "narrative")
+    store.update("j1", status="completed", result={"rows": 3})
+
+    job = store.get("j1")
+    assert job["status"] == "completed"
+    assert [step["node"] for step in job["progress"]] == ["analysis", "narrative"]
+    assert job["result"] == {"rows": 3}
+    assert store.get("missing") is None
+
+
+def test_sqlite_store_keeps_numpy_results_as_numbers(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    store.create("j1", "csv")
+    store.update("j1", status="completed", result={"rows": np.int64(3), "mean": np.float64(1.5), "std": np.nan})
+
+    assert store.get("j1")["result"] == {"rows": 3, "mean": 1.5, "std": None}
+
+
+def test_purges_only_finished_jobs(store):
+    store.create("done", "csv")
+    store.update("done", status="completed")
+    store.create("running", "csv")
+    store.update("running", status="running")
+
+    store.purge(time.time() + 1)
+    assert store.get("done") is None
+    assert store.get("running") is not None
+
+
+def test_manager_runs_jobs_in_the_background():
+    manager = JobManager(InMemoryJobStore())
+
+    async def runner(on_node):
+        on_node("analysis")
+        return {"status": "success"}
+
+    async def failing(on_node):
+        raise ValueError("bad file")
+
+    async def scenario():
+        job = manager.submit("csv", runner)
+        failed = manager.submit("csv", failing)
+        assert job["status"] == "queued"
+        await asyncio.gather(*manager._tasks)
+        return manager.get(job["job_id"]), manager.get(failed["job_id"])
+
+    job, failed = asyncio.run(scenario())
+    assert job["status"] == "completed" and job["result"] == {"status": "success"}
+    assert [step["node"] for step in job["progress"]] == ["analysis"]
+    assert failed["status"] == "failed" and failed["error"] == "bad file"
+
+
+def test_job_submission_forwards_sampling_and_engine(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.routes import analysis
+
+    calls = []
+
+    async def analyze_csv(upload, on_node=None, sampling=None, engine=None):
+        upload.cleanup()
+        calls.append({"sampling": sampling, "engine": engine})
+        return {"status": "success"}
+
+    monkeypatch.setattr(analysis.analyzer, "analyze_csv", analyze_csv)
+    app = FastAPI()
+    app.include_router(analysis.router)
+    client = TestClient(app)
+    files = {"file": ("data.csv", b"x,y\n1,2\n", "text/csv")}
+
+    response = client.post("/api/analyze/jobs", files=files,
+                           data={"engine": "pandas", "sample": "true", "target_error": "0.02", "stratify_by": "x"})
+    assert response.status_code == 202
+    assert client.post("/api/analyze/jobs", files=files, data={"engine": "spark"}).status_code == 400
+
+    deadline = time.time() + 5
+    while not calls and time.time() < deadline:
+        time.sleep(0.01)
+    assert calls[0]["engine"] == "pandas"
+    assert calls[0]["sampling"]["target_error"] == 0.02 and calls[0]["sampling"]["stratify_by"] == "x"
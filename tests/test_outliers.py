@@ -0,0 +1,98 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.datasets import register_dataframe, release_dataframe
+from backend.services.outliers import find_outliers, outlier_mask
+from backend.services.sketches import SKETCH_EXACT_LIMIT
+from backend.services.tools import detect_outliers
+
+
+def baseline_outliers(df: pd.DataFrame) -> dict:
+    """detect_outliers as it was before the vectorized scan."""
+    outliers = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        if df[col].notna().sum() > 0:
+            q1 = df[col].quantile(0.25)
+            q3 = df[col].quantile(0.75)
+            iqr = q3 - q1
+            lower_bound = q1 - 1.5 * iqr
+            upper_bound = q3 + 1.5 * iqr
+            outlier_count = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
+            if outlier_count > 0:
+                outliers[col] = {
+                    "count": int(outlier_count),
+                    "percentage": float(round(outlier_count / len(df) * 100, 2)),
+                    "lower_bound": float(lower_bound),
+                    "upper_bound": float(upper_bound),
+                    "outlier_values": df[df[col] < lower_bound][col].tolist()[:5] +
+                                      df[df[col] > upper_bound][col].tolist()[:5]
+                }
+    return json.loads(json.dumps(outliers))
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(size=rows),
+        "heavy": rng.standard_t(2, size=rows),
+        "count": rng.poisson(3, size=rows),
+        "constant": np.ones(rows),
+        "empty": np.full(rows, np.nan),
+        "label": rng.choice(["x", "y"], rows)
+    })
+    df.loc[::9, "heavy"] = np.nan
+    df.loc[::5, "count"] = None
+    return df
+
+
+@pytest.mark.parametrize("rows", [5_000, SKETCH_EXACT_LIMIT + 50_000])
+def test_iqr_matches_baseline(rows):
+    df = make_frame(rows)
+    df_key = register_dataframe(df)
+    try:
+        outliers = json.loads(json.dumps(detect_outliers.invoke({"df_key": df_key})))
+    finally:
+        release_dataframe(df_key)
+
+    assert outliers == baseline_outliers(df)
+
+
+def test_mad_flags_values_far_from_the_median():
+    values = np.concatenate([np.linspace(-1, 1, 99), [50.0]])
+    outliers = find_outliers(pd.DataFrame({"x": values}), method="mad")
+
+    assert outliers["x"]["count"] == 1
+    assert outliers["x"]["outlier_values"] == [50.0]
+
+
+def test_mad_of_zero_falls_back_to_mean_absolute_deviation():
+    values = np.array([1.0] * 90 + [2.0] * 9 + [40.0])
+    outliers = find_outliers(pd.DataFrame({"x": values}), method="mad")
+
+    assert outliers["x"]["outlier_values"] == [40.0]
+
+
+def test_percentile_trims_both_tails():
+    df = pd.DataFrame({"x": np.arange(1000, dtype="float64")})
+    outliers = find_outliers(df, method="percentile")
+
+    expected_lower, expected_upper = df["x"].quantile([0.01, 0.99])
+    assert outliers["x"]["lower_bound"] == expected_lower
+    assert outliers["x"]["upper_bound"] == expected_upper
+    assert outliers["x"]["count"] == 20
+
+
+def test_rows_and_mask_agree():
+    df = make_frame(2_000).set_index(pd.RangeIndex(10_000, 12_000))
+    outliers = find_outliers(df, include_rows=True)
+    mask = outlier_mask(df)
+
+    for col, info in outliers.items():
+        assert info["rows"] == df.index[mask[col]].tolist()
+        assert info["count"] == len(info["rows"])
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        find_outliers(make_frame(10), method="zscore")
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from backend.services.outliers import _scan_block
+from backend.services.parallel import map_column_batches
+from backend.services.profiler import _profile_numeric_block, profile_numeric_columns
+
+
+def test_column_batches_match_the_serial_profile():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(5_000, 10)), columns=[f"c{i}" for i in range(10)])
+    df.iloc[::7, 3] = np.nan
+    df.iloc[::11, 5] = np.inf
+    columns = list(df.columns)
+
+    assert map_column_batches(df, columns, _profile_numeric_block) == list(profile_numeric_columns(df, columns).values())
+
+
+def test_column_batches_pass_extra_arguments():
+    df = pd.DataFrame({"x": [1.0, 2.0, 3.0, 100.0], "y": [1.0, 1.0, 1.0, 1.0]})
+    scans = map_column_batches(df, ["x", "y"], _scan_block, "iqr", False)
+
+    assert scans[0]["count"] == 1 and scans[1] is None
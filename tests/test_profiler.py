@@ -0,0 +1,165 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.datasets import register_dataframe, release_dataframe
+from backend.services import ingest
+from backend.services.ingest import read_csv
+from backend.services.profiler import CHUNKED_PROFILE_MB, profile_csv_in_chunks
+from backend.services.sketches import SKETCH_EXACT_LIMIT
+from backend.services.tools import analyze_basic_stats, detect_outliers
+from backend.services.uploads import MAX_UPLOAD_MB
+
+
+def baseline_basic_stats(df: pd.DataFrame) -> dict:
+    """analyze_basic_stats as it was before the fused profiler."""
+    result = {
+        "shape": {"rows": int(df.shape[0]), "columns": int(df.shape[1])},
+        "columns": list(df.columns),
+        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+        "missing_values": {col: int(df[col].isna().sum()) for col in df.columns},
+        "missing_percentage": {col: float(round(df[col].isna().sum() / len(df) * 100, 2)) for col in df.columns},
+        "duplicates": int(df.duplicated().sum()),
+        "memory_usage": float(round(df.memory_usage(deep=True).sum() / 1024**2, 2)),
+        "numerical_columns": df.select_dtypes(include=[np.number]).columns.tolist(),
+        "categorical_columns": df.select_dtypes(include=['object', 'category']).columns.tolist(),
+        "datetime_columns": df.select_dtypes(include=['datetime64']).columns.tolist()
+    }
+
+    numerical_stats = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        clean_series = df[col].dropna()
+        finite_series = clean_series[np.isfinite(clean_series)]
+        if len(finite_series) > 0:
+            numerical_stats[col] = {
+                "mean": float(finite_series.mean()),
+                "median": float(finite_series.median()),
+                "std": float(finite_series.std()) if len(finite_series) > 1 else 0.0,
+                "min": float(finite_series.min()),
+                "max": float(finite_series.max()),
+                "q25": float(finite_series.quantile(0.25)),
+                "q75": float(finite_series.quantile(0.75)),
+                "count": int(len(finite_series)),
+                "null_count": int(len(df[col]) - len(clean_series)),
+                "infinite_count": int(len(clean_series) - len(finite_series))
+            }
+        else:
+            numerical_stats[col] = {
+                "mean": None, "median": None, "std": None, "min": None, "max": None, "q25": None, "q75": None,
+                "count": 0,
+                "null_count": int(len(df[col]) - len(clean_series)),
+                "infinite_count": int(len(clean_series))
+            }
+
+    categorical_stats = {}
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        clean_series = df[col].dropna()
+        if len(clean_series) > 0:
+            value_counts = clean_series.value_counts().head(10)
+            mode_values = clean_series.mode()
+            categorical_stats[col] = {
+                "unique_values": int(clean_series.nunique()),
+                "mode": str(mode_values.iloc[0]) if len(mode_values) > 0 else None,
+                "top_values": {str(k): int(v) for k, v in value_counts.items()},
+                "total_count": int(len(clean_series)),
+                "null_count": int(len(df[col]) - len(clean_series))
+            }
+        else:
+            categorical_stats[col] = {
+                "unique_values": 0, "mode": None, "top_values": {}, "total_count": 0,
+                "null_count": int(len(df[col]))
+            }
+
+    result["numerical_stats"] = numerical_stats
+    result["categorical_stats"] = categorical_stats
+    return json.loads(json.dumps(result))
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(size=rows),
+        "skewed": rng.lognormal(size=rows),
+        "count": rng.integers(0, 1000, rows),
+        "flag": rng.integers(0, 2, rows).astype(bool),
+        "empty": np.full(rows, np.nan),
+        "city": rng.choice(["Oslo", "Lima", "Pune", "Kyiv"], rows),
+        "id": rng.integers(0, rows, rows).astype(str),
+        "blank": pd.Series([None] * rows, dtype="object")
+    })
+    df.loc[::7, "normal"] = np.nan
+    df.loc[::11, "skewed"] = np.inf
+    df.loc[::13, "id"] = None
+    df.loc[: rows // 20, "count"] = df.loc[0, "count"]
+    return df
+
+
+@pytest.mark.parametrize("rows", [5_000, SKETCH_EXACT_LIMIT + 50_000])
+def test_matches_baseline_basic_stats(rows):
+    df = make_frame(rows)
+    df_key = register_dataframe(df)
+    try:
+        stats = json.loads(json.dumps(analyze_basic_stats.invoke({"df_key": df_key})))
+    finally:
+        release_dataframe(df_key)
+
+    expected = baseline_basic_stats(df)
+    assert stats == expected
+    for col, col_stats in expected["categorical_stats"].items():
+        assert list(stats["categorical_stats"][col]["top_values"]) == list(col_stats["top_values"])
+
+
+def test_matches_baseline_on_duplicated_rows():
+    df = pd.concat([make_frame(500, seed=1)] * 3, ignore_index=True)
+    df_key = register_dataframe(df)
+    try:
+        stats = json.loads(json.dumps(analyze_basic_stats.invoke({"df_key": df_key})))
+    finally:
+        release_dataframe(df_key)
+
+    assert stats == baseline_basic_stats(df)
+
+
+def test_chunked_profiling_applies_below_the_upload_limit():
+    assert CHUNKED_PROFILE_MB < MAX_UPLOAD_MB
+
+
+def test_chunked_profile_matches_resident_profile(tmp_path, monkeypatch):
+    # Both sides parse with pandas' C parser; Arrow's may differ in the last digit.
+    monkeypatch.setattr(ingest, "ARROW_CSV", False)
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        "value": rng.normal(size=5_000),
+        "count": rng.integers(0, 50, 5_000),
+        "wide": rng.integers(0, 50, 5_000) * (np.arange(5_000) >= 4_000) * 100,
+        "halves": rng.integers(0, 8, 5_000) / 2,
+        "city": rng.choice(["Oslo", "Lima", "Pune"], 5_000),
+        "id": [f"row{i}" for i in range(5_000)],
+        "day": pd.date_range("2024-01-01", periods=5_000, freq="h").strftime("%Y-%m-%d %H:%M")
+    })
+    df.loc[::7, "value"] = np.nan
+    df.loc[:1_500, "day"] = None
+    path = tmp_path / "data.csv"
+    pd.concat([df, df.iloc[:100]], ignore_index=True).to_csv(path, index=False)
+
+    sample, profile = profile_csv_in_chunks(str(path), chunk_rows=700, sample_rows=1_000)
+    df_key = register_dataframe(read_csv(str(path)))
+    try:
+        expected = analyze_basic_stats.invoke({"df_key": df_key})
+        expected_outliers = detect_outliers.invoke({"df_key": df_key})
+    finally:
+        release_dataframe(df_key)
+
+    stats = profile["basic_stats"]
+    assert len(sample) == 1_000
+    assert stats.keys() == expected.keys()
+    assert stats["dtypes"] == expected["dtypes"]
+    assert expected["dtypes"]["wide"] == "int16" and expected["dtypes"]["day"] == "datetime64[ns]"
+    for key in ("shape", "columns", "missing_values", "duplicates", "numerical_columns", "categorical_columns",
+                "datetime_columns", "categorical_stats"):
+        assert stats[key] == expected[key]
+    assert stats["memory_usage"] == pytest.approx(expected["memory_usage"], rel=0.05, abs=0.01)
+    for col, col_stats in expected["numerical_stats"].items():
+        # Merged partial sums may differ from one pass in the last digit.
+        assert stats["numerical_stats"][col] == pytest.approx(col_stats, rel=1e-12)
+    assert profile["outliers"] == expected_outliers
@@ -0,0 +1,109 @@
+import gzip
+import json
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from backend.services import responses
+from backend.services.responses import encode_json, iter_json, json_response, negotiate_encoding
+
+
+CONTENT = {
+    "analysis_results": {
+        "basic_stats": {"rows": np.int64(3), "mean": np.float64(1.5), "missing": float("nan")},
+        "visualizations": {"univariate": [{"values": np.arange(3)}, {"values": []}], "bivariate": []}
+    },
+    "narrative_summary": "Three rows.",
+    "empty": {}
+}
+
+
+def test_encode_json_writes_numpy_values_and_nan_as_null():
+    assert json.loads(encode_json(CONTENT)) == {
+        "analysis_results": {
+            "basic_stats": {"rows": 3, "mean": 1.5, "missing": None},
+            "visualizations": {"univariate": [{"values": [0, 1, 2]}, {"values": []}], "bivariate": []}
+        },
+        "narrative_summary": "Three rows.",
+        "empty": {}
+    }
+
+
+@pytest.mark.parametrize("depth", [0, 1, 2, 4, 8])
+def test_iter_json_fragments_concatenate_to_encode_json(depth):
+    assert b"".join(iter_json(CONTENT, depth)) == encode_json(CONTENT)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("gzip, deflate", "gzip"),
+    ("deflate", None),
+    ("gzip;q=0", None),
+    ("gzip; q=0.5", "gzip"),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+    ("GZIP", "gzip")
+])
+def test_negotiate_encoding(monkeypatch, accept_encoding, expected):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_negotiate_encoding_prefers_brotli_when_installed(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", object())
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+
+
+def client(content) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/")
+    async def route(request: Request):
+        response = json_response(request, content)
+        response.headers["X-Streamed"] = str(isinstance(response, StreamingResponse))
+        return response
+
+    return TestClient(app)
+
+
+def large_content() -> dict:
+    return {"charts": [{"position": position, "values": list(range(1000))} for position in range(50)]}
+
+
+def test_json_response_compresses_large_bodies_only(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    content = large_content()
+    response = client(content).get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["X-Streamed"] == "False"
+    assert response.json() == content
+
+    response = client({"ok": True}).get("/", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip"])
+def test_json_response_streams_bodies_above_the_limit(monkeypatch, accept_encoding):
+    monkeypatch.setattr(responses, "brotli", None)
+    monkeypatch.setattr(responses, "STREAM_RESPONSE_MB", 0.1)
+    monkeypatch.setattr(responses, "STREAM_CHUNK_BYTES", 16 * 1024)
+    content = large_content()
+    response = client(content).get("/", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.headers["X-Streamed"] == "True"
+    assert response.headers.get("Content-Encoding") == (None if accept_encoding == "identity" else "gzip")
+    assert response.json() == content
+
+
+def test_streamed_gzip_body_is_one_gzip_stream(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    monkeypatch.setattr(responses, "STREAM_RESPONSE_MB", 0.1)
+    content = large_content()
+    with client(content).stream("GET", "/", headers={"Accept-Encoding": "gzip"}) as response:
+        body = b"".join(response.iter_raw())
+
+    assert json.loads(gzip.decompress(body)) == content
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.sampling import _Design, rows_for_error, sample_csv
+
+
+@pytest.fixture(scope="module")
+def csv_file(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    rows = 200_000
+    df = pd.DataFrame({
+        "x": rng.lognormal(size=rows),
+        "group": rng.choice(["a", "b", "c"], rows, p=[0.7, 0.2, 0.1]),
+        "y": rng.normal(size=rows)
+    })
+    df.loc[rng.random(rows) < 0.1, "y"] = np.nan
+    path = tmp_path_factory.mktemp("sampling") / "data.csv"
+    df.to_csv(path, index=False)
+    return str(path), df
+
+
+def test_sample_size_for_target_error():
+    assert rows_for_error(0.01) == 9604
+    assert rows_for_error(0.05) == 385
+
+
+def test_design_standard_error_of_a_simple_random_sample():
+    values = np.random.default_rng(1).normal(size=400)
+    design = _Design(np.full(400, 25.0), np.arange(400), np.zeros(400, dtype="int64"), np.array([1 - 400 / 10_000]))
+    estimate, error = design.ratio(values, np.ones(400, dtype=bool))
+
+    assert estimate == pytest.approx(values.mean())
+    assert error == pytest.approx(values.std(ddof=1) / np.sqrt(400) * np.sqrt(1 - 400 / 10_000))
+
+
+@pytest.mark.parametrize("stratify_by", [None, "group"])
+def test_reservoir_intervals_cover_the_file(csv_file, stratify_by):
+    path, df = csv_file
+    sample, profile = sample_csv(path, target_error=0.02, stratify_by=stratify_by)
+    stats = profile["basic_stats"]
+    x = stats["numerical_stats"]["x"]
+
+    assert stats["sampling"]["total_rows_exact"] and stats["shape"]["rows"] == len(df)
+    assert len(sample) >= rows_for_error(0.02)
+    assert x["mean_ci"][0] <= df["x"].mean() <= x["mean_ci"][1]
+    assert x["median_ci"][0] <= df["x"].median() <= x["median_ci"][1]
+    low, high = stats["missing_percentage_ci"]["y"]
+    assert low <= df["y"].isna().mean() * 100 <= high
+
+
+def test_random_blocks_estimate_intervals(csv_file):
+    path, df = csv_file
+    sample, profile = sample_csv(path, target_error=0.02, time_budget=1e-9)
+    stats = profile["basic_stats"]
+    x = stats["numerical_stats"]["x"]
+
+    assert stats["sampling"]["method"] == "random blocks"
+    assert stats["sampling"]["blocks"] >= 2
+    assert stats["shape"]["rows"] == pytest.approx(len(df), rel=0.05)
+    assert x["mean_ci"][0] < x["mean"] < x["mean_ci"][1]
+    assert x["median_ci"][0] <= x["median"] <= x["median_ci"][1]
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from backend.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    inflight = SingleFlight()
+    runs = []
+    progress = {"first": [], "second": []}
+
+    async def compute(notify):
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        notify("analysis")
+        return {"value": 42}
+
+    async def scenario():
+        first = asyncio.ensure_future(inflight.do("key", compute, progress["first"].append))
+        await asyncio.sleep(0)
+        assert inflight.in_flight("key")
+        second = inflight.do("key", compute, progress["second"].append)
+        return await asyncio.gather(first, second)
+
+    results = asyncio.run(scenario())
+    assert results == [{"value": 42}, {"value": 42}]
+    assert len(runs) == 1
+    assert progress == {"first": ["analysis"], "second": ["analysis"]}
+    assert not inflight.in_flight("key")
+
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    inflight = SingleFlight()
+    runs = []
+
+    async def compute(notify):
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("bad file")
+
+    async def scenario():
+        return await asyncio.gather(
+            inflight.do("key", compute), inflight.do("key", compute), return_exceptions=True
+        )
+
+    errors = asyncio.run(scenario())
+    assert [str(error) for error in errors] == ["bad file", "bad file"]
+    with pytest.raises(ValueError):
+        asyncio.run(inflight.do("key", compute))
+    assert len(runs) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_run():
+    inflight = SingleFlight()
+
+    async def compute(notify):
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        leaving = asyncio.ensure_future(inflight.do("key", compute))
+        staying = asyncio.ensure_future(inflight.do("key", compute))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        return await staying
+
+    assert asyncio.run(scenario()) == "done"
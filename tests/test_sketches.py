@@ -0,0 +1,95 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from backend.services.sketches import HyperLogLog, KLLSketch, SpaceSaving, sketch_from_dict
+
+
+def _round_trip(sketch):
+    return sketch_from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+
+def test_kll_is_exact_below_the_limit():
+    values = np.random.default_rng(0).normal(size=1001)
+    series = pd.Series(values)
+    sketch = KLLSketch(exact_limit=5000).update(values[:500]).merge(KLLSketch(exact_limit=5000).update(values[500:]))
+
+    assert sketch.is_exact
+    assert sketch.quantiles([0.25, 0.5, 0.75]) == [series.quantile(0.25), series.median(), series.quantile(0.75)]
+
+
+def test_kll_merge_stays_within_rank_error():
+    values = np.random.default_rng(1).normal(size=200_000)
+    sketch = KLLSketch(exact_limit=1000)
+    for chunk in np.array_split(values, 20):
+        sketch.merge(KLLSketch(exact_limit=1000).update(chunk))
+
+    assert not sketch.is_exact
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles([0.1, 0.5, 0.9])) / len(values)
+    np.testing.assert_allclose(ranks, [0.1, 0.5, 0.9], atol=0.02)
+
+
+@pytest.mark.parametrize("size", [100, 50_000])
+def test_kll_round_trip(size):
+    sketch = KLLSketch(exact_limit=1000).update(np.arange(size, dtype="float64"))
+    restored = _round_trip(sketch)
+
+    assert restored.n == sketch.n
+    assert restored.quantiles([0.25, 0.5, 0.75]) == sketch.quantiles([0.25, 0.5, 0.75])
+
+
+def test_hll_is_exact_below_the_limit():
+    sketch = HyperLogLog(exact_limit=1000).update(pd.Series(["a", "b", "c"])).merge(
+        HyperLogLog(exact_limit=1000).update(pd.Series(["c", "d"]))
+    )
+
+    assert sketch.is_exact
+    assert sketch.count() == 4
+
+
+def test_hll_merge_estimates_distinct_count():
+    left = HyperLogLog(exact_limit=1000).update(pd.Series(np.arange(0, 60_000)))
+    right = HyperLogLog(exact_limit=1000).update(pd.Series(np.arange(40_000, 100_000)))
+    merged = left.merge(right)
+
+    assert not merged.is_exact
+    assert merged.count() == pytest.approx(100_000, rel=0.03)
+
+
+@pytest.mark.parametrize("size", [10, 5_000])
+def test_hll_round_trip(size):
+    sketch = HyperLogLog(exact_limit=1000).update(pd.Series(np.arange(size)))
+    restored = _round_trip(sketch)
+
+    assert restored.is_exact == sketch.is_exact
+    assert restored.count() == sketch.count()
+    assert restored.merge(sketch).count() == sketch.count()
+
+
+def test_space_saving_merge_is_exact_within_capacity():
+    left = pd.Series(["a", "b", "a", "c"])
+    right = pd.Series(["a", "c", "d"])
+    sketch = SpaceSaving(capacity=10).update(left).merge(SpaceSaving(capacity=10).update(right))
+
+    assert sketch.is_exact
+    assert sketch.top(2).to_dict() == {"a": 3, "c": 2}
+    assert sketch.mode() == "a"
+
+
+def test_space_saving_keeps_heavy_hitters_when_truncated():
+    values = pd.Series(["hot"] * 500 + [f"cold{i}" for i in range(1000)])
+    sketch = SpaceSaving(capacity=50)
+    for start in range(0, len(values), 150):
+        sketch.merge(SpaceSaving(capacity=50).update(values.iloc[start:start + 150]))
+
+    assert not sketch.is_exact
+    assert sketch.mode() == "hot"
+    assert sketch.top(1)["hot"] >= 500
+
+
+def test_space_saving_round_trip():
+    sketch = SpaceSaving(capacity=3).update(pd.Series(list("aabbbcdd")))
+    restored = _round_trip(sketch)
+
+    assert restored.truncated == sketch.truncated
+    assert restored.top(3).to_dict() == sketch.top(3).to_dict()
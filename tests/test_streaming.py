@@ -0,0 +1,136 @@
+import asyncio
+import io
+import time
+from typing import TypedDict
+import numpy as np
+import pytest
+from langgraph.config import get_stream_writer
+from langgraph.graph import END, StateGraph
+from starlette.datastructures import UploadFile
+import backend.interactors.analyzer as analyzer_module
+from backend.interactors.analyzer import DataAnalyzer
+from backend.services.streaming import format_sse, graph_events
+from backend.services.uploads import spool_upload
+
+
+class State(TypedDict):
+    value: int
+
+
+def _graph(fail: bool = False):
+    def first(state: State):
+        get_stream_writer()({"event": "basic_stats", "data": {"rows": state["value"]}})
+        if fail:
+            raise ValueError("broken node")
+        return {"value": state["value"] + 1}
+
+    def second(state: State):
+        return {"value": state["value"] * 10}
+
+    workflow = StateGraph(State)
+    workflow.add_node("first", first)
+    workflow.add_node("second", second)
+    workflow.set_entry_point("first")
+    workflow.add_edge("first", "second")
+    workflow.add_edge("second", END)
+    return workflow.compile()
+
+
+async def _collect(graph):
+    return [event async for event in graph_events(graph, {"value": 1})]
+
+
+def test_yields_partial_results_then_final_state():
+    events = asyncio.run(_collect(_graph()))
+
+    assert events == [
+        ("basic_stats", {"rows": 1}),
+        ("node_completed", {"node": "first"}),
+        ("node_completed", {"node": "second"}),
+        ("final_state", {"value": 20})
+    ]
+
+
+def test_raises_node_errors():
+    with pytest.raises(ValueError, match="broken node"):
+        asyncio.run(_collect(_graph(fail=True)))
+
+
+def test_formats_server_sent_events():
+    assert format_sse("chart", {"x": np.arange(2), "y": float("nan")}) == 'event: chart\ndata: {"x":[0,1],"y":null}\n\n'
+
+
+class AnalysisState(TypedDict):
+    messages: list
+    df_key: str
+    dataset_id: str
+    profile: dict
+    analysis_results: dict
+    narrative_summary: str
+
+
+def _analysis_graph(runs: list):
+    def analysis(state: AnalysisState):
+        runs.append(state["dataset_id"])
+        get_stream_writer()({"event": "basic_stats", "data": {"rows": 2}})
+        time.sleep(0.2)
+        return {"analysis_results": {"basic_stats": {"numerical_stats": {}}}, "narrative_summary": "Two rows."}
+
+    workflow = StateGraph(AnalysisState)
+    workflow.add_node("analysis", analysis)
+    workflow.set_entry_point("analysis")
+    workflow.add_edge("analysis", END)
+    return workflow.compile()
+
+
+def test_streams_and_analyses_share_one_run(monkeypatch):
+    monkeypatch.setattr(analyzer_module, "CACHE_ENABLED", False)
+    runs = []
+    analyzer = DataAnalyzer()
+    analyzer.graph = _analysis_graph(runs)
+    progress = []
+
+    async def upload():
+        return await spool_upload(UploadFile(io.BytesIO(b"x,y\n1,2\n3,4\n"), filename="data.csv"), suffix=".csv")
+
+    async def stream():
+        return [event async for event in analyzer.stream_csv(await upload())]
+
+    async def scenario():
+        first = asyncio.ensure_future(stream())
+        for _ in range(100):
+            if analyzer.inflight._calls:
+                break
+            await asyncio.sleep(0.01)
+        joined = asyncio.ensure_future(stream())
+        plain = asyncio.ensure_future(analyzer.analyze_csv(await upload(), progress.append))
+        return await asyncio.gather(first, joined, plain)
+
+    first, joined, plain = asyncio.run(scenario())
+    assert len(runs) == 1
+    assert first[0] == ("basic_stats", {"rows": 2})
+    assert ("node_completed", {"node": "analysis"}) in first and ("node_completed", {"node": "analysis"}) in joined
+    assert first[-1] == joined[-1] == ("result", plain)
+    assert plain["narrative_summary"] == "Two rows."
+    assert progress == ["analysis"]
+
+
+def test_leaving_stream_does_not_stop_the_shared_run(monkeypatch):
+    monkeypatch.setattr(analyzer_module, "CACHE_ENABLED", False)
+    runs = []
+    analyzer = DataAnalyzer()
+    analyzer.graph = _analysis_graph(runs)
+
+    async def upload():
+        return await spool_upload(UploadFile(io.BytesIO(b"x,y\n1,2\n3,4\n"), filename="data.csv"), suffix=".csv")
+
+    async def scenario():
+        events = analyzer.stream_csv(await upload())
+        assert await events.__anext__() == ("basic_stats", {"rows": 2})
+        joined = asyncio.ensure_future(analyzer.analyze_csv(await upload()))
+        await asyncio.sleep(0)
+        await events.aclose()
+        return await joined
+
+    assert asyncio.run(scenario())["narrative_summary"] == "Two rows."
+    assert len(runs) == 1
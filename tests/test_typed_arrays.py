@@ -0,0 +1,61 @@
+import base64
+import json
+import numpy as np
+import plotly.graph_objects as go
+from backend.services import charts
+from backend.services.charts import chart_payload, typed_array_values
+
+
+def typed_array(values: np.ndarray) -> dict:
+    spec = {"dtype": values.dtype.str.lstrip("<|"), "bdata": base64.b64encode(values.tobytes()).decode()}
+    if values.ndim > 1:
+        spec["shape"] = ",".join(str(size) for size in values.shape)
+    return spec
+
+
+def test_typed_array_values_decodes_vectors_and_matrices():
+    vector = np.array([1.5, -2.0, 3.25])
+    matrix = np.arange(6, dtype="int16").reshape(2, 3)
+
+    np.testing.assert_array_equal(typed_array_values(typed_array(vector)), vector)
+    decoded = typed_array_values(typed_array(matrix))
+    assert decoded.shape == (2, 3)
+    np.testing.assert_array_equal(decoded, matrix)
+
+
+def figure() -> go.Figure:
+    return go.Figure([
+        go.Scatter(x=np.linspace(0, 1, 100), y=np.arange(100, dtype="float64")),
+        go.Heatmap(z=np.arange(12, dtype="float64").reshape(3, 4))
+    ])
+
+
+def test_chart_payload_keeps_typed_arrays(monkeypatch):
+    monkeypatch.setattr(charts, "CHART_BINARY", True)
+    payload = chart_payload(figure())
+
+    scatter, heatmap = payload["data"]
+    assert "bdata" in scatter["y"]
+    np.testing.assert_array_equal(typed_array_values(scatter["y"]), np.arange(100))
+    assert typed_array_values(heatmap["z"]).shape == (3, 4)
+    json.dumps(payload)
+
+
+def test_chart_payload_expands_typed_arrays_when_binary_is_off(monkeypatch):
+    monkeypatch.setattr(charts, "CHART_BINARY", False)
+    payload = chart_payload(figure())
+
+    scatter, heatmap = payload["data"]
+    assert scatter["y"] == list(np.arange(100, dtype="float64"))
+    assert heatmap["z"] == np.arange(12, dtype="float64").reshape(3, 4).tolist()
+    json.dumps(payload)
+
+
+def test_chart_payload_matches_plotly_json(monkeypatch):
+    monkeypatch.setattr(charts, "CHART_BINARY", True)
+    fig = figure()
+    payload = chart_payload(fig)
+
+    assert payload == json.loads(fig.to_json())
+    np.testing.assert_array_equal(typed_array_values(payload["data"][0]["x"]), fig.data[0].x)
+    np.testing.assert_array_equal(typed_array_values(payload["data"][1]["z"]), fig.data[1].z)
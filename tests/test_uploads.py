@@ -0,0 +1,52 @@
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+from fastapi import FastAPI, File, UploadFile as FastAPIUploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+from backend.services.uploads import UploadLimitMiddleware, spool_upload
+
+
+def _upload(content: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename="data.csv")
+
+
+def test_spools_content_with_size_and_fingerprint():
+    content = b"x,y\n1,2\n" * 10_000
+    upload = asyncio.run(spool_upload(_upload(content), suffix=".csv"))
+    try:
+        with open(upload.path, "rb") as f:
+            assert f.read() == content
+        assert upload.size == len(content)
+        assert upload.fingerprint == hashlib.sha256(content).hexdigest()
+    finally:
+        upload.cleanup()
+    assert not os.path.exists(upload.path)
+
+
+@pytest.mark.parametrize("content, max_bytes", [(b"", 100), (b"x" * 101, 100)])
+def test_rejects_empty_and_oversized_uploads(tmp_path, monkeypatch, content, max_bytes):
+    monkeypatch.setattr("backend.services.uploads.UPLOAD_DIR", str(tmp_path))
+    with pytest.raises(ValueError):
+        asyncio.run(spool_upload(_upload(content), max_bytes=max_bytes))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_middleware_rejects_oversized_uploads_before_parsing():
+    received = []
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_bytes=1024)
+
+    @app.post("/upload")
+    async def upload(file: FastAPIUploadFile = File(...)):
+        received.append(file.filename)
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("data.csv", b"x" * 1024)}).status_code == 200
+    response = client.post("/upload", files={"file": ("data.csv", b"x" * 200_000)})
+    assert response.status_code == 413
+    assert "upload limit" in response.json()["detail"]
+    assert received == ["data.csv"]